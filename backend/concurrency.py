@@ -0,0 +1,113 @@
+"""
+Bounded worker pools for blocking work
+Keeps embedding, parsing, LLM and storage calls off the asyncio event loop
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+from backend.config import EMBEDDING_WORKERS, PARSING_WORKERS, LLM_WORKERS, IO_WORKERS
+
+
+# Pool name -> maximum number of worker threads
+POOL_SIZES: Dict[str, int] = {
+    "embedding": EMBEDDING_WORKERS,
+    "parsing": PARSING_WORKERS,
+    "llm": LLM_WORKERS,
+    "io": IO_WORKERS
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+# Marks iterator exhaustion when stepping an iterator inside a pool
+_EXHAUSTED = object()
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    """Get or create the named worker pool"""
+    if name not in POOL_SIZES:
+        raise ValueError(f"Unknown worker pool: {name}")
+    
+    with _pools_lock:
+        if name not in _pools:
+            _pools[name] = ThreadPoolExecutor(
+                max_workers=POOL_SIZES[name],
+                thread_name_prefix=f"campusnexus-{name}"
+            )
+        return _pools[name]
+
+
+async def run_in_pool(name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run a blocking callable in the named pool without blocking the event loop
+    
+    Args:
+        name: Pool name ("embedding", "parsing", "llm" or "io")
+        func: Blocking callable
+        *args, **kwargs: Arguments for the callable
+        
+    Returns:
+        The callable's return value
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        get_pool(name),
+        functools.partial(func, *args, **kwargs)
+    )
+
+
+async def iterate_in_pool(name: str, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """
+    Consume a blocking iterator from the named pool, one item at a time
+    
+    When the consumer stops early (the async iterator is closed, or the
+    task is cancelled because the client went away), a generator is
+    closed in the pool as soon as any step already running returns, so
+    it stops pulling from its source (e.g. an Ollama stream) and the
+    pool slot is free for other requests.
+    
+    Args:
+        name: Pool name
+        iterator: Blocking iterator (e.g. a token stream)
+        
+    Yields:
+        Items produced by the iterator
+    """
+    iterator = iter(iterator)
+    pool = get_pool(name)
+    step: Optional[Future] = None
+    try:
+        while True:
+            step = pool.submit(next, iterator, _EXHAUSTED)
+            item = await asyncio.wrap_future(step)
+            if item is _EXHAUSTED:
+                return
+            yield item
+    finally:
+        if hasattr(iterator, "close"):
+            _close_after(step, iterator, pool)
+
+
+def _close_after(step: Optional[Future], iterator: Any, pool: ThreadPoolExecutor):
+    """Close a generator in the pool once its in-flight step (if any) is done"""
+    def close(_=None):
+        try:
+            pool.submit(iterator.close)
+        except RuntimeError:
+            # Pool already shut down
+            pass
+    
+    if step is None:
+        close()
+    else:
+        step.add_done_callback(close)
+
+
+def shutdown_pools(wait: bool = True):
+    """Shut down all worker pools"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=wait)
+        _pools.clear()
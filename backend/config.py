@@ -10,6 +10,9 @@ BASE_DIR = Path(__file__).parent.parent
 DATA_DIR = BASE_DIR / "data"
 CHROMA_DB_DIR = DATA_DIR / "chroma_db"
 UPLOADS_DIR = BASE_DIR / "uploads"
+GOVERNANCE_DB_PATH = DATA_DIR / "governance.db"
+PYQ_ANALYTICS_DB_PATH = DATA_DIR / "pyq_analytics.db"
+KNOWLEDGE_GRAPH_DB_PATH = DATA_DIR / "knowledge_graph.db"
 
 # Create directories if they don't exist
 CHROMA_DB_DIR.mkdir(parents=True, exist_ok=True)
@@ -20,22 +23,144 @@ OLLAMA_BASE_URL = "http://localhost:11434"
 OLLAMA_MODEL = "mistral"
 OLLAMA_TIMEOUT = 120  # seconds
 
+# LLM Batch Executor (knowledge graph and PYQ topic extraction)
+# Keep concurrency at or below Ollama's OLLAMA_NUM_PARALLEL
+LLM_BATCH_CONCURRENCY = 4
+LLM_BATCH_TIMEOUT = 90  # seconds per request
+LLM_BATCH_MAX_RETRIES = 2
+LLM_BATCH_BACKOFF_SECONDS = 1.0  # Doubled after each failed attempt
+
 # Embedding Configuration
 EMBEDDING_MODEL = "all-MiniLM-L6-v2"
 EMBEDDING_DEVICE = "cpu"  # Use "cuda" if GPU available
+EMBEDDING_CACHE_ENABLED = True
+EMBEDDING_CACHE_PATH = DATA_DIR / "embedding_cache.db"
 
 # ChromaDB Configuration
 CHROMA_COLLECTION_NAME = "campus_documents"
 CHROMA_DISTANCE_METRIC = "cosine"
+CHROMA_PAGE_SIZE = 500  # Chunks fetched per page when iterating the collection
 
 # RAG Configuration
 TOP_K_RETRIEVAL = 5
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
-MAX_CONTEXT_LENGTH = 4000
+
+# Context Packing
+# Retrieved chunks are packed into the prompt by relevance per Mistral
+# token, with overlapping neighbour chunks merged
+MAX_CONTEXT_TOKENS = 1000  # About 4000 characters of English text
+MISTRAL_TOKENIZER = DATA_DIR / "tokenizers" / "mistral"  # Local tokenizer files (see README); never downloaded
+CONTEXT_CHARS_PER_TOKEN = 3.5  # Token estimate when the tokenizer is not available
+
+# Chunking Configuration
+# "characters" splits by CHUNK_SIZE/CHUNK_OVERLAP; "tokens" measures chunks
+# with the embedding model's tokenizer so each fits the model's input
+# window instead of being truncated when embedded
+CHUNKING_MODE = "characters"
+TOKEN_CHUNK_SIZE = None  # Tokens per chunk; None fills the model's window
+TOKEN_CHUNK_OVERLAP = 32
+TOKENIZER_BATCH_SIZE = 64  # Text pieces tokenized per call
+TOKENIZER_CACHE_SIZE = 50000  # Text pieces whose token offsets are kept
+
+# Chunking Profiles
+# Each document is chunked with the profile for its type; a profile
+# overrides any of mode, chunk_size, chunk_overlap, token_chunk_size and
+# token_chunk_overlap from the settings above. Every document records its
+# profile and a fingerprint of the settings it was chunked with, so after
+# tuning a profile `python -m backend.rechunk` re-chunks just the
+# documents it affects.
+CHUNKING_PROFILES = {
+    "default": {},
+    "pdf": {},
+    "slides": {"chunk_size": 600, "chunk_overlap": 100},  # Short, self-contained slide text
+    "question_paper": {"chunk_size": 500, "chunk_overlap": 50},  # About one question per chunk
+}
+# Filenames matching this (case-insensitive) use the question_paper profile
+QUESTION_PAPER_FILENAME_PATTERN = r"pyq|question|paper|exam|midsem|endsem|quiz"
+
+# Hybrid Retrieval Configuration
+# A BM25 index kept next to ChromaDB catches exact terms (course codes,
+# algorithm names) that dense search misses; rankings are merged with
+# reciprocal rank fusion
+LEXICAL_INDEX_ENABLED = True
+LEXICAL_INDEX_PATH = DATA_DIR / "lexical_index.db"
+LEXICAL_INDEX_MMAP_BYTES = 256 * 1024 * 1024
+BM25_K1 = 1.5
+BM25_B = 0.75
+HYBRID_LEXICAL_WEIGHT = 0.5        # Default share of the fused score; overridable per query
+HYBRID_RRF_K = 60
+HYBRID_CANDIDATE_MULTIPLIER = 3    # Candidates taken from each ranking per requested result
+
+# Re-ranking Configuration
+# Candidates are over-fetched and re-scored with a small cross-encoder on CPU.
+# Re-ranking is skipped when its estimated cost exceeds the latency budget
+# or too many requests are already re-ranking.
+RERANK_ENABLED = True
+RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+RERANK_CANDIDATE_MULTIPLIER = 4    # Candidates scored per requested result
+RERANK_BATCH_SIZE = 16
+RERANK_MAX_LENGTH = 512            # Tokens per (query, chunk) pair
+RERANK_LATENCY_BUDGET_MS = 400
+RERANK_MAX_IN_FLIGHT = 2
+RERANK_PROBE_INTERVAL = 20         # Re-rank one request after this many skips to refresh the estimate
+
+# Query Cache Configuration
+# In-process LRU caches for query embeddings and top-k results. Results are
+# dropped whenever this process changes the collection; the TTL bounds
+# staleness from changes made by other workers.
+QUERY_CACHE_ENABLED = True
+QUERY_CACHE_MAX_ENTRIES = 1024
+QUERY_CACHE_TTL_SECONDS = 600
+
+# Semantic Answer Cache
+# Reuses a generated answer when a new query is within the cosine threshold
+# of a cached one and retrieval returned exactly the same chunks
+ANSWER_CACHE_ENABLED = True
+ANSWER_CACHE_MAX_ENTRIES = 512
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.95
+
+# Concurrency Configuration
+# Blocking work runs in bounded thread pools so the event loop stays responsive
+EMBEDDING_WORKERS = 2   # SentenceTransformer encoding and retrieval
+PARSING_WORKERS = 2     # PDF/DOCX/PPTX text extraction
+LLM_WORKERS = 4         # Ollama generation calls
+IO_WORKERS = 8          # ChromaDB, governance storage and health checks
+
+# Ingestion Configuration
+# Uploads are processed by a background job pool; the cap keeps bulk uploads
+# from starving /chat of CPU
+MAX_CONCURRENT_INGESTION_JOBS = 2
+
+# Upload Configuration
+# Uploads are streamed to disk in fixed-size chunks and hashed on the way;
+# request bodies are counted as they arrive and refused with 413 as soon as
+# they pass the request limit, with or without a Content-Length
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_MAX_FILE_BYTES = 200 * 1024 * 1024
+UPLOAD_MAX_REQUEST_BYTES = 500 * 1024 * 1024
+UPLOAD_MAX_FILES = 20  # Files per /upload/batch request
+MAX_QUEUED_INGESTION_JOBS = 50
+MAX_TRACKED_INGESTION_JOBS = 200  # Finished jobs kept for /jobs polling
+INGESTION_EMBED_BATCH_SIZE = 64
+
+# Parallel PDF extraction: large PDFs are split into page shards and
+# extracted in a process pool shared by all running ingestion jobs
+PDF_PARALLEL_EXTRACTION = True
+PDF_PARALLEL_MIN_PAGES = 40  # Smaller PDFs are not worth the process startup
+PDF_PAGES_PER_SHARD = 25
+PDF_EXTRACT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Query Log Configuration
+# Queries are buffered in memory and written to governance in batches by a
+# background thread, keeping storage off the /chat hot path
+QUERY_LOG_MAX_QUEUE = 10000  # Records beyond this are dropped and counted
+QUERY_LOG_BATCH_SIZE = 200
+QUERY_LOG_FLUSH_INTERVAL_SECONDS = 2.0
+QUERY_LOG_LATENCY_WINDOW = 5000  # Recent latencies kept for percentiles
 
 # Supported file types
-SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".pptx", ".txt"}
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".pptx", ".txt", ".md", ".markdown"}
 
 # Multilingual Support
 SUPPORTED_LANGUAGES = {
@@ -56,3 +181,18 @@ ENABLE_PYQ_ANALYTICS = True
 ENABLE_KNOWLEDGE_GRAPH = True
 ENABLE_MULTILINGUAL = True
 ENABLE_GOVERNANCE = True
+
+# Governance Configuration
+# Each chunk carries its document's governance status, so the approval
+# check runs inside the vector search instead of after it
+RETRIEVAL_APPROVED_ONLY = True   # Only approved documents are searched
+EVICT_REJECTED_DOCUMENTS = False # Delete rejected documents' chunks from the index
+GOVERNANCE_MAX_QUERIES = 1000    # Most recent queries kept in the query log
+
+# Knowledge Graph Configuration
+# Relationships are extracted once per chunk in a background queue and merged
+# into a persistent graph
+KNOWLEDGE_GRAPH_MIN_CHUNK_CHARS = 100
+KNOWLEDGE_GRAPH_MAX_CHUNK_CHARS = 1000  # Text sent to the LLM per chunk
+KNOWLEDGE_GRAPH_DEFAULT_TOP_N = 200  # Nodes returned when no subgraph is requested
+KNOWLEDGE_GRAPH_CHUNKS_PER_PROMPT = 4  # Chunks packed into one structured-output prompt
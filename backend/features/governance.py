@@ -1,78 +1,283 @@
 """
 Governance panel for document approval and management
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import json
+import sqlite3
+import threading
 from pathlib import Path
-from backend.config import DATA_DIR
+from backend.config import DATA_DIR, GOVERNANCE_DB_PATH, GOVERNANCE_MAX_QUERIES
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    file_type TEXT,
+    uploader TEXT,
+    upload_date TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    approval_date TEXT,
+    approver TEXT,
+    rejection_reason TEXT,
+    course TEXT,
+    department TEXT,
+    total_chunks INTEGER,
+    file_path TEXT,
+    content_hash TEXT,
+    chunking_profile TEXT,
+    chunking_fingerprint TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_documents_status ON documents (status);
+
+-- One row per chunk of every document. canonical_id is NULL when the chunk
+-- is stored in the vector index, otherwise it names the stored chunk with
+-- the same normalized text on the same page.
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    canonical_id TEXT,
+    page INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_chunks_document ON chunks (document_id);
+CREATE INDEX IF NOT EXISTS idx_chunks_hash ON chunks (hash);
+CREATE INDEX IF NOT EXISTS idx_chunks_canonical ON chunks (canonical_id);
+
+CREATE TABLE IF NOT EXISTS queries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    user TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    latency_ms REAL
+);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    data TEXT
+);
+
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+
+DOCUMENT_STATUSES = ("pending", "approved", "rejected")
+
+_DOCUMENT_COLUMNS = (
+    "document_id, filename, file_type, uploader, upload_date, "
+    "status, approval_date, approver, rejection_reason, course, department, "
+    "total_chunks, file_path, content_hash, chunking_profile, chunking_fingerprint"
+)
 
 
 class GovernancePanel:
     """Manages document governance and approval workflow"""
     
-    def __init__(self):
-        self.governance_file = DATA_DIR / "governance.json"
-        self.data = self._load_data()
+    def __init__(self, db_path: Path = GOVERNANCE_DB_PATH):
+        self.db_path = db_path
+        self.legacy_file = DATA_DIR / "governance.json"
+        # One connection per thread; SQLite handles locking across workers
+        self._local = threading.local()
+        self._initialize()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
     
-    def _load_data(self) -> Dict[str, Any]:
-        """Load governance data from file"""
-        if self.governance_file.exists():
-            try:
-                with open(self.governance_file, 'r') as f:
-                    return json.load(f)
-            except Exception:
-                pass
+    def _initialize(self):
+        """Create the schema and migrate the legacy JSON store"""
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        self._add_missing_columns(conn)
+        conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('total_queries', 0)")
+        conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('total_uploads', 0)")
+        conn.execute("INSERT OR IGNORE INTO counters (name, value) VALUES ('duplicate_uploads', 0)")
+        conn.commit()
+        self._migrate_legacy_json()
+    
+    def _add_missing_columns(self, conn: sqlite3.Connection):
+        """Upgrade tables created by earlier versions of the schema"""
+        query_columns = {row[1] for row in conn.execute("PRAGMA table_info(queries)")}
+        if "latency_ms" not in query_columns:
+            self._add_column(conn, "queries", "latency_ms", "REAL")
         
-        # Default structure
-        return {
-            "documents": {},
-            "queries": [],
-            "users": {},
-            "stats": {
-                "total_queries": 0,
-                "total_uploads": 0
-            }
-        }
+        document_columns = {row[1] for row in conn.execute("PRAGMA table_info(documents)")}
+        for column, column_type in (
+            ("course", "TEXT"),
+            ("department", "TEXT"),
+            ("total_chunks", "INTEGER"),
+            ("file_path", "TEXT"),
+            ("content_hash", "TEXT"),
+            ("chunking_profile", "TEXT"),
+            ("chunking_fingerprint", "TEXT")
+        ):
+            if column not in document_columns:
+                self._add_column(conn, "documents", column, column_type)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_documents_content_hash ON documents (content_hash)"
+        )
+        
+        chunk_columns = {row[1] for row in conn.execute("PRAGMA table_info(chunks)")}
+        if "page" not in chunk_columns:
+            self._add_column(conn, "chunks", "page", "INTEGER")
+    
+    def _add_column(self, conn: sqlite3.Connection, table: str, column: str, column_type: str):
+        """Add a column, tolerating another worker adding it first"""
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+        except sqlite3.OperationalError as e:
+            if "duplicate column" not in str(e).lower():
+                raise
     
-    def _save_data(self):
-        """Save governance data to file"""
+    def _migrate_legacy_json(self):
+        """Import governance.json once, then rename it out of the way"""
+        if not self.legacy_file.exists():
+            return
+        
+        conn = self._connect()
         try:
-            with open(self.governance_file, 'w') as f:
-                json.dump(self.data, f, indent=2)
+            # IMMEDIATE takes the write lock so concurrent workers migrate once
+            conn.execute("BEGIN IMMEDIATE")
+            migrated = conn.execute(
+                "SELECT value FROM meta WHERE key = 'migrated_from_json'"
+            ).fetchone()
+            if migrated is None:
+                with open(self.legacy_file, 'r') as f:
+                    data = json.load(f)
+                self._import_legacy_data(conn, data)
+                conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('migrated_from_json', ?)",
+                    (datetime.now().isoformat(),)
+                )
+            conn.execute("COMMIT")
         except Exception as e:
-            print(f"Failed to save governance data: {str(e)}")
+            if conn.in_transaction:
+                conn.rollback()
+            print(f"Failed to migrate governance data: {str(e)}")
+            return
+        
+        try:
+            self.legacy_file.rename(self.legacy_file.with_suffix(".json.migrated"))
+        except OSError:
+            # Another worker already renamed it
+            pass
+        print(f"✓ Migrated {self.legacy_file.name} to {self.db_path.name}")
+    
+    def _import_legacy_data(self, conn: sqlite3.Connection, data: Dict[str, Any]):
+        """Copy documents, queries, users and counters from the JSON structure"""
+        for document_id, doc in data.get("documents", {}).items():
+            conn.execute(
+                "INSERT OR IGNORE INTO documents (document_id, filename, file_type, uploader, "
+                "upload_date, status, approval_date, approver, rejection_reason) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    document_id,
+                    doc.get("filename", ""),
+                    doc.get("file_type"),
+                    doc.get("uploader", "anonymous"),
+                    doc.get("upload_date"),
+                    doc.get("status", "pending"),
+                    doc.get("approval_date"),
+                    doc.get("approver"),
+                    doc.get("rejection_reason")
+                )
+            )
+        
+        conn.executemany(
+            "INSERT INTO queries (query, user, timestamp) VALUES (?, ?, ?)",
+            [
+                (q.get("query", ""), q.get("user", "anonymous"), q.get("timestamp", ""))
+                for q in data.get("queries", [])
+            ]
+        )
+        
+        conn.executemany(
+            "INSERT OR IGNORE INTO users (user_id, data) VALUES (?, ?)",
+            [(user_id, json.dumps(user)) for user_id, user in data.get("users", {}).items()]
+        )
+        
+        stats = data.get("stats", {})
+        for name in ("total_queries", "total_uploads"):
+            conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = ?",
+                (int(stats.get(name, 0)), name)
+            )
     
     def register_document(
         self,
         document_id: str,
         filename: str,
         file_type: str,
-        uploader: str = "anonymous"
+        uploader: str = "anonymous",
+        course: Optional[str] = None,
+        department: Optional[str] = None,
+        total_chunks: Optional[int] = None,
+        file_path: Optional[str] = None,
+        content_hash: Optional[str] = None,
+        chunking_profile: Optional[str] = None,
+        chunking_fingerprint: Optional[str] = None,
+        keep_status: bool = False
     ):
-        """Register a new document for governance"""
-        self.data["documents"][document_id] = {
-            "filename": filename,
-            "file_type": file_type,
-            "uploader": uploader,
-            "upload_date": datetime.now().isoformat(),
-            "status": "pending",  # pending, approved, rejected
-            "approval_date": None,
-            "approver": None,
-            "rejection_reason": None
-        }
-        self.data["stats"]["total_uploads"] += 1
-        self._save_data()
+        """
+        Register a new document, or a new version of an existing one
+        
+        A new version goes back to pending approval unless keep_status is
+        set, as when a document is only re-chunked.
+        """
+        conn = self._connect()
+        with conn:
+            existing = conn.execute(
+                "SELECT status, approval_date, approver, rejection_reason, upload_date "
+                "FROM documents WHERE document_id = ?",
+                (document_id,)
+            ).fetchone()
+            if keep_status and existing:
+                review = tuple(existing)[:4]
+                upload_date = existing["upload_date"]
+            else:
+                review = ("pending", None, None, None)
+                upload_date = datetime.now().isoformat()
+            conn.execute(
+                f"INSERT OR REPLACE INTO documents ({_DOCUMENT_COLUMNS}) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    document_id, filename, file_type, uploader, upload_date, *review,
+                    course, department, total_chunks, file_path, content_hash,
+                    chunking_profile, chunking_fingerprint
+                )
+            )
+            if not existing:
+                conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'total_uploads'")
     
     def approve_document(self, document_id: str, approver: str = "admin"):
         """Approve a document"""
-        if document_id in self.data["documents"]:
-            self.data["documents"][document_id]["status"] = "approved"
-            self.data["documents"][document_id]["approval_date"] = datetime.now().isoformat()
-            self.data["documents"][document_id]["approver"] = approver
-            self._save_data()
-            return True
-        return False
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE documents SET status = 'approved', approval_date = ?, approver = ? "
+                "WHERE document_id = ?",
+                (datetime.now().isoformat(), approver, document_id)
+            )
+        return cursor.rowcount > 0
     
     def reject_document(
         self,
@@ -81,71 +286,293 @@ class GovernancePanel:
         approver: str = "admin"
     ):
         """Reject a document"""
-        if document_id in self.data["documents"]:
-            self.data["documents"][document_id]["status"] = "rejected"
-            self.data["documents"][document_id]["approval_date"] = datetime.now().isoformat()
-            self.data["documents"][document_id]["approver"] = approver
-            self.data["documents"][document_id]["rejection_reason"] = reason
-            self._save_data()
-            return True
-        return False
-    
-    def log_query(self, query: str, user: str = "anonymous"):
-        """Log a user query"""
-        self.data["queries"].append({
-            "query": query[:200],
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                "UPDATE documents SET status = 'rejected', approval_date = ?, approver = ?, "
+                "rejection_reason = ? WHERE document_id = ?",
+                (datetime.now().isoformat(), approver, reason, document_id)
+            )
+        return cursor.rowcount > 0
+    
+    def delete_document(self, document_id: str) -> bool:
+        """Remove a document's governance record and chunk registry rows"""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute("DELETE FROM documents WHERE document_id = ?", (document_id,))
+            conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+        return cursor.rowcount > 0
+    
+    def find_document_by_content_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """Get the document whose uploaded file had this SHA-256 hash"""
+        row = self._connect().execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE content_hash = ? LIMIT 1",
+            (content_hash,)
+        ).fetchone()
+        return dict(row) if row else None
+    
+    def record_duplicate_upload(self):
+        """Count an upload answered with an existing document"""
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE counters SET value = value + 1 WHERE name = 'duplicate_uploads'")
+    
+    def find_canonical_chunks(
+        self,
+        keys: List[Tuple[str, Optional[int]]],
+        exclude_document_id: str,
+        status: str,
+        filename: str,
+        file_type: Optional[str] = None,
+        course: Optional[str] = None,
+        department: Optional[str] = None
+    ) -> Dict[Tuple[str, Optional[int]], str]:
+        """
+        Find stored chunks of other documents with the given text on the same page
+        
+        Only documents with the given status, filename, file type, course
+        and department are searched, since a stored chunk carries its
+        document's values and its page into retrieval filters and source
+        citations.
+        
+        Args:
+            keys: (normalized text hash, page) per chunk; page is None for
+                formats without pages
+            exclude_document_id: Document being ingested
+            status: Governance status the stored chunk's document must have
+            filename: Original filename it must have
+            file_type: File type it must have
+            course: Course tag it must have (None for untagged)
+            department: Department tag it must have (None for untagged)
+        
+        Returns:
+            Mapping of (hash, page) to the stored chunk id
+        """
+        conn = self._connect()
+        wanted = set(keys)
+        found: Dict[Tuple[str, Optional[int]], str] = {}
+        unique = list(dict.fromkeys(chunk_hash for chunk_hash, _ in keys))
+        for start in range(0, len(unique), _LOOKUP_BATCH_SIZE):
+            batch = unique[start:start + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT c.hash, c.page, c.chunk_id FROM chunks c "
+                f"JOIN documents d ON d.document_id = c.document_id "
+                f"WHERE c.hash IN ({placeholders}) AND c.canonical_id IS NULL "
+                "AND c.document_id != ? AND d.status = ? AND d.filename = ? AND d.file_type IS ? "
+                "AND d.course IS ? AND d.department IS ?",
+                batch + [exclude_document_id, status, filename, file_type, course, department]
+            ).fetchall()
+            for chunk_hash, page, chunk_id in rows:
+                if (chunk_hash, page) in wanted:
+                    found.setdefault((chunk_hash, page), chunk_id)
+        return found
+    
+    def replace_document_chunks(
+        self,
+        document_id: str,
+        rows: List[Tuple[str, str, Optional[str], Optional[int]]]
+    ):
+        """
+        Replace a document's chunk registry rows
+        
+        Args:
+            document_id: Document identifier
+            rows: (chunk_id, hash, canonical_id, page) per chunk;
+                canonical_id is None for chunks stored in the vector index
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, document_id, hash, canonical_id, page) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (chunk_id, document_id, chunk_hash, canonical_id, page)
+                    for chunk_id, chunk_hash, canonical_id, page in rows
+                ]
+            )
+    
+    def get_chunk_references(self, canonical_ids: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get chunks of other documents that point at the given stored chunks
+        
+        Returns:
+            Dicts with chunk_id, document_id, canonical_id and page
+        """
+        conn = self._connect()
+        references = []
+        for start in range(0, len(canonical_ids), _LOOKUP_BATCH_SIZE):
+            batch = canonical_ids[start:start + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT chunk_id, document_id, canonical_id, page FROM chunks "
+                f"WHERE canonical_id IN ({placeholders})",
+                batch
+            ).fetchall()
+            references.extend(dict(row) for row in rows)
+        return references
+    
+    def get_document_references(self, document_id: str) -> List[Dict[str, Any]]:
+        """
+        Get a document's chunks that point at a stored chunk instead of being stored
+        
+        Returns:
+            Dicts with chunk_id, canonical_id and page
+        """
+        rows = self._connect().execute(
+            "SELECT chunk_id, canonical_id, page FROM chunks "
+            "WHERE document_id = ? AND canonical_id IS NOT NULL",
+            (document_id,)
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def promote_chunk(
+        self,
+        old_canonical_id: str,
+        new_canonical_id: str,
+        chunk_ids: Optional[List[str]] = None
+    ):
+        """
+        Make a referencing chunk the stored copy and re-point references at it
+        
+        Args:
+            old_canonical_id: Stored chunk being replaced
+            new_canonical_id: Referencing chunk that is now stored
+            chunk_ids: References to re-point; None re-points all of them
+        """
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "UPDATE chunks SET canonical_id = NULL WHERE chunk_id = ?",
+                (new_canonical_id,)
+            )
+            if chunk_ids is None:
+                conn.execute(
+                    "UPDATE chunks SET canonical_id = ? WHERE canonical_id = ?",
+                    (new_canonical_id, old_canonical_id)
+                )
+            else:
+                conn.executemany(
+                    "UPDATE chunks SET canonical_id = ? WHERE chunk_id = ? AND canonical_id = ?",
+                    [(new_canonical_id, chunk_id, old_canonical_id) for chunk_id in chunk_ids]
+                )
+    
+    def detach_chunks(self, chunk_ids: List[str]):
+        """Mark referencing chunks as stored in the vector index"""
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "UPDATE chunks SET canonical_id = NULL WHERE chunk_id = ?",
+                [(chunk_id,) for chunk_id in chunk_ids]
+            )
+    
+    def log_query(
+        self,
+        query: str,
+        user: str = "anonymous",
+        latency_ms: Optional[float] = None
+    ):
+        """Log a user query (append-only)"""
+        self.log_queries([{
+            "query": query,
             "user": user,
-            "timestamp": datetime.now().isoformat()
-        })
-        self.data["stats"]["total_queries"] += 1
+            "timestamp": datetime.now().isoformat(),
+            "latency_ms": latency_ms
+        }])
+    
+    def log_queries(self, records: List[Dict[str, Any]]):
+        """
+        Append a batch of query records in one transaction
+        
+        Only the most recent GOVERNANCE_MAX_QUERIES records are kept; older
+        ones are pruned in the same transaction. The total_queries counter
+        still counts every query.
         
-        # Keep only last 1000 queries
-        if len(self.data["queries"]) > 1000:
-            self.data["queries"] = self.data["queries"][-1000:]
+        Args:
+            records: Dicts with query, user, timestamp and optional latency_ms
+        """
+        if not records:
+            return
         
-        self._save_data()
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT INTO queries (query, user, timestamp, latency_ms) VALUES (?, ?, ?, ?)",
+                [
+                    (r["query"][:200], r.get("user", "anonymous"), r["timestamp"], r.get("latency_ms"))
+                    for r in records
+                ]
+            )
+            conn.execute(
+                "UPDATE counters SET value = value + ? WHERE name = 'total_queries'",
+                (len(records),)
+            )
+            # Ids increase with insertion, so everything at or below the
+            # newest id minus the limit is older than the retained window
+            conn.execute(
+                "DELETE FROM queries WHERE id <= (SELECT MAX(id) FROM queries) - ?",
+                (GOVERNANCE_MAX_QUERIES,)
+            )
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get governance statistics"""
-        docs = self.data["documents"]
+        conn = self._connect()
         
-        pending = sum(1 for d in docs.values() if d["status"] == "pending")
-        approved = sum(1 for d in docs.values() if d["status"] == "approved")
-        rejected = sum(1 for d in docs.values() if d["status"] == "rejected")
+        # Served from the status index
+        status_counts = dict(conn.execute(
+            "SELECT status, COUNT(*) FROM documents GROUP BY status"
+        ).fetchall())
+        counters = dict(conn.execute("SELECT name, value FROM counters").fetchall())
+        total_documents = sum(status_counts.values())
+        active_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        
+        # Share of chunks served by a stored copy of identical text
+        total_chunks, referenced_chunks = conn.execute(
+            "SELECT COUNT(*), COUNT(canonical_id) FROM chunks"
+        ).fetchone()
         
         # Calculate storage (simplified)
-        storage_mb = len(docs) * 0.5  # Estimate 0.5 MB per document
+        storage_mb = total_documents * 0.5  # Estimate 0.5 MB per document
         
         return {
-            "total_documents": len(docs),
-            "pending_approval": pending,
-            "approved_documents": approved,
-            "rejected_documents": rejected,
-            "total_queries": self.data["stats"]["total_queries"],
-            "active_users": len(self.data["users"]),
-            "storage_used_mb": round(storage_mb, 2)
+            "total_documents": total_documents,
+            "pending_approval": status_counts.get("pending", 0),
+            "approved_documents": status_counts.get("approved", 0),
+            "rejected_documents": status_counts.get("rejected", 0),
+            "total_queries": counters.get("total_queries", 0),
+            "active_users": active_users,
+            "storage_used_mb": round(storage_mb, 2),
+            "dedup_ratio": round(referenced_chunks / total_chunks, 4) if total_chunks else 0.0,
+            "duplicate_uploads": counters.get("duplicate_uploads", 0)
         }
     
     def get_pending_documents(self) -> List[Dict[str, Any]]:
         """Get all pending documents"""
-        pending = []
-        for doc_id, doc_data in self.data["documents"].items():
-            if doc_data.get("status") == "pending":
-                pending.append({
-                    "document_id": doc_id,
-                    **doc_data
-                })
-        return pending
+        return self._get_documents_by_status("pending")
+    
+    def get_document(self, document_id: str) -> Optional[Dict[str, Any]]:
+        """Get a single document record"""
+        row = self._connect().execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE document_id = ?",
+            (document_id,)
+        ).fetchone()
+        return dict(row) if row else None
     
     def get_all_documents(self) -> List[Dict[str, Any]]:
         """Get all documents"""
-        all_docs = []
-        for doc_id, doc_data in self.data["documents"].items():
-            all_docs.append({
-                "document_id": doc_id,
-                **doc_data
-            })
-        return all_docs
+        rows = self._connect().execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents ORDER BY upload_date"
+        ).fetchall()
+        return [dict(row) for row in rows]
+    
+    def _get_documents_by_status(self, status: str) -> List[Dict[str, Any]]:
+        """Get documents with a given status using the status index"""
+        rows = self._connect().execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE status = ? ORDER BY upload_date",
+            (status,)
+        ).fetchall()
+        return [dict(row) for row in rows]
 
 
 # Global instance
@@ -2,129 +2,368 @@
 Knowledge Graph Generation
 Extracts entities and relationships from documents
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import json
+import sqlite3
+import threading
 import networkx as nx
-from backend.llm.ollama_client import get_ollama_client
-import re
+from backend.config import (
+    KNOWLEDGE_GRAPH_DB_PATH,
+    KNOWLEDGE_GRAPH_MIN_CHUNK_CHARS,
+    KNOWLEDGE_GRAPH_MAX_CHUNK_CHARS,
+    KNOWLEDGE_GRAPH_DEFAULT_TOP_N,
+    KNOWLEDGE_GRAPH_CHUNKS_PER_PROMPT
+)
+from backend.llm.batch_executor import get_llm_batch_executor
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunk_relations (
+    chunk_id TEXT PRIMARY KEY,
+    document_id TEXT NOT NULL,
+    relations TEXT NOT NULL,
+    extracted_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_chunk_relations_document ON chunk_relations (document_id);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
 
 
 class KnowledgeGraph:
-    """Generates knowledge graphs from documents"""
+    """Persistent knowledge graph built incrementally from document chunks"""
     
-    def __init__(self):
-        self.ollama_client = get_ollama_client()
+    def __init__(self, db_path: Path = KNOWLEDGE_GRAPH_DB_PATH):
+        self.db_path = db_path
         self.graph = nx.DiGraph()
+        self._graph_lock = threading.RLock()
+        self._local = threading.local()
+        # Extraction makes one LLM call per chunk; run it off the request path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="campusnexus-graph")
+        self._connect().executescript(_SCHEMA)
+        self._load_graph()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def _load_graph(self):
+        """Rebuild the in-memory graph from stored chunk relationships"""
+        rows = self._connect().execute("SELECT relations FROM chunk_relations").fetchall()
+        with self._graph_lock:
+            for (relations,) in rows:
+                self._add_to_graph(json.loads(relations))
+        if rows:
+            print(f"✓ Knowledge graph loaded ({self.graph.number_of_nodes()} nodes)")
+    
+    def get_extracted_chunk_ids(self) -> Set[str]:
+        """Ids of chunks whose relationships are already stored"""
+        rows = self._connect().execute("SELECT chunk_id FROM chunk_relations").fetchall()
+        return {row[0] for row in rows}
+    
+    def filter_extracted(self, chunk_ids: List[str]) -> Set[str]:
+        """
+        Which of the given chunks already have stored relationships
+        
+        Looks up only these ids, so the cost does not grow with the store.
+        
+        Args:
+            chunk_ids: Chunk ids to check
+        
+        Returns:
+            The subset that is already extracted
+        """
+        conn = self._connect()
+        extracted: Set[str] = set()
+        for start in range(0, len(chunk_ids), _LOOKUP_BATCH_SIZE):
+            batch = chunk_ids[start:start + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT chunk_id FROM chunk_relations WHERE chunk_id IN ({placeholders})",
+                batch
+            ).fetchall()
+            extracted.update(row[0] for row in rows)
+        return extracted
+    
+    def schedule_document(self, document_id: str, chunks: List[Tuple[str, str]]):
+        """
+        Queue relationship extraction for a document's chunks
+        
+        Args:
+            document_id: Document identifier
+            chunks: (chunk_id, text) pairs
+        """
+        return self._executor.submit(self.index_document, document_id, chunks)
+    
+    def schedule(self, func: Callable, *args):
+        """
+        Queue arbitrary work (e.g. a lazy backfill) on the extraction worker
+        
+        Args:
+            func: Callable to run
+            *args: Positional arguments for func
+        """
+        return self._executor.submit(func, *args)
+    
+    def index_document(self, document_id: str, chunks: List[Tuple[str, str]]):
+        """
+        Extract and merge relationships for chunks not yet extracted
+        
+        Several chunks are packed into each structured-output prompt and
+        prompts run concurrently through the LLM batch executor.
+        
+        Args:
+            document_id: Document identifier
+            chunks: (chunk_id, text) pairs
+        """
+        extracted = self.filter_extracted([chunk_id for chunk_id, _ in chunks])
+        pending = []
+        for chunk_id, text in chunks:
+            if chunk_id in extracted:
+                continue
+            if len(text) > KNOWLEDGE_GRAPH_MIN_CHUNK_CHARS:
+                pending.append((chunk_id, text[:KNOWLEDGE_GRAPH_MAX_CHUNK_CHARS]))
+            else:
+                # Too short to carry relationships worth an LLM call
+                self._store_chunk(chunk_id, document_id, [])
+        
+        if not pending:
+            return
+        
+        executor = get_llm_batch_executor()
+        groups = executor.pack(
+            [text for _, text in pending],
+            max_items=KNOWLEDGE_GRAPH_CHUNKS_PER_PROMPT,
+            max_chars=KNOWLEDGE_GRAPH_MAX_CHUNK_CHARS * KNOWLEDGE_GRAPH_CHUNKS_PER_PROMPT
+        )
+        
+        # Submit in waves so results are stored and visible as they arrive
+        wave_size = executor.max_concurrency * 2
+        for wave_start in range(0, len(groups), wave_size):
+            wave = groups[wave_start:wave_start + wave_size]
+            prompts = [self._build_batch_prompt([pending[i][1] for i in group]) for group in wave]
+            responses = executor.run(prompts, response_format="json")
+            
+            for group, response in zip(wave, responses):
+                parsed = self._parse_batch_response(response, len(group)) if response else None
+                if parsed is None:
+                    # Left unstored so a later backfill retries these chunks
+                    continue
+                for offset, i in enumerate(group):
+                    # Texts the response has no answer for are retried too
+                    if parsed[offset] is not None:
+                        self._store_chunk(pending[i][0], document_id, parsed[offset])
     
-    def generate_graph(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _store_chunk(self, chunk_id: str, document_id: str, relationships: List[Dict[str, Any]]):
+        """Store one chunk's relationships and merge them into the graph"""
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO chunk_relations (chunk_id, document_id, relations, extracted_at) "
+                "VALUES (?, ?, ?, ?)",
+                (chunk_id, document_id, json.dumps(relationships), datetime.now().isoformat())
+            )
+        
+        with self._graph_lock:
+            self._add_to_graph(relationships)
+    
+    def remove_document(self, document_id: str):
+        """Remove a document's relationships from the store and the graph"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT relations FROM chunk_relations WHERE document_id = ?",
+            (document_id,)
+        ).fetchall()
+        with conn:
+            conn.execute("DELETE FROM chunk_relations WHERE document_id = ?", (document_id,))
+        
+        with self._graph_lock:
+            for (relations,) in rows:
+                self._remove_from_graph(json.loads(relations))
+    
+    def remove_chunks(self, chunk_ids: List[str]):
+        """Remove specific chunks' relationships so they are extracted again"""
+        conn = self._connect()
+        rows = []
+        with conn:
+            for start in range(0, len(chunk_ids), _LOOKUP_BATCH_SIZE):
+                batch = chunk_ids[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows.extend(conn.execute(
+                    f"SELECT relations FROM chunk_relations WHERE chunk_id IN ({placeholders})",
+                    batch
+                ).fetchall())
+                conn.execute(f"DELETE FROM chunk_relations WHERE chunk_id IN ({placeholders})", batch)
+        
+        with self._graph_lock:
+            for (relations,) in rows:
+                self._remove_from_graph(json.loads(relations))
+    
+    def get_graph(
+        self,
+        node: Optional[str] = None,
+        depth: int = 1,
+        top_n: Optional[int] = KNOWLEDGE_GRAPH_DEFAULT_TOP_N
+    ) -> Dict[str, Any]:
         """
-        Generate knowledge graph from documents
+        Get the stored graph or a subgraph of it
         
         Args:
-            documents: List of document chunks
+            node: Optional concept to center the subgraph on
+            depth: Neighbourhood radius around node
+            top_n: Keep only the N highest-degree nodes (None for all)
             
         Returns:
             Graph structure with nodes and edges
         """
         try:
-            # Sample documents if too many
-            sample_docs = documents[:15] if len(documents) > 15 else documents
-            
-            # Extract entities and relationships
-            for doc in sample_docs:
-                text = doc.get("text", "")
-                if len(text) > 100:
-                    entities_and_relations = self._extract_entities_relationships(text[:1000])
-                    self._add_to_graph(entities_and_relations)
-            
-            # Convert to serializable format
-            nodes = []
-            for node_id in self.graph.nodes():
-                node_data = self.graph.nodes[node_id]
-                nodes.append({
-                    "id": node_id,
-                    "label": node_id,
-                    "type": node_data.get("type", "concept"),
-                    "properties": {}
-                })
-            
-            edges = []
-            for source, target, edge_data in self.graph.edges(data=True):
-                edges.append({
-                    "source": source,
-                    "target": target,
-                    "relationship": edge_data.get("relationship", "related_to"),
-                    "weight": edge_data.get("weight", 1.0)
-                })
-            
-            # Calculate statistics
-            statistics = {
-                "total_nodes": len(nodes),
-                "total_edges": len(edges),
-                "density": nx.density(self.graph) if len(nodes) > 0 else 0
-            }
-            
-            return {
-                "nodes": nodes,
-                "edges": edges,
-                "statistics": statistics
-            }
+            with self._graph_lock:
+                graph = self.graph
+                if node is not None:
+                    if not graph.has_node(node):
+                        graph = nx.DiGraph()
+                    else:
+                        graph = nx.ego_graph(graph, node, radius=depth, undirected=True)
+                
+                if top_n is not None and graph.number_of_nodes() > top_n:
+                    ranked = sorted(graph.degree(weight="weight"), key=lambda item: item[1], reverse=True)
+                    graph = graph.subgraph(node_id for node_id, _ in ranked[:top_n])
+                
+                result = self._serialize(graph)
+                result["statistics"]["graph_total_nodes"] = self.graph.number_of_nodes()
+                result["statistics"]["graph_total_edges"] = self.graph.number_of_edges()
+                return result
             
         except Exception as e:
             raise RuntimeError(f"Knowledge graph generation failed: {str(e)}")
     
-    def _extract_entities_relationships(self, text: str) -> List[Dict[str, Any]]:
-        """Extract entities and relationships using LLM"""
-        prompt = f"""Extract key concepts and their relationships from this text.
-Format: Entity1 -> Relationship -> Entity2
+    def _serialize(self, graph: nx.DiGraph) -> Dict[str, Any]:
+        """Convert a graph to the serializable response format"""
+        nodes = []
+        for node_id in graph.nodes():
+            node_data = graph.nodes[node_id]
+            nodes.append({
+                "id": node_id,
+                "label": node_id,
+                "type": node_data.get("type", "concept"),
+                "properties": {"mentions": node_data.get("mentions", 0)}
+            })
+        
+        edges = []
+        for source, target, edge_data in graph.edges(data=True):
+            edges.append({
+                "source": source,
+                "target": target,
+                "relationship": edge_data.get("relationship", "related_to"),
+                "weight": edge_data.get("weight", 1.0)
+            })
+        
+        # Calculate statistics
+        statistics = {
+            "total_nodes": len(nodes),
+            "total_edges": len(edges),
+            "density": nx.density(graph) if len(nodes) > 0 else 0
+        }
+        
+        return {
+            "nodes": nodes,
+            "edges": edges,
+            "statistics": statistics
+        }
+    
+    def _build_batch_prompt(self, texts: List[str]) -> str:
+        """Build one structured-output prompt covering several chunks"""
+        sections = "\n\n".join(
+            f"TEXT {i}:\n{text}" for i, text in enumerate(texts, 1)
+        )
+        return f"""Extract key concepts and their relationships from each numbered text below.
+Respond with a JSON object mapping each text number to a list of
+[Entity1, Relationship, Entity2] triples, for example:
+{{"1": [["Stack", "is a", "Data Structure"]], "2": []}}
 
-TEXT:
-{text}
+{sections}
 
-RELATIONSHIPS (format: Entity1 -> Relationship -> Entity2):"""
+JSON:"""
+    
+    def _parse_batch_response(
+        self,
+        response: str,
+        count: int
+    ) -> Optional[List[Optional[List[Dict[str, Any]]]]]:
+        """
+        Parse a batch prompt's JSON response
+        
+        A text counts as extracted only when the response has a list under
+        its number (an empty list means no relationships); texts without
+        one get None so they are not marked extracted and are retried.
         
+        Returns:
+            Relationships per text (None where missing), or None if the
+            response answers none of the texts
+        """
         try:
-            response = self.ollama_client.generate(prompt)
-            
-            # Parse relationships
+            data = json.loads(response)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(data, dict):
+            return None
+        
+        results: List[Optional[List[Dict[str, Any]]]] = []
+        for i in range(1, count + 1):
+            triples = data.get(str(i))
+            if not isinstance(triples, list):
+                results.append(None)
+                continue
             relationships = []
-            for line in response.split('\n'):
-                line = line.strip()
-                if '->' in line:
-                    # Parse format: Entity1 -> Relationship -> Entity2
-                    parts = [p.strip() for p in line.split('->')]
-                    if len(parts) >= 3:
-                        relationships.append({
-                            "entity1": parts[0][:50],
-                            "relationship": parts[1][:30],
-                            "entity2": parts[2][:50]
-                        })
-                    elif len(parts) == 2:
-                        # Format: Entity1 -> Entity2 (default relationship)
-                        relationships.append({
-                            "entity1": parts[0][:50],
-                            "relationship": "related_to",
-                            "entity2": parts[1][:50]
-                        })
-            
-            return relationships
-            
-        except Exception as e:
-            print(f"Entity extraction failed: {str(e)}")
-            return []
+            for triple in triples:
+                if isinstance(triple, dict):
+                    triple = [
+                        triple.get("entity1") or triple.get("source"),
+                        triple.get("relationship") or triple.get("relation"),
+                        triple.get("entity2") or triple.get("target")
+                    ]
+                if not isinstance(triple, list) or len(triple) < 2:
+                    continue
+                parts = [str(part).strip() for part in triple if part]
+                if len(parts) >= 3:
+                    relationships.append({
+                        "entity1": parts[0][:50],
+                        "relationship": parts[1][:30],
+                        "entity2": parts[2][:50]
+                    })
+                elif len(parts) == 2:
+                    relationships.append({
+                        "entity1": parts[0][:50],
+                        "relationship": "related_to",
+                        "entity2": parts[1][:50]
+                    })
+            results.append(relationships)
+        if all(result is None for result in results):
+            return None
+        return results
     
     def _add_to_graph(self, relationships: List[Dict[str, Any]]):
-        """Add extracted relationships to the graph"""
+        """Merge extracted relationships into the graph (lock must be held)"""
         for rel in relationships:
             entity1 = rel["entity1"]
             entity2 = rel["entity2"]
             relationship = rel["relationship"]
             
-            # Add nodes if they don't exist
-            if entity1 and not self.graph.has_node(entity1):
-                self.graph.add_node(entity1, type="concept")
-            
-            if entity2 and not self.graph.has_node(entity2):
-                self.graph.add_node(entity2, type="concept")
+            # Add nodes if they don't exist; count mentions so removal is exact
+            for entity in (entity1, entity2):
+                if entity:
+                    if not self.graph.has_node(entity):
+                        self.graph.add_node(entity, type="concept", mentions=0)
+                    self.graph.nodes[entity]["mentions"] += 1
             
             # Add edge
             if entity1 and entity2:
@@ -138,8 +377,38 @@ RELATIONSHIPS (format: Entity1 -> Relationship -> Entity2):"""
                         relationship=relationship,
                         weight=1.0
                     )
+    
+    def _remove_from_graph(self, relationships: List[Dict[str, Any]]):
+        """Undo _add_to_graph for previously merged relationships (lock must be held)"""
+        for rel in relationships:
+            entity1 = rel["entity1"]
+            entity2 = rel["entity2"]
+            
+            if entity1 and entity2 and self.graph.has_edge(entity1, entity2):
+                self.graph[entity1][entity2]["weight"] -= 1
+                if self.graph[entity1][entity2]["weight"] <= 0:
+                    self.graph.remove_edge(entity1, entity2)
+            
+            for entity in (entity1, entity2):
+                if entity and self.graph.has_node(entity):
+                    self.graph.nodes[entity]["mentions"] -= 1
+                    if self.graph.nodes[entity]["mentions"] <= 0:
+                        self.graph.remove_node(entity)
+    
+    def shutdown(self):
+        """Stop the extraction queue"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_knowledge_graph: Optional[KnowledgeGraph] = None
+_knowledge_graph_lock = threading.Lock()
 
 
 def get_knowledge_graph() -> KnowledgeGraph:
     """Get KnowledgeGraph instance"""
-    return KnowledgeGraph()
+    global _knowledge_graph
+    with _knowledge_graph_lock:
+        if _knowledge_graph is None:
+            _knowledge_graph = KnowledgeGraph()
+        return _knowledge_graph
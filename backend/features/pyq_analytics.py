@@ -2,53 +2,269 @@
 PYQ (Previous Year Questions) Analytics
 Analyzes patterns, topics, and difficulty in question papers
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import itertools
+from pathlib import Path
+import json
 import re
-from backend.llm.ollama_client import get_ollama_client
+import sqlite3
+import threading
+from backend.config import PYQ_ANALYTICS_DB_PATH
+from backend.llm.batch_executor import get_llm_batch_executor
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pyq_documents (
+    document_id TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    question_count INTEGER NOT NULL,
+    topics TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    years TEXT NOT NULL,
+    indexed_at TEXT NOT NULL
+);
+"""
+
+
+def join_chunks(chunks: List[str], metadatas: List[Dict[str, Any]]) -> str:
+    """
+    Rebuild a document's text from its chunks without the overlaps
+    
+    Chunks are grouped by page and ordered by their start_char offsets
+    (within the page, or the document for formats without pages); where
+    consecutive chunks overlap only the new text is kept, so text near a
+    chunk boundary appears once. Gaps, and chunks stored without
+    offsets, are separated by a newline.
+    
+    Args:
+        chunks: Chunk texts in document order
+        metadatas: Chunk metadata with page, start_char and end_char
+    
+    Returns:
+        Document text, one page after another
+    """
+    pages: Dict[Any, List[Tuple[Optional[int], str]]] = {}
+    for text, metadata in zip(chunks, metadatas):
+        pages.setdefault(metadata.get("page"), []).append((metadata.get("start_char"), text))
+    
+    page_texts = []
+    for page_chunks in pages.values():
+        if all(start is not None for start, _ in page_chunks):
+            page_chunks.sort(key=lambda chunk: chunk[0])
+        parts: List[str] = []
+        end = None
+        for start, text in page_chunks:
+            if start is not None and end is not None and start < end and parts:
+                # Continue the previous part after the overlapping text
+                parts[-1] += text[end - start:]
+            else:
+                parts.append(text)
+            end = max(end or 0, start + len(text)) if start is not None else None
+        page_texts.append("\n".join(parts))
+    return "\n".join(page_texts)
 
 
 class PYQAnalytics:
     """Analyzes Previous Year Questions"""
     
-    def __init__(self):
-        self.ollama_client = get_ollama_client()
+    def __init__(self, db_path: Path = PYQ_ANALYTICS_DB_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+        # Aggregates are recomputed only when the store changes. They are read
+        # through one connection so its data_version is a consistent change marker.
+        self._aggregate_lock = threading.Lock()
+        self._aggregate_conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+        self._aggregate: Optional[Dict[str, Any]] = None
+        self._aggregate_version: Optional[tuple] = None
+        self._local_version = 0
+        # Topic extraction calls the LLM, so indexing runs on its own worker
+        # rather than in the ingestion job. Each document's latest scheduled
+        # run holds a token; removing the document revokes it.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="campusnexus-pyq")
+        self._schedule_lock = threading.Lock()
+        self._scheduled: Dict[str, int] = {}
+        self._tokens = itertools.count()
     
-    def analyze_questions(self, documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+    
+    def schedule_document(
+        self,
+        document_id: str,
+        filename: str,
+        chunks: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
         """
-        Analyze PYQ documents for patterns and insights
+        Queue analytics for a question paper on the analytics worker
         
         Args:
-            documents: List of document chunks from PYQs
-            
+            document_id: Document identifier
+            filename: Original filename (years are read from it)
+            chunks: Text chunks of the document
+            metadatas: Chunk metadata with page and character offsets
+        
         Returns:
-            Analytics result with patterns and statistics
+            Future that completes when the document has been indexed
         """
+        with self._schedule_lock:
+            token = next(self._tokens)
+            self._scheduled[document_id] = token
+        return self._executor.submit(self._run_scheduled, token, document_id, filename, chunks, metadatas)
+    
+    def _run_scheduled(
+        self,
+        token: int,
+        document_id: str,
+        filename: str,
+        chunks: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """Index a scheduled document unless it was removed or rescheduled since"""
+        with self._schedule_lock:
+            if self._scheduled.get(document_id) != token:
+                return
         try:
-            # Extract questions from documents
-            all_text = " ".join([doc.get("text", "") for doc in documents])
-            questions = self._extract_questions(all_text)
-            
-            # Analyze topics using LLM
-            topic_analysis = self._analyze_topics(questions)
-            
-            # Calculate statistics
-            year_distribution = self._extract_year_distribution(documents)
-            difficulty_distribution = self._estimate_difficulty(questions)
-            
-            # Identify patterns
-            patterns = self._identify_patterns(topic_analysis, year_distribution)
-            
-            return {
-                "total_questions": len(questions),
-                "patterns": patterns,
-                "topic_distribution": topic_analysis,
-                "difficulty_distribution": difficulty_distribution,
-                "year_wise_trends": year_distribution
-            }
-            
+            self.index_document(document_id, filename, chunks, metadatas)
         except Exception as e:
-            raise RuntimeError(f"PYQ analysis failed: {str(e)}")
+            # The startup backfill picks up documents without analytics
+            print(f"✗ PYQ analytics indexing failed for {filename}: {str(e)}")
+        finally:
+            with self._schedule_lock:
+                if self._scheduled.get(document_id) == token:
+                    del self._scheduled[document_id]
+    
+    def index_document(
+        self,
+        document_id: str,
+        filename: str,
+        chunks: List[str],
+        metadatas: List[Dict[str, Any]]
+    ):
+        """
+        Extract questions, topics and difficulty for one document and store them
+        
+        Args:
+            document_id: Document identifier
+            filename: Original filename (years are read from it)
+            chunks: Text chunks of the document
+            metadatas: Chunk metadata with page and character offsets
+        """
+        self.index_documents([(document_id, filename, chunks, metadatas)])
+    
+    def index_documents(self, documents: List[Tuple[str, str, List[str], List[Dict[str, Any]]]]):
+        """
+        Index several documents, running their topic prompts concurrently
+        
+        Args:
+            documents: (document_id, filename, chunks, metadatas) tuples
+        """
+        questions_per_doc = [
+            self._extract_questions(join_chunks(chunks, metadatas)) for _, _, chunks, metadatas in documents
+        ]
+        responses = get_llm_batch_executor().run(
+            [self._build_topic_prompt(questions) for questions in questions_per_doc]
+        )
+        
+        rows = []
+        for (document_id, filename, chunks, _), questions, response in zip(
+            documents, questions_per_doc, responses
+        ):
+            if response is None:
+                topics = {"General": len(questions)}
+            else:
+                topics = self._parse_topics(response)
+            difficulty = self._estimate_difficulty(questions)
+            # Each chunk counts once per year in the filename, as in the full recompute
+            years = {
+                year: count * len(chunks)
+                for year, count in Counter(re.findall(r'20\d{2}|19\d{2}', filename)).items()
+            }
+            rows.append((
+                document_id,
+                filename,
+                len(questions),
+                json.dumps(topics),
+                json.dumps(difficulty),
+                json.dumps(years),
+                datetime.now().isoformat()
+            ))
+        
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO pyq_documents "
+                "(document_id, filename, question_count, topics, difficulty, years, indexed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+        self._local_version += 1
+    
+    def remove_document(self, document_id: str):
+        """Drop a document's contribution to the aggregates, including queued indexing"""
+        with self._schedule_lock:
+            self._scheduled.pop(document_id, None)
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM pyq_documents WHERE document_id = ?", (document_id,))
+        self._local_version += 1
+    
+    def get_indexed_documents(self) -> Dict[str, str]:
+        """Filenames of documents with stored analytics, by document id"""
+        rows = self._connect().execute("SELECT document_id, filename FROM pyq_documents").fetchall()
+        return dict(rows)
+    
+    def get_analytics(self) -> Dict[str, Any]:
+        """
+        Get aggregated analytics across all indexed documents
+        
+        Returns:
+            Analytics result with patterns and statistics
+        """
+        with self._aggregate_lock:
+            conn = self._aggregate_conn
+            # data_version changes when another connection (or worker) commits
+            version = (conn.execute("PRAGMA data_version").fetchone()[0], self._local_version)
+            if self._aggregate is None or self._aggregate_version != version:
+                self._aggregate = self._aggregate_rows(conn)
+                self._aggregate_version = version
+            return dict(self._aggregate)
+    
+    def _aggregate_rows(self, conn: sqlite3.Connection) -> Dict[str, Any]:
+        """Sum per-document results into the response structure"""
+        total_questions = 0
+        topic_counts = Counter()
+        difficulty_counts = Counter({"Easy": 0, "Medium": 0, "Hard": 0})
+        year_counts = Counter()
+        
+        for question_count, topics, difficulty, years in conn.execute(
+            "SELECT question_count, topics, difficulty, years FROM pyq_documents"
+        ):
+            total_questions += question_count
+            topic_counts.update(json.loads(topics))
+            difficulty_counts.update(json.loads(difficulty))
+            year_counts.update(json.loads(years))
+        
+        topic_distribution = dict(topic_counts.most_common(10))
+        year_distribution = dict(year_counts.most_common())
+        
+        return {
+            "total_questions": total_questions,
+            "patterns": self._identify_patterns(topic_distribution, year_distribution),
+            "topic_distribution": topic_distribution,
+            "difficulty_distribution": dict(difficulty_counts),
+            "year_wise_trends": year_distribution
+        }
     
     def _extract_questions(self, text: str) -> List[str]:
         """Extract individual questions from text"""
@@ -77,57 +293,35 @@ class PYQAnalytics:
         
         return questions if questions else [text[:1000]]
     
-    def _analyze_topics(self, questions: List[str]) -> Dict[str, int]:
-        """Analyze topics in questions using LLM"""
+    def _build_topic_prompt(self, questions: List[str]) -> str:
+        """Build the topic identification prompt"""
         # Sample questions if too many
         sample_questions = questions[:20] if len(questions) > 20 else questions
         
         questions_text = "\n".join([f"{i+1}. {q[:200]}" for i, q in enumerate(sample_questions)])
         
-        prompt = f"""Analyze these exam questions and identify the main topics covered.
+        return f"""Analyze these exam questions and identify the main topics covered.
 List ONLY the topic names, one per line, no explanations.
 
 QUESTIONS:
 {questions_text}
 
 TOPICS (one per line):"""
-        
-        try:
-            response = self.ollama_client.generate(prompt)
-            
-            # Parse topics from response
-            topics = []
-            for line in response.split('\n'):
-                line = line.strip()
-                # Remove numbered list markers
-                line = re.sub(r'^\d+[\.\)]\s*', '', line)
-                line = re.sub(r'^[-*]\s*', '', line)
-                if line and len(line) > 3:
-                    topics.append(line[:50])  # Limit topic name length
-            
-            # Count topic frequency
-            topic_counts = Counter(topics)
-            return dict(topic_counts.most_common(10))
-            
-        except Exception as e:
-            print(f"Topic analysis failed: {str(e)}")
-            return {"General": len(questions)}
     
-    def _extract_year_distribution(self, documents: List[Dict[str, Any]]) -> Dict[str, int]:
-        """Extract year information from document metadata"""
-        year_pattern = r'20\d{2}|19\d{2}'
-        year_counts = Counter()
-        
-        for doc in documents:
-            metadata = doc.get("metadata", {})
-            filename = metadata.get("filename", "")
-            
-            # Find years in filename
-            years = re.findall(year_pattern, filename)
-            for year in years:
-                year_counts[year] += 1
+    def _parse_topics(self, response: str) -> Dict[str, int]:
+        """Parse topic names from the LLM response and count them"""
+        topics = []
+        for line in response.split('\n'):
+            line = line.strip()
+            # Remove numbered list markers
+            line = re.sub(r'^\d+[\.\)]\s*', '', line)
+            line = re.sub(r'^[-*]\s*', '', line)
+            if line and len(line) > 3:
+                topics.append(line[:50])  # Limit topic name length
         
-        return dict(year_counts.most_common())
+        # Count topic frequency
+        topic_counts = Counter(topics)
+        return dict(topic_counts.most_common(10))
     
     def _estimate_difficulty(self, questions: List[str]) -> Dict[str, int]:
         """Estimate difficulty distribution"""
@@ -169,8 +363,19 @@ TOPICS (one per line):"""
             })
         
         return patterns
+    
+    def shutdown(self):
+        """Stop the analytics queue"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_pyq_analytics: Optional[PYQAnalytics] = None
 
 
 def get_pyq_analytics() -> PYQAnalytics:
     """Get PYQAnalytics instance"""
-    return PYQAnalytics()
+    global _pyq_analytics
+    if _pyq_analytics is None:
+        _pyq_analytics = PYQAnalytics()
+    return _pyq_analytics
@@ -0,0 +1,177 @@
+"""
+Batched query log writer
+Buffers query records in memory and flushes them to governance in the background
+"""
+from typing import List, Dict, Any, Optional
+from collections import deque
+from datetime import datetime
+import threading
+from backend.config import (
+    QUERY_LOG_MAX_QUEUE,
+    QUERY_LOG_BATCH_SIZE,
+    QUERY_LOG_FLUSH_INTERVAL_SECONDS,
+    QUERY_LOG_LATENCY_WINDOW
+)
+from backend.features.governance import get_governance_panel
+
+
+class QueryLogWriter:
+    """Bounded in-memory query log flushed in batches by a background thread"""
+    
+    PERCENTILES = (50, 90, 95, 99)
+    
+    def __init__(
+        self,
+        max_queue: int = QUERY_LOG_MAX_QUEUE,
+        batch_size: int = QUERY_LOG_BATCH_SIZE,
+        flush_interval: float = QUERY_LOG_FLUSH_INTERVAL_SECONDS
+    ):
+        """
+        Initialize writer
+        
+        Args:
+            max_queue: Maximum buffered records; further records are dropped
+            batch_size: Buffered records that trigger an early flush
+            flush_interval: Maximum seconds between flushes
+        """
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.flush_failures = 0
+        self._buffer: deque = deque()
+        self._latencies: deque = deque(maxlen=QUERY_LOG_LATENCY_WINDOW)
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run,
+            name="campusnexus-query-log",
+            daemon=True
+        )
+        self._thread.start()
+    
+    def log(
+        self,
+        query: str,
+        user: str = "anonymous",
+        latency_ms: Optional[float] = None
+    ) -> bool:
+        """
+        Buffer a query record without touching storage
+        
+        Args:
+            query: User query
+            user: User identifier
+            latency_ms: End-to-end latency of the request
+            
+        Returns:
+            False if the buffer was full and the record was dropped
+        """
+        record = {
+            "query": query[:200],
+            "user": user,
+            "timestamp": datetime.now().isoformat(),
+            "latency_ms": latency_ms
+        }
+        
+        with self._cond:
+            if latency_ms is not None:
+                self._latencies.append(latency_ms)
+            
+            if len(self._buffer) >= self.max_queue:
+                self.dropped += 1
+                return False
+            
+            self._buffer.append(record)
+            self.enqueued += 1
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return True
+    
+    def _run(self):
+        """Background loop: flush when a batch fills up or the interval elapses"""
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopping or len(self._buffer) >= self.batch_size,
+                    timeout=self.flush_interval
+                )
+                stopping = self._stopping
+            
+            self.flush()
+            if stopping:
+                break
+    
+    def flush(self):
+        """Write all buffered records to governance storage"""
+        with self._flush_lock:
+            while True:
+                with self._cond:
+                    batch: List[Dict[str, Any]] = []
+                    while self._buffer and len(batch) < self.batch_size:
+                        batch.append(self._buffer.popleft())
+                if not batch:
+                    return
+                
+                try:
+                    get_governance_panel().log_queries(batch)
+                    self.flushed += len(batch)
+                except Exception as e:
+                    self.flush_failures += 1
+                    self.dropped += len(batch)
+                    print(f"Failed to flush query log: {str(e)}")
+                    return
+    
+    def close(self):
+        """Stop the background thread after a final flush"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout=10)
+        self.flush()
+    
+    def get_latency_percentiles(self) -> Dict[str, float]:
+        """Latency percentiles (ms) over the recent window"""
+        with self._cond:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return {}
+        
+        percentiles = {}
+        for p in self.PERCENTILES:
+            index = min(len(latencies) - 1, int(round(p / 100 * (len(latencies) - 1))))
+            percentiles[f"p{p}"] = round(latencies[index], 2)
+        return percentiles
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue, flush and drop counters plus latency percentiles"""
+        with self._cond:
+            queued = len(self._buffer)
+            samples = len(self._latencies)
+        return {
+            "queued": queued,
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "flush_failures": self.flush_failures,
+            "latency_samples": samples,
+            "latency_ms": self.get_latency_percentiles()
+        }
+
+
+# Global instance
+_query_log_writer: Optional[QueryLogWriter] = None
+_query_log_writer_lock = threading.Lock()
+
+
+def get_query_log_writer() -> QueryLogWriter:
+    """Get or create global query log writer"""
+    global _query_log_writer
+    with _query_log_writer_lock:
+        if _query_log_writer is None:
+            _query_log_writer = QueryLogWriter()
+        return _query_log_writer
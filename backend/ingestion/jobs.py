@@ -0,0 +1,260 @@
+"""
+Background ingestion jobs
+Runs uploads through the ingestion pipeline on a bounded worker pool
+and tracks per-stage progress for polling
+"""
+from typing import Dict, Any, Optional, Callable
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import threading
+import uuid
+from backend.config import (
+    MAX_CONCURRENT_INGESTION_JOBS,
+    MAX_QUEUED_INGESTION_JOBS,
+    MAX_TRACKED_INGESTION_JOBS
+)
+from backend.ingestion.pipeline import ingest_document
+
+
+class IngestionQueueFull(RuntimeError):
+    """Raised when too many ingestion jobs are already waiting"""
+
+
+class IngestionJob:
+    """Progress record for one document ingestion"""
+    
+    # Share of overall progress attributed to each stage
+    STAGE_WEIGHTS = {"parsing": 0.35, "embedding": 0.45, "storing": 0.1, "analyzing": 0.1}
+    
+    def __init__(
+        self,
+        document_id: str,
+        filename: str,
+        file_path: Path,
+        file_ext: str,
+        tags: Optional[Dict[str, str]] = None,
+        content_hash: Optional[str] = None
+    ):
+        self.job_id = str(uuid.uuid4())
+        self.document_id = document_id
+        self.filename = filename
+        self.file_path = file_path
+        self.file_ext = file_ext
+        self.tags = tags or {}
+        self.content_hash = content_hash
+        self.status = "queued"  # queued, running, completed, failed
+        self.stage = "queued"   # queued, parsing, embedding, storing, analyzing, done
+        self.pages_parsed = 0
+        self.total_pages: Optional[int] = None
+        self.chunks_embedded = 0
+        self.total_chunks: Optional[int] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+    
+    def set_stage(self, stage: str):
+        """Record the pipeline stage being entered"""
+        self.stage = stage
+    
+    def update_parse_progress(self, pages_parsed: int, total_pages: int):
+        """Record parsing progress"""
+        self.pages_parsed = pages_parsed
+        self.total_pages = total_pages
+    
+    def update_embed_progress(self, chunks_embedded: int, total_chunks: int):
+        """Record embedding progress"""
+        self.chunks_embedded = chunks_embedded
+        self.total_chunks = total_chunks
+    
+    def progress(self) -> float:
+        """Estimate overall progress between 0 and 1"""
+        if self.status == "completed":
+            return 1.0
+        if self.stage == "queued":
+            return 0.0
+        
+        progress = 0.0
+        for stage, weight in self.STAGE_WEIGHTS.items():
+            if stage == self.stage:
+                if stage == "parsing" and self.total_pages:
+                    progress += weight * self.pages_parsed / self.total_pages
+                elif stage == "embedding" and self.total_chunks:
+                    progress += weight * self.chunks_embedded / self.total_chunks
+                break
+            progress += weight
+        
+        return round(min(progress, 1.0), 3)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize job state for the API"""
+        return {
+            "job_id": self.job_id,
+            "document_id": self.document_id,
+            "filename": self.filename,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": self.progress(),
+            "pages_parsed": self.pages_parsed,
+            "total_pages": self.total_pages,
+            "chunks_embedded": self.chunks_embedded,
+            "total_chunks": self.total_chunks,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at
+        }
+
+
+class IngestionJobManager:
+    """Queues ingestion jobs and runs them with bounded concurrency"""
+    
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_INGESTION_JOBS,
+            thread_name_prefix="campusnexus-ingest"
+        )
+        # Backfills run one at a time on their own worker so uploads never
+        # queue behind a full-corpus pass
+        self.maintenance_executor = ThreadPoolExecutor(
+            max_workers=1,
+            thread_name_prefix="campusnexus-maintenance"
+        )
+        self.jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def submit(
+        self,
+        document_id: str,
+        filename: str,
+        file_path: Path,
+        file_ext: str,
+        tags: Optional[Dict[str, str]] = None,
+        content_hash: Optional[str] = None,
+        skip_duplicates: bool = False
+    ) -> IngestionJob:
+        """
+        Queue a saved upload for ingestion
+        
+        With skip_duplicates, a queued or running job for a file with the
+        same content_hash is returned instead of queuing another one. The
+        check and the queuing happen under one lock, so identical uploads
+        arriving together share a single job; the caller can tell by the
+        returned job's document_id.
+        
+        Args:
+            document_id: Document identifier
+            filename: Original filename
+            file_path: Path of the saved upload
+            file_ext: Lower-case file extension including the dot
+            tags: Optional course/department tags stored on every chunk
+            content_hash: SHA-256 of the uploaded file
+            skip_duplicates: Reuse an active job for identical file bytes
+            
+        Returns:
+            The queued job, or the active job for an identical file
+        """
+        with self._lock:
+            if skip_duplicates and content_hash is not None:
+                for job in self.jobs.values():
+                    if job.content_hash == content_hash and job.status in ("queued", "running"):
+                        return job
+            
+            if self._active_count() >= MAX_QUEUED_INGESTION_JOBS:
+                raise IngestionQueueFull(
+                    f"Too many documents are being processed ({MAX_QUEUED_INGESTION_JOBS}). "
+                    "Please retry shortly."
+                )
+            
+            job = IngestionJob(document_id, filename, file_path, file_ext, tags, content_hash)
+            self.jobs[job.job_id] = job
+            self._prune()
+        
+        self.executor.submit(self._run, job)
+        return job
+    
+    def submit_task(self, func: Callable[..., Any], *args, **kwargs):
+        """
+        Run maintenance work (e.g. backfills) in the background
+        
+        Tasks run one at a time, in submission order, on a single worker
+        separate from the ingestion pool, so they cannot delay uploads
+        or starve /chat.
+        """
+        def run():
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"✗ Background task {func.__name__} failed: {str(e)}")
+        
+        return self.maintenance_executor.submit(run)
+    
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """Get a job by id"""
+        with self._lock:
+            return self.jobs.get(job_id)
+    
+    def _run(self, job: IngestionJob):
+        """Execute a job on a worker thread"""
+        job.status = "running"
+        job.started_at = datetime.now()
+        
+        try:
+            result = ingest_document(
+                document_id=job.document_id,
+                file_path=job.file_path,
+                filename=job.filename,
+                file_ext=job.file_ext,
+                tags=job.tags,
+                content_hash=job.content_hash,
+                on_parse_progress=job.update_parse_progress,
+                on_embed_progress=job.update_embed_progress,
+                on_stage=job.set_stage
+            )
+            job.total_pages = result.get("total_pages")
+            job.total_chunks = result["total_chunks"]
+            job.chunks_embedded = result["total_chunks"]
+            job.stage = "done"
+            job.status = "completed"
+            print(f"✓ Ingested {job.filename} ({job.total_chunks} chunks)")
+            
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"✗ Ingestion failed for {job.filename}: {str(e)}")
+        
+        finally:
+            job.finished_at = datetime.now()
+    
+    def _active_count(self) -> int:
+        """Number of queued or running jobs"""
+        return sum(1 for job in self.jobs.values() if job.status in ("queued", "running"))
+    
+    def _prune(self):
+        """Forget the oldest finished jobs beyond the tracking limit"""
+        finished = [
+            job_id for job_id, job in self.jobs.items()
+            if job.status in ("completed", "failed")
+        ]
+        excess = len(self.jobs) - MAX_TRACKED_INGESTION_JOBS
+        for job_id in finished[:max(excess, 0)]:
+            del self.jobs[job_id]
+    
+    def shutdown(self):
+        """Stop accepting jobs; running jobs finish in the background"""
+        self.executor.shutdown(wait=False)
+        self.maintenance_executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_job_manager: Optional[IngestionJobManager] = None
+
+
+def get_job_manager() -> IngestionJobManager:
+    """Get or create global ingestion job manager"""
+    global _job_manager
+    if _job_manager is None:
+        _job_manager = IngestionJobManager()
+    return _job_manager
@@ -0,0 +1,731 @@
+"""
+Document ingestion pipeline
+Parses, chunks, embeds and stores an uploaded document, and re-indexes
+or deletes stored documents
+"""
+from typing import Dict, Any, Callable, Optional, List, Tuple
+from pathlib import Path
+import hashlib
+import re
+from backend.config import (
+    UPLOADS_DIR,
+    INGESTION_EMBED_BATCH_SIZE,
+    LLM_BATCH_CONCURRENCY,
+    CHROMA_PAGE_SIZE,
+    EVICT_REJECTED_DOCUMENTS
+)
+from backend.llm.embeddings import get_embedding_model
+from backend.vector_store.chroma_client import get_chroma_client, chunk_document_id, chunk_index
+from backend.vector_store.lexical_index import get_lexical_index
+from backend.processors.pdf_processor import get_pdf_processor
+from backend.processors.docx_processor import get_docx_processor
+from backend.processors.pptx_processor import get_pptx_processor
+from backend.processors.text_processor import get_text_processor, MARKDOWN_EXTENSIONS
+from backend.processors.chunking import (
+    select_chunking_profile,
+    get_chunker,
+    chunker_fingerprint,
+    is_question_paper
+)
+from backend.features.governance import get_governance_panel
+from backend.features.pyq_analytics import get_pyq_analytics
+from backend.features.knowledge_graph import get_knowledge_graph
+
+
+_NON_WORD_PATTERN = re.compile(r"[\W_]+")
+
+
+def get_processor(file_ext: str):
+    """
+    Get the document processor for a file extension
+    
+    Args:
+        file_ext: Lower-case file extension including the dot
+    
+    Returns:
+        Processor instance with a process(file_path) method
+    """
+    if file_ext == ".pdf":
+        return get_pdf_processor()
+    elif file_ext == ".docx":
+        return get_docx_processor()
+    elif file_ext == ".pptx":
+        return get_pptx_processor()
+    elif file_ext == ".txt" or file_ext in MARKDOWN_EXTENSIONS:
+        return get_text_processor()
+    raise ValueError(f"Unsupported file type: {file_ext}")
+
+
+def chunk_content_hash(text: str) -> str:
+    """
+    Hash a chunk's text for change detection
+    
+    Whitespace is collapsed first, as the embedding cache does, so a chunk
+    only counts as changed when its embedding would change.
+    """
+    return hashlib.sha256(" ".join(text.split()).encode("utf-8")).hexdigest()
+
+
+def chunk_dedup_hash(text: str) -> str:
+    """
+    Hash a chunk's text for near-duplicate detection
+    
+    Case, punctuation and spacing are ignored, so re-exported or lightly
+    reformatted copies of the same material hash alike.
+    """
+    normalized = " ".join(_NON_WORD_PATTERN.sub(" ", text.lower()).split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def ingest_document(
+    document_id: str,
+    file_path: Path,
+    filename: str,
+    file_ext: str,
+    tags: Optional[Dict[str, str]] = None,
+    content_hash: Optional[str] = None,
+    on_parse_progress: Optional[Callable[[int, int], None]] = None,
+    on_embed_progress: Optional[Callable[[int, int], None]] = None,
+    on_stage: Optional[Callable[[str], None]] = None,
+    keep_status: bool = False
+) -> Dict[str, Any]:
+    """
+    Run the parse -> chunk -> embed -> store pipeline for one document
+    
+    When the document already has chunks (a new version uploaded with
+    PUT /documents/{id}), only chunks whose content hash changed are
+    re-embedded and rewritten; chunks the new version no longer has are
+    deleted.
+    
+    Near-duplicate chunks on the same page, within the document or across
+    documents with the same status, filename, file type and tags, are
+    stored once; the copies are registered in governance as references.
+    
+    The document is chunked with the chunking profile for its type; the
+    profile and its fingerprint are stored on every chunk and in governance.
+    
+    Args:
+        document_id: Document identifier used as chunk id prefix
+        file_path: Path of the saved upload
+        filename: Original filename
+        file_ext: Lower-case file extension including the dot
+        tags: Optional course/department tags stored on every chunk
+        content_hash: SHA-256 of the uploaded file, for duplicate uploads
+        on_parse_progress: Optional callable receiving (pages_parsed, total_pages)
+        on_embed_progress: Optional callable receiving (chunks_embedded, total_chunks)
+        on_stage: Optional callable receiving the name of the stage being entered
+        keep_status: Keep the document's approval status instead of
+            returning it to pending (re-chunking the same file)
+    
+    Returns:
+        Processor result with chunks, metadatas, total_pages, total_chunks,
+        reembedded_chunks and deduplicated_chunks
+    """
+    def enter(stage: str):
+        if on_stage:
+            on_stage(stage)
+    
+    # Parse and chunk
+    enter("parsing")
+    processor = get_processor(file_ext)
+    chunking_profile = select_chunking_profile(filename, file_ext)
+    chunker = get_chunker(chunking_profile)
+    result = processor.process(file_path, progress_callback=on_parse_progress, chunker=chunker)
+    chunks = result["chunks"]
+    
+    chroma = get_chroma_client()
+    governance = get_governance_panel()
+    previous = governance.get_document(document_id)
+    status = previous["status"] if keep_status and previous else "pending"
+    
+    # Record what retrieval filters on: the document, its original filename
+    # (processors see the saved "{document_id}_{filename}" path), its
+    # governance status and its tags, plus how it was chunked. Chroma
+    # rejects None metadata values, so those are dropped.
+    document_metadata = {
+        "document_id": document_id,
+        "filename": filename,
+        "status": status,
+        "chunking_profile": chunking_profile,
+        "chunking_fingerprint": chunker_fingerprint(chunker),
+        **(tags or {})
+    }
+    metadatas = [
+        {
+            **{key: value for key, value in metadata.items() if value is not None},
+            **document_metadata,
+            "chunk_index": i,
+            "content_hash": chunk_content_hash(chunk)
+        }
+        for i, (chunk, metadata) in enumerate(zip(chunks, result["metadatas"]))
+    ]
+    result["metadatas"] = metadatas
+    
+    chunk_ids = [f"{document_id}_{i}" for i in range(len(chunks))]
+    
+    # Store each distinct text once per page; later copies reference the
+    # stored chunk. Text is only shared between chunks whose filterable
+    # metadata (status, filename, file type, tags and page) agrees, so
+    # every stored chunk's metadata stays true for each document it serves.
+    dedup_hashes = [chunk_dedup_hash(chunk) for chunk in chunks]
+    pages = [metadata.get("page") for metadata in metadatas]
+    dedup_keys = list(zip(dedup_hashes, pages))
+    scope = dedup_scope({"status": status, "filename": filename, "file_type": file_ext[1:], **(tags or {})})
+    canonical = governance.find_canonical_chunks(
+        dedup_keys,
+        exclude_document_id=document_id,
+        status=status,
+        filename=filename,
+        file_type=file_ext[1:],
+        course=(tags or {}).get("course"),
+        department=(tags or {}).get("department")
+    )
+    references: Dict[int, str] = {}
+    for i, dedup_key in enumerate(dedup_keys):
+        if dedup_key in canonical:
+            references[i] = canonical[dedup_key]
+        else:
+            canonical[dedup_key] = chunk_ids[i]
+    stored = [i for i in range(len(chunks)) if i not in references]
+    
+    # Diff against the stored version, if any
+    existing = {
+        doc["id"]: doc["metadata"]
+        for doc in chroma.iter_documents(where={"document_id": document_id}, include=["metadatas"])
+    }
+    changed = [
+        i for i in stored
+        if existing.get(chunk_ids[i], {}).get("content_hash") != metadatas[i]["content_hash"]
+    ]
+    changed_set = set(changed)
+    metadata_only = [
+        i for i in stored
+        if i not in changed_set and existing[chunk_ids[i]] != metadatas[i]
+    ]
+    stored_ids = {chunk_ids[i] for i in stored}
+    stale_ids = [chunk_id for chunk_id in existing if chunk_id not in stored_ids]
+    
+    # Chunks of other documents that reference text about to be rewritten
+    # or removed get their own stored copy first; when the status,
+    # filename, file type or tags change, so do references to the text
+    # that stays
+    if existing:
+        if dedup_scope(previous) != scope:
+            affected = list(existing)
+        else:
+            affected = [chunk_ids[i] for i in changed if chunk_ids[i] in existing] + stale_ids
+        promote_chunk_references(document_id, affected)
+    
+    # Generate embeddings in batches so progress can be reported
+    enter("embedding")
+    embeddings_model = get_embedding_model()
+    embeddings = []
+    for start in range(0, len(changed), INGESTION_EMBED_BATCH_SIZE):
+        batch = [chunks[i] for i in changed[start:start + INGESTION_EMBED_BATCH_SIZE]]
+        embeddings.extend(embeddings_model.embed_batch(batch))
+        if on_embed_progress:
+            on_embed_progress(len(embeddings), len(changed))
+    
+    # Store in ChromaDB
+    enter("storing")
+    if stale_ids:
+        chroma.delete_documents(stale_ids)
+    if changed:
+        store = chroma.upsert_documents if existing else chroma.add_documents
+        store(
+            texts=[chunks[i] for i in changed],
+            embeddings=embeddings,
+            metadatas=[metadatas[i] for i in changed],
+            ids=[chunk_ids[i] for i in changed]
+        )
+    if metadata_only:
+        chroma.update_metadatas(
+            [chunk_ids[i] for i in metadata_only],
+            [metadatas[i] for i in metadata_only]
+        )
+    result["reembedded_chunks"] = len(changed)
+    result["deduplicated_chunks"] = len(references)
+    
+    # Register in governance (a new version goes back to pending unless
+    # only its chunking changed)
+    governance.replace_document_chunks(
+        document_id,
+        [(chunk_ids[i], dedup_hashes[i], references.get(i), pages[i]) for i in range(len(chunks))]
+    )
+    governance.register_document(
+        document_id=document_id,
+        filename=filename,
+        file_type=file_ext[1:],  # Remove dot
+        course=(tags or {}).get("course"),
+        department=(tags or {}).get("department"),
+        total_chunks=len(chunks),
+        file_path=str(file_path),
+        content_hash=content_hash,
+        chunking_profile=chunking_profile,
+        chunking_fingerprint=document_metadata["chunking_fingerprint"],
+        keep_status=keep_status
+    )
+    if previous and previous.get("file_path") and previous["file_path"] != str(file_path):
+        Path(previous["file_path"]).unlink(missing_ok=True)
+    
+    # Precompute PYQ analytics for question papers so /analytics/pyq only
+    # aggregates; topic extraction calls the LLM, so it is queued on the
+    # analytics worker rather than holding up the job
+    enter("analyzing")
+    analytics = get_pyq_analytics()
+    if not is_question_paper(filename):
+        if previous:
+            analytics.remove_document(document_id)
+    elif changed or stale_ids or not existing:
+        analytics.schedule_document(document_id, filename, chunks, metadatas)
+    
+    # Graph extraction is slow (one LLM call per chunk); it runs in its own
+    # queue and skips chunks that are already extracted
+    knowledge_graph = get_knowledge_graph()
+    if existing:
+        knowledge_graph.remove_chunks([chunk_ids[i] for i in changed] + stale_ids)
+    knowledge_graph.schedule_document(document_id, [(chunk_ids[i], chunks[i]) for i in stored])
+    
+    return result
+
+
+def dedup_scope(record: Optional[Dict[str, Any]]) -> Tuple[Optional[str], ...]:
+    """
+    What a document's chunks must share with another's to be deduplicated
+    
+    A stored chunk carries one status, filename, file type, course and
+    department, which retrieval filters on and sources cite, so text is
+    only shared between documents that agree on all of them. Chunks must
+    also be on the same page; that is checked per chunk.
+    """
+    record = record or {}
+    return (
+        record.get("status") or "pending",
+        record.get("filename"),
+        (record.get("file_type") or "").lstrip(".") or None,
+        record.get("course"),
+        record.get("department")
+    )
+
+
+def _copy_metadata(
+    source: Dict[str, Any],
+    document_id: str,
+    reference: Dict[str, Any],
+    record: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Metadata for a copy of a stored chunk made for a referencing chunk"""
+    # Offsets and page counts belong to the source document; the page and
+    # everything retrieval filters on come from the reference's document
+    metadata = {
+        key: value for key, value in source.items()
+        if key not in ("page", "total_pages", "start_char", "end_char", "file_type", "course", "department")
+    }
+    metadata.update({
+        "document_id": document_id,
+        "chunk_index": chunk_index(reference["chunk_id"]),
+        "status": record.get("status") or "pending"
+    })
+    if reference.get("page") is not None:
+        metadata["page"] = reference["page"]
+    for key in ("filename", "file_type", "course", "department"):
+        if record.get(key):
+            metadata[key] = record[key]
+    return metadata
+
+
+def promote_chunk_references(document_id: str, canonical_ids: List[str], keep_compatible: bool = False):
+    """
+    Copy stored chunks into the documents that reference them
+    
+    Called before a document's stored chunks are rewritten or deleted, or
+    before its status, filename, file type or tags change. For each
+    affected text, the first referencing chunk of each other document scope
+    and page is stored with that document's metadata and becomes the new
+    canonical copy; the remaining references in that scope and on that
+    page are re-pointed at it.
+    
+    Args:
+        document_id: Document whose chunks are going away or changing
+        canonical_ids: Its stored chunk ids affected
+        keep_compatible: Leave references from documents that still share
+            this document's dedup scope pointing at its chunks
+    """
+    if not canonical_ids:
+        return
+    
+    governance = get_governance_panel()
+    references = [
+        ref for ref in governance.get_chunk_references(canonical_ids)
+        if ref["document_id"] != document_id
+    ]
+    if not references:
+        return
+    
+    records: Dict[str, Dict[str, Any]] = {}
+    
+    def record_of(ref_document_id: str) -> Dict[str, Any]:
+        if ref_document_id not in records:
+            records[ref_document_id] = governance.get_document(ref_document_id) or {}
+        return records[ref_document_id]
+    
+    own_scope = dedup_scope(record_of(document_id)) if keep_compatible else None
+    
+    # References grouped by the text they share and the scope and page
+    # they need
+    groups: Dict[Tuple[str, Tuple, Optional[int]], List[Dict[str, Any]]] = {}
+    for ref in references:
+        scope = dedup_scope(record_of(ref["document_id"]))
+        if scope == own_scope:
+            continue
+        groups.setdefault((ref["canonical_id"], scope, ref.get("page")), []).append(ref)
+    if not groups:
+        return
+    
+    chroma = get_chroma_client()
+    sources = {
+        doc["id"]: doc
+        for doc in chroma.get_documents_by_ids(
+            list({canonical_id for canonical_id, _, _ in groups}),
+            include=["documents", "metadatas", "embeddings"]
+        )
+    }
+    
+    promoted: List[Tuple[str, str, List[str]]] = []
+    ids, texts, embeddings, metadatas = [], [], [], []
+    graph_chunks: Dict[str, List[Tuple[str, str]]] = {}
+    
+    for (canonical_id, _, _), group in groups.items():
+        source = sources.get(canonical_id)
+        if source is None:
+            continue
+        
+        first = group[0]
+        ids.append(first["chunk_id"])
+        texts.append(source["text"])
+        embeddings.append([float(value) for value in source["embedding"]])
+        metadatas.append(_copy_metadata(
+            source["metadata"], first["document_id"], first, record_of(first["document_id"])
+        ))
+        promoted.append((canonical_id, first["chunk_id"], [ref["chunk_id"] for ref in group[1:]]))
+        graph_chunks.setdefault(first["document_id"], []).append((first["chunk_id"], source["text"]))
+    
+    if not ids:
+        return
+    
+    chroma.add_documents(texts=texts, embeddings=embeddings, metadatas=metadatas, ids=ids)
+    for old_canonical_id, new_canonical_id, repointed_ids in promoted:
+        governance.promote_chunk(old_canonical_id, new_canonical_id, repointed_ids)
+    for ref_document_id, chunk_pairs in graph_chunks.items():
+        get_knowledge_graph().schedule_document(ref_document_id, chunk_pairs)
+
+
+def materialize_chunk_references(document_id: str):
+    """
+    Store a document's own copies of text it shares outside its dedup scope
+    
+    Called after a document's status changes: chunks that referenced
+    another document's stored text are stored with this document's
+    metadata unless that document still shares its scope.
+    
+    Args:
+        document_id: Document identifier
+    """
+    governance = get_governance_panel()
+    references = governance.get_document_references(document_id)
+    if not references:
+        return
+    
+    record = governance.get_document(document_id) or {}
+    scope = dedup_scope(record)
+    scopes: Dict[str, Tuple] = {}
+    detached = []
+    for ref in references:
+        canonical_document_id = chunk_document_id(ref["canonical_id"])
+        if canonical_document_id not in scopes:
+            scopes[canonical_document_id] = dedup_scope(governance.get_document(canonical_document_id))
+        if scopes[canonical_document_id] != scope:
+            detached.append(ref)
+    if not detached:
+        return
+    
+    chroma = get_chroma_client()
+    sources = {
+        doc["id"]: doc
+        for doc in chroma.get_documents_by_ids(
+            list({ref["canonical_id"] for ref in detached}),
+            include=["documents", "metadatas", "embeddings"]
+        )
+    }
+    
+    ids, texts, embeddings, metadatas = [], [], [], []
+    for ref in detached:
+        source = sources.get(ref["canonical_id"])
+        if source is None:
+            continue
+        ids.append(ref["chunk_id"])
+        texts.append(source["text"])
+        embeddings.append([float(value) for value in source["embedding"]])
+        metadatas.append(_copy_metadata(source["metadata"], document_id, ref, record))
+    
+    if not ids:
+        return
+    
+    chroma.add_documents(texts=texts, embeddings=embeddings, metadatas=metadatas, ids=ids)
+    governance.detach_chunks(ids)
+    get_knowledge_graph().schedule_document(document_id, list(zip(ids, texts)))
+
+
+def delete_document(document_id: str) -> bool:
+    """
+    Remove a document from every store
+    
+    Chunk ids come from the chunk count recorded in governance; documents
+    registered before it was recorded fall back to a metadata lookup.
+    Chunks are removed from ChromaDB and the BM25 index, then PYQ
+    analytics, knowledge graph relations, the governance record and the
+    uploaded file are removed.
+    
+    Args:
+        document_id: Document identifier
+    
+    Returns:
+        False when the document is unknown
+    """
+    chroma = get_chroma_client()
+    governance = get_governance_panel()
+    record = governance.get_document(document_id)
+    
+    if record and record.get("total_chunks") is not None:
+        chunk_ids = [f"{document_id}_{i}" for i in range(record["total_chunks"])]
+    else:
+        chunk_ids = chroma.get_document_chunk_ids(document_id)
+    
+    if record is None and not chunk_ids:
+        return False
+    
+    if chunk_ids:
+        # Other documents' copies of this text must outlive it
+        promote_chunk_references(document_id, chunk_ids)
+        chroma.delete_documents(chunk_ids)
+    get_pyq_analytics().remove_document(document_id)
+    get_knowledge_graph().remove_document(document_id)
+    governance.delete_document(document_id)
+    
+    if record and record.get("file_path"):
+        Path(record["file_path"]).unlink(missing_ok=True)
+    else:
+        for path in UPLOADS_DIR.glob(f"{document_id}_*"):
+            path.unlink(missing_ok=True)
+    
+    print(f"✓ Deleted document {document_id} ({len(chunk_ids)} chunks)")
+    return True
+
+
+def _scan_document_chunk_ids(include_chunk: Callable[[str, str], bool]) -> Dict[str, List[str]]:
+    """
+    Page through chunk metadata and group matching chunk ids by document
+    
+    Only ids are kept, so the scan stays small even for a large corpus;
+    chunk text is fetched per document when it is processed.
+    
+    Args:
+        include_chunk: Predicate called with (document_id, chunk_id)
+    
+    Returns:
+        Mapping of document_id to chunk ids in chunk order
+    """
+    documents: Dict[str, List[str]] = {}
+    for doc in get_chroma_client().iter_documents(include=["metadatas"]):
+        document_id = chunk_document_id(doc["id"], doc["metadata"])
+        if include_chunk(document_id, doc["id"]):
+            documents.setdefault(document_id, []).append(doc["id"])
+    
+    for chunk_ids in documents.values():
+        chunk_ids.sort(key=chunk_index)
+    return documents
+
+
+def _load_chunks(chunk_ids: List[str]) -> List[Dict[str, Any]]:
+    """Fetch chunks by id, preserving the given order"""
+    by_id = {
+        doc["id"]: doc
+        for doc in get_chroma_client().get_documents_by_ids(chunk_ids)
+    }
+    return [by_id[chunk_id] for chunk_id in chunk_ids if chunk_id in by_id]
+
+
+def sync_document_status(document_id: str, status: str):
+    """
+    Apply a governance decision to a document's chunks
+    
+    Rejected documents are evicted from the index when
+    EVICT_REJECTED_DOCUMENTS is set; otherwise the status is written into
+    every chunk's metadata so retrieval can filter on it. Other documents'
+    copies of evicted text are stored for them first, and the evicted
+    document's chunk registry rows are dropped so nothing is deduplicated
+    against chunks that are no longer stored.
+    
+    Text is only shared between documents with the same status, filename,
+    file type and tags, so references in either direction that the new
+    status splits apart are given their own stored copies before the
+    status is written.
+    
+    Args:
+        document_id: Document identifier
+        status: New governance status
+    """
+    chroma = get_chroma_client()
+    
+    if status == "rejected" and EVICT_REJECTED_DOCUMENTS:
+        chunk_ids = chroma.get_document_chunk_ids(document_id)
+        if chunk_ids:
+            promote_chunk_references(document_id, chunk_ids)
+            chroma.delete_documents(chunk_ids)
+        get_governance_panel().replace_document_chunks(document_id, [])
+        return
+    
+    promote_chunk_references(document_id, chroma.get_document_chunk_ids(document_id), keep_compatible=True)
+    materialize_chunk_references(document_id)
+    chroma.update_document_metadata(document_id, {"status": status})
+
+
+def migrate_chunk_metadata():
+    """Record document_id, governance status and original filename on chunks stored before they were"""
+    chroma = get_chroma_client()
+    governance = get_governance_panel()
+    
+    # (status, filename) per document, read from governance once
+    documents: Dict[str, Tuple[str, Optional[str]]] = {}
+    ids: List[str] = []
+    metadatas: List[Dict[str, Any]] = []
+    migrated = 0
+    
+    for doc in chroma.iter_documents(include=["metadatas"]):
+        metadata = doc["metadata"]
+        if "document_id" in metadata and "status" in metadata:
+            continue
+        
+        document_id = chunk_document_id(doc["id"], metadata)
+        if document_id not in documents:
+            record = governance.get_document(document_id) or {}
+            documents[document_id] = (record.get("status") or "pending", record.get("filename"))
+        status, filename = documents[document_id]
+        
+        updated = {**metadata, "document_id": document_id, "status": status}
+        if filename:
+            updated["filename"] = filename
+        ids.append(doc["id"])
+        metadatas.append(updated)
+        
+        if len(ids) >= CHROMA_PAGE_SIZE:
+            chroma.update_metadatas(ids, metadatas)
+            migrated += len(ids)
+            ids, metadatas = [], []
+    
+    if ids:
+        chroma.update_metadatas(ids, metadatas)
+        migrated += len(ids)
+    
+    if migrated:
+        print(f"✓ Migrated metadata for {migrated} chunks")
+
+
+def backfill_lexical_index():
+    """Add chunks stored before the lexical index existed to the BM25 index"""
+    lexical_index = get_lexical_index()
+    if lexical_index is None:
+        return
+    
+    indexed = lexical_index.get_indexed_chunk_ids()
+    ids: List[str] = []
+    texts: List[str] = []
+    added = 0
+    
+    for doc in get_chroma_client().iter_documents(include=["documents"]):
+        if doc["id"] in indexed:
+            continue
+        ids.append(doc["id"])
+        texts.append(doc["text"])
+        if len(ids) >= CHROMA_PAGE_SIZE:
+            lexical_index.add(ids, texts)
+            added += len(ids)
+            ids, texts = [], []
+    
+    if ids:
+        lexical_index.add(ids, texts)
+        added += len(ids)
+    
+    if added:
+        print(f"✓ Backfilled lexical index with {added} chunks")
+
+
+def backfill_pyq_analytics():
+    """
+    Index PYQ analytics for question papers ingested before analytics were stored
+    
+    Analytics stored for documents that are not question papers (every
+    upload was analyzed by earlier versions) are dropped.
+    """
+    analytics = get_pyq_analytics()
+    indexed = analytics.get_indexed_documents()
+    for document_id, filename in indexed.items():
+        if not is_question_paper(filename):
+            analytics.remove_document(document_id)
+    
+    filenames = {
+        record["document_id"]: record["filename"]
+        for record in get_governance_panel().get_all_documents()
+        if is_question_paper(record["filename"])
+    }
+    documents = _scan_document_chunk_ids(
+        lambda document_id, _: document_id in filenames and document_id not in indexed
+    )
+    
+    def index_batch(document_ids: List[str]):
+        batch = []
+        for document_id in document_ids:
+            chunks = _load_chunks(documents[document_id])
+            if chunks:
+                batch.append((
+                    document_id,
+                    filenames[document_id],
+                    [doc["text"] for doc in chunks],
+                    [doc["metadata"] for doc in chunks]
+                ))
+        if batch:
+            analytics.index_documents(batch)
+    
+    # Several documents per call so their topic prompts run concurrently,
+    # while only one batch of documents is held in memory
+    document_ids = list(documents)
+    for start in range(0, len(document_ids), LLM_BATCH_CONCURRENCY):
+        index_batch(document_ids[start:start + LLM_BATCH_CONCURRENCY])
+    
+    if documents:
+        print(f"✓ Backfilled PYQ analytics for {len(documents)} documents")
+
+
+def _extract_stored_document(document_id: str, chunk_ids: List[str]):
+    """Load a stored document's chunks and extract their relationships"""
+    chunks = _load_chunks(chunk_ids)
+    if chunks:
+        get_knowledge_graph().index_document(
+            document_id,
+            [(doc["id"], doc["text"]) for doc in chunks]
+        )
+
+
+def backfill_knowledge_graph():
+    """Queue graph extraction for chunks that have not been extracted yet"""
+    knowledge_graph = get_knowledge_graph()
+    extracted = knowledge_graph.get_extracted_chunk_ids()
+    
+    documents = _scan_document_chunk_ids(lambda _, chunk_id: chunk_id not in extracted)
+    
+    # Queue ids only; text is loaded when the graph worker reaches the document
+    for document_id, chunk_ids in documents.items():
+        knowledge_graph.schedule(_extract_stored_document, document_id, chunk_ids)
+    
+    if documents:
+        print(f"✓ Queued knowledge graph extraction for {len(documents)} documents")
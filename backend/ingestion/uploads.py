@@ -0,0 +1,324 @@
+"""
+Upload storage
+Caps upload request bodies as they arrive and streams each uploaded file
+straight from the multipart body to disk in fixed-size chunks, hashing
+it on the way
+"""
+from typing import BinaryIO, Dict, List, Optional, Tuple
+from pathlib import Path
+import hashlib
+import uuid
+from python_multipart import MultipartParser
+from python_multipart.exceptions import FormParserError
+from python_multipart.multipart import parse_options_header
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from backend.concurrency import run_in_pool
+from backend.config import UPLOADS_DIR, UPLOAD_CHUNK_BYTES, UPLOAD_MAX_FILE_BYTES
+
+
+# Largest non-file form field (tags) accepted in an upload request
+_MAX_FIELD_BYTES = 64 * 1024
+
+
+class UploadTooLarge(RuntimeError):
+    """Raised when an upload exceeds UPLOAD_MAX_FILE_BYTES or a request body its limit"""
+
+
+class InvalidUploadForm(ValueError):
+    """Raised when an upload request is not a well-formed multipart form"""
+
+
+def format_megabytes(num_bytes: int) -> str:
+    """Size limit for messages, with one decimal place (e.g. 0.5 MB)"""
+    return f"{num_bytes / (1024 * 1024):.1f} MB"
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware that refuses upload requests over a body size limit
+    
+    Content-Length is checked up front, and the body is counted as it is
+    received, so chunked requests without a Content-Length are cut off
+    too. Multipart parsing reads through this counter, so no more than
+    the limit is ever written to disk. Once the limit is passed the request ends
+    with 413, whatever the endpoint was about to answer.
+    """
+    
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: Tuple[str, ...]):
+        """
+        Args:
+            app: Wrapped ASGI application
+            max_bytes: Largest accepted request body
+            paths: Path prefixes of upload endpoints
+        """
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("POST", "PUT")
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+        
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            await self._refuse(scope, receive, send)
+            return
+        
+        received = 0
+        exceeded = False
+        response_started = False
+        
+        async def limited_receive() -> Message:
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    exceeded = True
+                    raise UploadTooLarge(self._detail())
+            return message
+        
+        async def guarded_send(message: Message):
+            nonlocal response_started
+            # The endpoint's answer to a truncated body is replaced below
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+        
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded or response_started:
+                raise
+        
+        if exceeded and not response_started:
+            await self._refuse(scope, receive, send)
+    
+    def _detail(self) -> str:
+        return f"Request exceeds the {format_megabytes(self.max_bytes)} upload limit"
+    
+    async def _refuse(self, scope: Scope, receive: Receive, send: Send):
+        """Answer 413 without reading the rest of the body"""
+        response = JSONResponse(status_code=413, content={"detail": self._detail()})
+        await response(scope, receive, send)
+
+
+class StoredUpload:
+    """
+    A file part of an upload request, written to a temporary file in
+    UPLOADS_DIR as it arrives
+    
+    A file over UPLOAD_MAX_FILE_BYTES stops being written as soon as it
+    passes the limit; its temporary file is removed and error says why.
+    Move path to keep the file; otherwise discard() removes it.
+    """
+    
+    def __init__(self, field_name: str, filename: str):
+        self.field_name = field_name
+        self.filename = filename
+        self.path = UPLOADS_DIR / f".{uuid.uuid4().hex}.part"
+        self.size = 0
+        self.error: Optional[str] = None
+        self._digest = hashlib.sha256()
+        self._buffer = bytearray()
+        self._out: Optional[BinaryIO] = None
+    
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 hex digest of the file bytes"""
+        return self._digest.hexdigest()
+    
+    @property
+    def has_full_chunk(self) -> bool:
+        """Whether an UPLOAD_CHUNK_BYTES piece is buffered and ready to write"""
+        return len(self._buffer) >= UPLOAD_CHUNK_BYTES
+    
+    def feed(self, data: bytes):
+        """Count, hash and buffer part data (called by the multipart parser)"""
+        if self.error is not None:
+            return
+        self.size += len(data)
+        if self.size > UPLOAD_MAX_FILE_BYTES:
+            self.error = f"File exceeds the {format_megabytes(UPLOAD_MAX_FILE_BYTES)} upload limit"
+            self._buffer.clear()
+            return
+        self._digest.update(data)
+        self._buffer += data
+    
+    def write_buffer(self):
+        """Write buffered data to the temporary file (blocking)"""
+        # An oversized file is dropped when its part ends
+        if self.error is not None:
+            self.discard()
+            return
+        if self._out is None:
+            self._out = open(self.path, "wb")
+        self._out.write(self._buffer)
+        self._buffer.clear()
+    
+    def finish(self):
+        """Write the rest of the part and close the file (blocking)"""
+        self.write_buffer()
+        if self._out is not None:
+            self._out.close()
+    
+    def discard(self):
+        """Close and remove the temporary file (blocking)"""
+        if self._out is not None:
+            self._out.close()
+        self.path.unlink(missing_ok=True)
+
+
+class UploadForm:
+    """Text fields and stored files of a multipart upload request"""
+    
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.files: List[StoredUpload] = []
+    
+    def get_files(self, field_name: str) -> List[StoredUpload]:
+        """Files sent under a form field, in request order"""
+        return [upload for upload in self.files if upload.field_name == field_name]
+    
+    def discard(self):
+        """Remove every temporary file that was not moved (blocking)"""
+        for upload in self.files:
+            upload.discard()
+
+
+class _UploadFormParser:
+    """python-multipart callbacks that route file parts to StoredUpload"""
+    
+    def __init__(self, form: UploadForm, max_files: int):
+        self.form = form
+        self.max_files = max_files
+        self.header_name = b""
+        self.header_value = b""
+        self.disposition = b""
+        self.field_name = ""
+        self.field_data = bytearray()
+        self.upload: Optional[StoredUpload] = None
+        # Parts whose data arrived in the last body chunk or that just ended
+        self.touched: List[StoredUpload] = []
+        self.finished: List[StoredUpload] = []
+    
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished
+        }
+    
+    def on_part_begin(self):
+        self.disposition = b""
+        self.field_data = bytearray()
+        self.upload = None
+    
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self.header_name += data[start:end]
+    
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self.header_value += data[start:end]
+    
+    def on_header_end(self):
+        if self.header_name.lower() == b"content-disposition":
+            self.disposition = self.header_value
+        self.header_name = b""
+        self.header_value = b""
+    
+    def on_headers_finished(self):
+        _, options = parse_options_header(self.disposition)
+        if b"name" not in options:
+            raise InvalidUploadForm('Form part is missing a Content-Disposition "name"')
+        self.field_name = _decode(options[b"name"])
+        if b"filename" in options:
+            if len(self.form.files) >= self.max_files:
+                raise InvalidUploadForm(f"Too many files. At most {self.max_files} per request")
+            self.upload = StoredUpload(self.field_name, _decode(options[b"filename"]))
+            self.form.files.append(self.upload)
+    
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self.upload is not None:
+            self.upload.feed(data[start:end])
+            if not self.touched or self.touched[-1] is not self.upload:
+                self.touched.append(self.upload)
+            return
+        self.field_data += data[start:end]
+        if len(self.field_data) > _MAX_FIELD_BYTES:
+            raise InvalidUploadForm(f"Form field {self.field_name} is too large")
+    
+    def on_part_end(self):
+        if self.upload is not None:
+            self.finished.append(self.upload)
+        else:
+            self.form.fields[self.field_name] = _decode(bytes(self.field_data))
+
+
+def _decode(value: bytes) -> str:
+    try:
+        return value.decode("utf-8")
+    except UnicodeDecodeError:
+        return value.decode("latin-1")
+
+
+async def receive_upload_form(request: Request, max_files: int) -> UploadForm:
+    """
+    Read a multipart upload request, writing each file part to disk as it arrives
+    
+    File data goes from the request body to the file's temporary path in
+    UPLOADS_DIR in UPLOAD_CHUNK_BYTES pieces, hashed on the way, so it is
+    written to disk once and never held in memory whole. Each file is
+    checked against UPLOAD_MAX_FILE_BYTES while it is read (see
+    StoredUpload.error); the request as a whole is capped by
+    UploadSizeLimitMiddleware. If reading fails, no files are left behind.
+    
+    Args:
+        request: Incoming multipart/form-data request
+        max_files: Largest number of file parts accepted
+    
+    Returns:
+        The form's text fields and stored files
+    
+    Raises:
+        InvalidUploadForm: The body is not valid multipart/form-data or
+            has more than max_files files
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise InvalidUploadForm("Expected a multipart/form-data upload")
+    
+    form = UploadForm()
+    handler = _UploadFormParser(form, max_files)
+    try:
+        parser = MultipartParser(params[b"boundary"], handler.callbacks())
+        async for chunk in request.stream():
+            parser.write(chunk)
+            # Disk writes run in the io pool, in arrival order
+            for upload in handler.touched:
+                if upload.has_full_chunk:
+                    await run_in_pool("io", upload.write_buffer)
+            for upload in handler.finished:
+                await run_in_pool("io", upload.finish)
+            handler.touched.clear()
+            handler.finished.clear()
+        parser.finalize()
+    except FormParserError:
+        await run_in_pool("io", form.discard)
+        raise InvalidUploadForm("Invalid multipart data")
+    except BaseException:
+        await run_in_pool("io", form.discard)
+        raise
+    return form
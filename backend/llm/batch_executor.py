@@ -0,0 +1,131 @@
+"""
+Concurrent, batched LLM execution
+Runs many prompts against Ollama with bounded concurrency, timeouts and retries
+"""
+from typing import List, Optional, Sequence
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+from backend.config import (
+    LLM_BATCH_CONCURRENCY,
+    LLM_BATCH_TIMEOUT,
+    LLM_BATCH_MAX_RETRIES,
+    LLM_BATCH_BACKOFF_SECONDS
+)
+from backend.llm.ollama_client import get_ollama_client
+
+
+class LLMBatchExecutor:
+    """Executes batches of prompts with several requests in flight"""
+    
+    def __init__(
+        self,
+        max_concurrency: int = LLM_BATCH_CONCURRENCY,
+        timeout: float = LLM_BATCH_TIMEOUT,
+        max_retries: int = LLM_BATCH_MAX_RETRIES,
+        backoff_seconds: float = LLM_BATCH_BACKOFF_SECONDS
+    ):
+        """
+        Initialize executor
+        
+        Args:
+            max_concurrency: Maximum requests in flight to Ollama
+            timeout: Per-request timeout in seconds
+            max_retries: Retries after the first failed attempt
+            backoff_seconds: Delay before the first retry; doubles each retry
+        """
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="campusnexus-llm-batch"
+        )
+    
+    def run(
+        self,
+        prompts: Sequence[str],
+        response_format: Optional[str] = None
+    ) -> List[Optional[str]]:
+        """
+        Run prompts concurrently
+        
+        Args:
+            prompts: Prompts to send
+            response_format: Optional Ollama output format, e.g. "json"
+            
+        Returns:
+            Responses in prompt order; None where all attempts failed
+        """
+        futures = [
+            self._pool.submit(self._generate_with_retry, prompt, response_format)
+            for prompt in prompts
+        ]
+        return [future.result() for future in futures]
+    
+    def _generate_with_retry(self, prompt: str, response_format: Optional[str]) -> Optional[str]:
+        """Generate one response, retrying with exponential backoff"""
+        ollama_client = get_ollama_client()
+        delay = self.backoff_seconds
+        
+        for attempt in range(self.max_retries + 1):
+            try:
+                return ollama_client.generate_direct(
+                    prompt,
+                    timeout=self.timeout,
+                    response_format=response_format
+                )
+            except Exception as e:
+                if attempt == self.max_retries:
+                    print(f"LLM request failed after {attempt + 1} attempts: {str(e)}")
+                    return None
+                time.sleep(delay)
+                delay *= 2
+        return None
+    
+    @staticmethod
+    def pack(texts: Sequence[str], max_items: int, max_chars: int) -> List[List[int]]:
+        """
+        Group texts so several can share one prompt
+        
+        Args:
+            texts: Texts to pack
+            max_items: Maximum texts per group
+            max_chars: Maximum total characters per group
+            
+        Returns:
+            Groups of indices into texts, in order
+        """
+        groups: List[List[int]] = []
+        current: List[int] = []
+        current_chars = 0
+        
+        for i, text in enumerate(texts):
+            if current and (len(current) >= max_items or current_chars + len(text) > max_chars):
+                groups.append(current)
+                current, current_chars = [], 0
+            current.append(i)
+            current_chars += len(text)
+        
+        if current:
+            groups.append(current)
+        return groups
+    
+    def shutdown(self):
+        """Stop accepting work"""
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+# Global instance
+_batch_executor: Optional[LLMBatchExecutor] = None
+_batch_executor_lock = threading.Lock()
+
+
+def get_llm_batch_executor() -> LLMBatchExecutor:
+    """Get or create global LLM batch executor"""
+    global _batch_executor
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = LLMBatchExecutor()
+        return _batch_executor
@@ -0,0 +1,116 @@
+"""
+Persistent content-addressed embedding cache
+Stores float32 vectors keyed by (model name, normalized text hash) in SQLite
+"""
+from typing import List, Optional, Dict, Any
+from pathlib import Path
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+
+
+class EmbeddingCache:
+    """On-disk embedding cache shared across uploads and processes"""
+    
+    def __init__(self, model_name: str, cache_path: Path):
+        """
+        Initialize cache
+        
+        Args:
+            model_name: Embedding model name; part of every key
+            cache_path: SQLite database file
+        """
+        self.model_name = model_name
+        self.cache_path = cache_path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(cache_path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, "
+            "vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+    
+    @staticmethod
+    def normalize_text(text: str) -> str:
+        """
+        Normalize text before hashing
+        
+        Only whitespace is collapsed: the tokenizer ignores it, so texts that
+        differ only in whitespace produce identical embeddings.
+        """
+        return " ".join(text.split())
+    
+    def make_key(self, text: str) -> str:
+        """Build the cache key for a text"""
+        payload = f"{self.model_name}\0{self.normalize_text(text)}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Look up cached vectors
+        
+        Args:
+            keys: Cache keys from make_key
+            
+        Returns:
+            Mapping of found keys to embedding vectors
+        """
+        found: Dict[str, List[float]] = {}
+        unique_keys = list(dict.fromkeys(keys))
+        
+        with self._lock:
+            for start in range(0, len(unique_keys), _LOOKUP_BATCH_SIZE):
+                batch = unique_keys[start:start + _LOOKUP_BATCH_SIZE]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+            
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        
+        return found
+    
+    def put_many(self, keys: List[str], vectors: List[List[float]]):
+        """
+        Store vectors
+        
+        Args:
+            keys: Cache keys from make_key
+            vectors: Embedding vectors, stored as float32
+        """
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in zip(keys, vectors)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
+            self._conn.commit()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and size"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
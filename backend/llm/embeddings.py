@@ -2,9 +2,15 @@
 Local embeddings using SentenceTransformers
 No API calls - fully offline
 """
-from typing import List, Union
+from typing import List, Union, Optional, Dict, Any
 from sentence_transformers import SentenceTransformer
-from backend.config import EMBEDDING_MODEL, EMBEDDING_DEVICE
+from backend.config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_DEVICE,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH
+)
+from backend.llm.embedding_cache import EmbeddingCache
 
 
 class LocalEmbeddings:
@@ -14,6 +20,7 @@ class LocalEmbeddings:
         self.model_name = EMBEDDING_MODEL
         self.device = EMBEDDING_DEVICE
         self.model: SentenceTransformer = None
+        self.cache: Optional[EmbeddingCache] = None
         self._initialize()
     
     def _initialize(self):
@@ -28,6 +35,14 @@ class LocalEmbeddings:
         except Exception as e:
             print(f"✗ Failed to load embedding model: {str(e)}")
             raise
+        
+        if EMBEDDING_CACHE_ENABLED:
+            try:
+                self.cache = EmbeddingCache(self.model_name, EMBEDDING_CACHE_PATH)
+                print(f"✓ Embedding cache ready at {EMBEDDING_CACHE_PATH}")
+            except Exception as e:
+                # The cache is an optimization; run without it
+                print(f"✗ Embedding cache unavailable: {str(e)}")
     
     def embed_text(self, text: str) -> List[float]:
         """
@@ -49,6 +64,9 @@ class LocalEmbeddings:
         """
         Embed multiple texts in batch
         
+        Texts already in the embedding cache are not re-encoded; only
+        cache misses go through the model.
+        
         Args:
             texts: List of input texts
             batch_size: Batch size for encoding
@@ -59,6 +77,31 @@ class LocalEmbeddings:
         if not self.model:
             raise RuntimeError("Embedding model not initialized")
         
+        if not self.cache:
+            return self._encode(texts, batch_size)
+        
+        keys = [self.cache.make_key(text) for text in texts]
+        cached = self.cache.get_many(keys)
+        
+        # Encode each distinct missing text once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            missing_keys = list(missing.keys())
+            vectors = self._encode([missing[key] for key in missing_keys], batch_size)
+            self.cache.put_many(missing_keys, vectors)
+            cached.update(zip(missing_keys, vectors))
+        
+        return [cached[key] for key in keys]
+    
+    def _encode(self, texts: List[str], batch_size: int = 32) -> List[List[float]]:
+        """Encode texts with the model, bypassing the cache"""
+        if not texts:
+            return []
+        
         embeddings = self.model.encode(
             texts,
             batch_size=batch_size,
@@ -80,6 +123,12 @@ class LocalEmbeddings:
         """
         return self.embed_text(query)
     
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get embedding cache hit/miss counters"""
+        if not self.cache:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.get_stats()}
+    
     def get_embedding_dimension(self) -> int:
         """Get the dimension of embeddings"""
         if not self.model:
@@ -3,7 +3,7 @@ Ollama LLM client for local inference
 No API keys required - fully local
 """
 import requests
-from typing import Optional
+from typing import Optional, Iterator
 from langchain_community.llms import Ollama
 from backend.config import OLLAMA_BASE_URL, OLLAMA_MODEL, OLLAMA_TIMEOUT
 
@@ -95,6 +95,62 @@ class OllamaClient:
         except Exception as e:
             raise RuntimeError(f"Ollama generation failed: {str(e)}")
     
+    def generate_direct(
+        self,
+        prompt: str,
+        timeout: Optional[float] = None,
+        response_format: Optional[str] = None
+    ) -> str:
+        """
+        Generate text with a direct call to Ollama's /api/generate
+        
+        Unlike generate(), this supports a per-request timeout and
+        Ollama's structured output mode.
+        
+        Args:
+            prompt: Input prompt
+            timeout: Request timeout in seconds (defaults to OLLAMA_TIMEOUT)
+            response_format: Optional Ollama output format, e.g. "json"
+            
+        Returns:
+            Generated text
+        """
+        payload = {"model": self.model, "prompt": prompt, "stream": False}
+        if response_format:
+            payload["format"] = response_format
+        
+        try:
+            response = requests.post(
+                f"{self.base_url}/api/generate",
+                json=payload,
+                timeout=timeout or self.timeout
+            )
+            response.raise_for_status()
+            return response.json().get("response", "")
+        except Exception as e:
+            raise RuntimeError(f"Ollama generation failed: {str(e)}")
+    
+    def stream(self, prompt: str, **kwargs) -> Iterator[str]:
+        """
+        Stream generated text from Ollama as tokens are produced
+        
+        Args:
+            prompt: Input prompt
+            **kwargs: Additional parameters for generation
+            
+        Yields:
+            Text fragments in the order Ollama emits them
+        """
+        if not self.llm:
+            raise RuntimeError("Ollama client not initialized")
+        
+        try:
+            for fragment in self.llm.stream(prompt, **kwargs):
+                if fragment:
+                    yield fragment
+        except Exception as e:
+            raise RuntimeError(f"Ollama streaming failed: {str(e)}")
+    
     def get_status(self) -> dict:
         """Get current status of Ollama connection"""
         return {
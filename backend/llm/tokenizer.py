@@ -0,0 +1,132 @@
+"""
+Token counting for the generation model
+Counts Mistral tokens with its tokenizer loaded offline, or estimates
+them from text length when the tokenizer is not available locally
+"""
+from typing import Optional
+from collections import OrderedDict
+from pathlib import Path
+import math
+import threading
+from transformers import AutoTokenizer
+from backend.config import MISTRAL_TOKENIZER, CONTEXT_CHARS_PER_TOKEN
+
+
+# Chunk texts recur across queries, so recent counts are memoized
+_COUNT_CACHE_SIZE = 4096
+
+# The estimate warning is printed once per process, not per counter
+_fallback_warned = False
+
+
+class TokenCounter:
+    """Counts prompt tokens the way the generation model will"""
+    
+    def __init__(self, tokenizer_name: str = str(MISTRAL_TOKENIZER)):
+        self.tokenizer_name = tokenizer_name
+        self.tokenizer = None
+        try:
+            # Never download: the app runs offline, so only tokenizer files
+            # already on disk (or in the local Hugging Face cache) are used
+            self.tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, local_files_only=True)
+            print(f"✓ Token counting with {tokenizer_name}")
+        except Exception as e:
+            _warn_fallback(tokenizer_name, e)
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, int]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    @property
+    def exact(self) -> bool:
+        """Whether counts come from the real tokenizer"""
+        return self.tokenizer is not None
+    
+    def count(self, text: str) -> int:
+        """
+        Count tokens in a text
+        
+        Args:
+            text: Input text
+        
+        Returns:
+            Token count, excluding special tokens
+        """
+        if not text:
+            return 0
+        
+        with self._cache_lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                return cached
+        
+        count = self._count(text)
+        with self._cache_lock:
+            self._cache[text] = count
+            while len(self._cache) > _COUNT_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return count
+    
+    def _count(self, text: str) -> int:
+        """Count tokens without the memo"""
+        if self.tokenizer is None:
+            return math.ceil(len(text) / CONTEXT_CHARS_PER_TOKEN)
+        with self._lock:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """
+        Cut text to at most max_tokens tokens, at a word boundary when possible
+        
+        Args:
+            text: Input text
+            max_tokens: Token limit
+        
+        Returns:
+            Prefix of text within the limit
+        """
+        if self.count(text) <= max_tokens:
+            return text
+        
+        # Longest prefix within the limit, by binary search on its length
+        low, high = 0, len(text)
+        while low < high:
+            middle = (low + high + 1) // 2
+            if self._count(text[:middle]) <= max_tokens:
+                low = middle
+            else:
+                high = middle - 1
+        
+        cut = text.rfind(" ", 0, low)
+        return text[:cut if cut > 0 else low].rstrip()
+
+
+def _warn_fallback(tokenizer_name: str, error: Exception):
+    """Report once that token budgets are estimated, and how to fix it"""
+    global _fallback_warned
+    if _fallback_warned:
+        return
+    _fallback_warned = True
+    print("=" * 70)
+    print(f"⚠️  WARNING: Mistral tokenizer not found at {tokenizer_name}")
+    if Path(tokenizer_name).exists():
+        print(f"   ({str(error).splitlines()[0] if str(error) else type(error).__name__})")
+    print(f"   Context budgets are ESTIMATED at {CONTEXT_CHARS_PER_TOKEN} characters per token,")
+    print("   so prompts may be over- or under-filled.")
+    print("   Download the tokenizer files as described in README.md")
+    print("   (\"Mistral Tokenizer\") or point MISTRAL_TOKENIZER at a local copy.")
+    print("=" * 70)
+
+
+# Global instance
+_token_counter: Optional[TokenCounter] = None
+_token_counter_lock = threading.Lock()
+
+
+def get_token_counter() -> TokenCounter:
+    """Get or create global token counter"""
+    global _token_counter
+    with _token_counter_lock:
+        if _token_counter is None:
+            _token_counter = TokenCounter()
+        return _token_counter
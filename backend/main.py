@@ -3,26 +3,35 @@ CampusNexus AI - Main FastAPI Application
 Fully local, offline AI-powered knowledge search system
 No API keys required
 """
-from fastapi import FastAPI, UploadFile, File, HTTPException, Form
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pathlib import Path
+import json
 import time
 import uuid
-from typing import Dict
+from contextlib import aclosing
+from typing import Dict, List, Optional
 
 from backend.config import (
     API_HOST,
     API_PORT,
     CORS_ORIGINS,
     UPLOADS_DIR,
-    SUPPORTED_EXTENSIONS
+    SUPPORTED_EXTENSIONS,
+    UPLOAD_MAX_REQUEST_BYTES,
+    UPLOAD_MAX_FILES,
+    MAX_CONTEXT_TOKENS,
+    KNOWLEDGE_GRAPH_DEFAULT_TOP_N,
+    RETRIEVAL_APPROVED_ONLY
 )
+from backend.concurrency import run_in_pool, iterate_in_pool, shutdown_pools
 from backend.models import (
     ChatQuery,
     ChatResponse,
     UploadResponse,
+    IngestionJobStatus,
     DocumentMetadata,
     HealthCheck,
     PYQAnalyticsResponse,
@@ -32,15 +41,39 @@ from backend.models import (
 )
 from backend.llm.ollama_client import get_ollama_client
 from backend.llm.embeddings import get_embedding_model
+from backend.llm.batch_executor import get_llm_batch_executor
+from backend.llm.tokenizer import get_token_counter
 from backend.vector_store.chroma_client import get_chroma_client
+from backend.vector_store.lexical_index import get_lexical_index
 from backend.rag.retriever import get_retriever
+from backend.rag.reranker import get_reranker
+from backend.rag.filters import build_metadata_filter, normalize_tag
+from backend.rag.query_cache import get_query_cache
+from backend.rag.answer_cache import get_answer_cache
 from backend.rag.generator import get_generator
-from backend.processors.pdf_processor import get_pdf_processor
-from backend.processors.docx_processor import get_docx_processor
-from backend.processors.pptx_processor import get_pptx_processor
+from backend.ingestion.jobs import get_job_manager, IngestionQueueFull
+from backend.ingestion.uploads import (
+    receive_upload_form,
+    UploadForm,
+    StoredUpload,
+    InvalidUploadForm,
+    UploadTooLarge,
+    UploadSizeLimitMiddleware
+)
+from backend.ingestion.pipeline import (
+    delete_document,
+    sync_document_status,
+    migrate_chunk_metadata,
+    backfill_lexical_index,
+    backfill_pyq_analytics,
+    backfill_knowledge_graph
+)
+from backend.processors.pdf_processor import shutdown_extract_pool
+from backend.processors.chunking import get_chunking_stats
 from backend.features.pyq_analytics import get_pyq_analytics
 from backend.features.knowledge_graph import get_knowledge_graph
 from backend.features.governance import get_governance_panel
+from backend.features.query_log import get_query_log_writer
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -49,6 +82,15 @@ app = FastAPI(
     version="1.0.0"
 )
 
+# Upload request bodies are counted as they arrive and cut off at the limit.
+# Middleware added later wraps earlier middleware, so this is added before
+# CORS and its 413 still gets the CORS headers
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=UPLOAD_MAX_REQUEST_BYTES,
+    paths=("/upload", "/documents/")
+)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -76,12 +118,21 @@ async def startup_event():
         ollama = get_ollama_client()
         embeddings = get_embedding_model()
         chroma = get_chroma_client()
+        get_reranker()
+        get_token_counter()
+        
+        # Bring chunks stored by earlier versions up to date: governance
+        # status in metadata, the lexical index and precomputed analytics
+        get_job_manager().submit_task(migrate_chunk_metadata)
+        get_job_manager().submit_task(backfill_lexical_index)
+        get_job_manager().submit_task(backfill_pyq_analytics)
+        get_job_manager().submit_task(backfill_knowledge_graph)
         
         print("\n✅ All services initialized successfully!")
         print(f"📊 Documents in database: {chroma.get_document_count()}")
         print(f"🌐 Server running at http://{API_HOST}:{API_PORT}")
         print("=" * 60)
-        
+    
     except Exception as e:
         print(f"\n❌ Initialization failed: {str(e)}")
         print("\n⚠️  Make sure Ollama is running and Mistral model is available:")
@@ -90,6 +141,18 @@ async def startup_event():
         print("=" * 60)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release worker pools on shutdown"""
+    get_query_log_writer().close()
+    get_job_manager().shutdown()
+    get_knowledge_graph().shutdown()
+    get_pyq_analytics().shutdown()
+    get_llm_batch_executor().shutdown()
+    shutdown_extract_pool()
+    shutdown_pools(wait=False)
+
+
 @app.get("/")
 async def root():
     """Serve the frontend"""
@@ -103,11 +166,14 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     try:
-        ollama = get_ollama_client()
+        ollama = await run_in_pool("io", get_ollama_client)
         chroma = get_chroma_client()
         
-        ollama_status = "connected" if ollama.check_health() else "disconnected"
-        chroma_status = "connected" if chroma.check_health() else "disconnected"
+        ollama_healthy = await run_in_pool("io", ollama.check_health)
+        chroma_healthy = await run_in_pool("io", chroma.check_health)
+        
+        ollama_status = "connected" if ollama_healthy else "disconnected"
+        chroma_status = "connected" if chroma_healthy else "disconnected"
         
         overall_status = "healthy" if (ollama_status == "connected" and chroma_status == "connected") else "degraded"
         
@@ -120,93 +186,340 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/upload", response_model=UploadResponse)
-async def upload_document(file: UploadFile = File(...)):
-    """Upload and process a document"""
+def _upload_tags(course: Optional[str], department: Optional[str]) -> Dict[str, str]:
+    """Normalized course/department tags for chunk metadata"""
+    tags = {"course": normalize_tag(course), "department": normalize_tag(department)}
+    return {key: value for key, value in tags.items() if value}
+
+
+def _upload_form_openapi(file_field: str, multiple: bool = False) -> Dict:
+    """OpenAPI request body for upload endpoints, which read their form themselves"""
+    file_schema = {"type": "string", "format": "binary"}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [file_field],
+                        "properties": {
+                            file_field: {"type": "array", "items": file_schema} if multiple else file_schema,
+                            "course": {"type": "string"},
+                            "department": {"type": "string"}
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+
+async def _receive_upload_form(request: Request, file_field: str, max_files: int) -> UploadForm:
+    """
+    Read an upload request, streaming its files to disk
+    
+    Answers 400 when the form is malformed, has too many files or has
+    none under file_field. The caller discards the form's files.
+    """
     try:
-        # Validate file type
-        file_ext = Path(file.filename).suffix.lower()
-        if file_ext not in SUPPORTED_EXTENSIONS:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file type. Supported: {SUPPORTED_EXTENSIONS}"
-            )
-        
-        # Save file
-        document_id = str(uuid.uuid4())
-        file_path = UPLOADS_DIR / f"{document_id}_{file.filename}"
-        
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+        form = await receive_upload_form(request, max_files)
+    except InvalidUploadForm as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not form.get_files(file_field):
+        await run_in_pool("io", form.discard)
+        raise HTTPException(status_code=400, detail=f"No file uploaded in form field '{file_field}'")
+    return form
+
+
+async def _queue_upload(
+    upload: StoredUpload,
+    tags: Optional[Dict[str, str]] = None,
+    replaces: Optional[Dict] = None
+) -> UploadResponse:
+    """
+    Validate a stored upload, then queue it for background ingestion
+    
+    The file was streamed to a temporary path while the request was read
+    (see receive_upload_form) and is moved into place, not copied. A file
+    identical to a stored or in-progress upload is not processed again;
+    the existing document is returned. Pass the governance record as
+    replaces to upload a new version of an existing document. The
+    caller's UploadForm.discard() removes the file when it is not queued.
+    """
+    # Validate file type
+    file_ext = Path(upload.filename).suffix.lower()
+    if file_ext not in SUPPORTED_EXTENSIONS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file type. Supported: {SUPPORTED_EXTENSIONS}"
+        )
+    
+    if upload.error is not None:
+        raise UploadTooLarge(upload.error)
+    
+    # The document id is only known once the hash has been checked for
+    # duplicates, so the file stays at its temporary path until then
+    content_hash = upload.content_hash
+    file_path: Optional[Path] = None
+    queued = False
+    try:
+        metadata = DocumentMetadata(
+            filename=upload.filename,
+            file_type=file_ext[1:],
+            **(tags or {})
+        )
         
-        # Process based on file type
-        if file_ext == ".pdf":
-            processor = get_pdf_processor()
-        elif file_ext == ".docx":
-            processor = get_docx_processor()
-        elif file_ext == ".pptx":
-            processor = get_pptx_processor()
+        if replaces is not None:
+            if replaces.get("content_hash") == content_hash:
+                return UploadResponse(
+                    success=True,
+                    message="Document is unchanged",
+                    document_id=replaces["document_id"],
+                    status="unchanged",
+                    metadata=metadata
+                )
         else:
-            raise HTTPException(status_code=400, detail="Unsupported file type")
+            duplicate = await _find_duplicate_upload(content_hash)
+            if duplicate is not None:
+                duplicate.metadata = metadata
+                return duplicate
         
-        result = processor.process(file_path)
-        chunks = result["chunks"]
-        metadatas = result["metadatas"]
-        
-        # Generate embeddings
-        embeddings_model = get_embedding_model()
-        embeddings = embeddings_model.embed_batch(chunks)
-        
-        # Store in ChromaDB
-        chroma = get_chroma_client()
-        chunk_ids = [f"{document_id}_{i}" for i in range(len(chunks))]
-        chroma.add_documents(
-            texts=chunks,
-            embeddings=embeddings,
-            metadatas=metadatas,
-            ids=chunk_ids
-        )
+        # Save file
+        document_id = replaces["document_id"] if replaces else str(uuid.uuid4())
+        file_path = UPLOADS_DIR / f"{document_id}_{upload.filename}"
+        await run_in_pool("io", upload.path.replace, file_path)
         
-        # Register in governance
-        governance = get_governance_panel()
-        governance.register_document(
+        # Queue parse -> chunk -> embed -> store. Identical uploads that
+        # race each other get the job of whichever was queued first
+        job = get_job_manager().submit(
             document_id=document_id,
-            filename=file.filename,
-            file_type=file_ext[1:]  # Remove dot
+            filename=upload.filename,
+            file_path=file_path,
+            file_ext=file_ext,
+            tags=tags,
+            content_hash=content_hash,
+            skip_duplicates=replaces is None
         )
-        
+        if job.document_id != document_id:
+            await run_in_pool("io", get_governance_panel().record_duplicate_upload)
+            return UploadResponse(
+                success=True,
+                message="Identical document is already being processed",
+                document_id=job.document_id,
+                job_id=job.job_id,
+                status=job.status,
+                metadata=metadata
+            )
+        queued = True
+    finally:
+        # The stored version of a replaced document keeps its file
+        if not queued and file_path is not None and str(file_path) != (replaces or {}).get("file_path"):
+            file_path.unlink(missing_ok=True)
+    
+    return UploadResponse(
+        success=True,
+        message="Document queued for processing",
+        document_id=document_id,
+        job_id=job.job_id,
+        status=job.status,
+        metadata=metadata
+    )
+
+
+async def _find_duplicate_upload(content_hash: str) -> Optional[UploadResponse]:
+    """
+    Response pointing at a stored document with identical file bytes, if any
+    
+    Uploads still being processed are matched when the job is submitted
+    (IngestionJobManager.submit with skip_duplicates).
+    """
+    governance = get_governance_panel()
+    record = await run_in_pool("io", governance.find_document_by_content_hash, content_hash)
+    if record is not None:
+        await run_in_pool("io", governance.record_duplicate_upload)
         return UploadResponse(
             success=True,
-            message="Document processed and indexed successfully",
-            document_id=document_id,
-            metadata=DocumentMetadata(
-                filename=file.filename,
-                file_type=file_ext[1:],
-                total_pages=result.get("total_pages"),
-                total_chunks=result["total_chunks"]
-            )
+            message="Identical document already uploaded",
+            document_id=record["document_id"],
+            status="duplicate"
         )
+    return None
+
+
+@app.post("/upload", response_model=UploadResponse, openapi_extra=_upload_form_openapi("file"))
+async def upload_document(request: Request):
+    """
+    Upload a document and queue it for background processing
+    
+    Multipart form with a file field. Returns immediately with a job id;
+    poll /jobs/{job_id} for progress. Optional course/department fields
+    are tags that can be used as chat filters.
+    """
+    form = await _receive_upload_form(request, "file", max_files=1)
+    try:
+        tags = _upload_tags(form.fields.get("course"), form.fields.get("department"))
+        return await _queue_upload(form.get_files("file")[0], tags)
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await run_in_pool("io", form.discard)
+
+
+@app.post(
+    "/upload/batch",
+    response_model=List[UploadResponse],
+    openapi_extra=_upload_form_openapi("files", multiple=True)
+)
+async def upload_documents(request: Request):
+    """
+    Upload several documents at once
+    
+    Each file becomes its own ingestion job; jobs run concurrently up to
+    MAX_CONCURRENT_INGESTION_JOBS and share the PDF extraction process pool.
+    The course/department tags apply to every file; each file is
+    streamed to disk as it arrives and checked against the per-file
+    limit while it is read.
+    
+    Returns one result per file, in order. A file that cannot be queued
+    (unsupported, too large, queue full) gets success=False and the reason
+    in message; the other files are still queued.
+    """
+    form = await _receive_upload_form(request, "files", max_files=UPLOAD_MAX_FILES)
+    try:
+        tags = _upload_tags(form.fields.get("course"), form.fields.get("department"))
+        return [await _queue_batch_file(upload, tags) for upload in form.get_files("files")]
+    finally:
+        await run_in_pool("io", form.discard)
+
+
+async def _queue_batch_file(upload: StoredUpload, tags: Dict[str, str]) -> UploadResponse:
+    """Queue one file of a batch upload, reporting failure in the result"""
+    try:
+        return await _queue_upload(upload, tags)
+    except HTTPException as e:
+        reason = str(e.detail)
+    except Exception as e:
+        reason = str(e)
+    
+    return UploadResponse(
+        success=False,
+        message=reason,
+        status="failed",
+        metadata=DocumentMetadata(
+            filename=upload.filename,
+            file_type=Path(upload.filename).suffix.lower()[1:],
+            **tags
+        )
+    )
+
+
+@app.put("/documents/{document_id}", response_model=UploadResponse, openapi_extra=_upload_form_openapi("file"))
+async def reindex_document(document_id: str, request: Request):
+    """
+    Replace a document with a new version
+    
+    Runs as an ingestion job; only chunks whose content changed are
+    re-embedded, and chunks the new version no longer has are removed.
+    The document returns to pending approval. Tags not given are kept.
+    """
+    form = await _receive_upload_form(request, "file", max_files=1)
+    try:
+        record = await run_in_pool("io", get_governance_panel().get_document, document_id)
+        if record is None:
+            raise HTTPException(status_code=404, detail="Document not found")
         
+        tags = _upload_tags(
+            form.fields.get("course", record.get("course")),
+            form.fields.get("department", record.get("department"))
+        )
+        return await _queue_upload(form.get_files("file")[0], tags, replaces=record)
+    except HTTPException:
+        raise
+    except UploadTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except IngestionQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await run_in_pool("io", form.discard)
+
+
+@app.delete("/documents/{document_id}")
+async def remove_document(document_id: str):
+    """Delete a document's chunks, analytics, graph relations, record and file"""
+    try:
+        deleted = await run_in_pool("io", delete_document, document_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Document not found")
+        return {"success": True, "message": "Document deleted successfully"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/jobs/{job_id}", response_model=IngestionJobStatus)
+async def get_job_status(job_id: str):
+    """Get progress of a background ingestion job"""
+    job = get_job_manager().get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestionJobStatus(**job.to_dict())
+
+
+async def _build_chat_filter(query: ChatQuery) -> Optional[Dict]:
+    """Translate ChatQuery filters into a Chroma where clause"""
+    if query.filters is None:
+        return None
+    # Retrieval is restricted to approved documents, so any other status
+    # filter could never match
+    if RETRIEVAL_APPROVED_ONLY and query.filters.status not in (None, "approved"):
+        raise HTTPException(
+            status_code=400,
+            detail="Only approved documents are searchable; status filter must be 'approved'"
+        )
+    try:
+        return build_metadata_filter(**query.filters.model_dump(exclude_none=True))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+async def _embed_chat_query(query: str, timings: Dict[str, float]) -> List[float]:
+    """Embed a chat query once, for both retrieval and the answer cache"""
+    stage_start = time.time()
+    query_embedding = await run_in_pool("embedding", get_retriever().embed_query, query)
+    timings["embedding"] = time.time() - stage_start
+    return query_embedding
 
 
 @app.post("/chat", response_model=ChatResponse)
 async def chat(query: ChatQuery):
     """Chat with RAG system"""
+    start_time = time.time()
+    filter_metadata = await _build_chat_filter(query)
     try:
-        start_time = time.time()
-        
-        # Log query
-        governance = get_governance_panel()
-        governance.log_query(query.query)
-        
         # Retrieve relevant documents
         retriever = get_retriever()
-        retrieved_docs = retriever.retrieve(
+        timings: Dict[str, float] = {}
+        query_embedding = await _embed_chat_query(query.query, timings)
+        retrieved_docs = await run_in_pool(
+            "embedding",
+            retriever.retrieve,
             query=query.query,
-            top_k=query.top_k
+            top_k=query.top_k,
+            filter_metadata=filter_metadata,
+            lexical_weight=query.lexical_weight,
+            rerank=query.rerank,
+            timings=timings,
+            query_embedding=query_embedding
         )
         
         if not retrieved_docs:
@@ -215,87 +528,201 @@ async def chat(query: ChatQuery):
                 sources=[],
                 confidence_score=0.0,
                 language=query.language,
-                processing_time=time.time() - start_time
+                processing_time=time.time() - start_time,
+                timings=timings
             )
         
-        # Build context
-        context = retriever.build_context(retrieved_docs)
+        # Build context (tokenizes every candidate, so off the event loop)
+        context = await run_in_pool(
+            "embedding",
+            retriever.build_context,
+            retrieved_docs,
+            max_tokens=MAX_CONTEXT_TOKENS
+        )
         
-        # Generate answer
-        generator = get_generator()
-        result = generator.generate_answer(
+        # Generate answer (or reuse one for a near-duplicate question)
+        generation_start = time.time()
+        generator = await run_in_pool("llm", get_generator)
+        result = await run_in_pool(
+            "llm",
+            generator.generate_answer,
             query=query.query,
             context=context,
             language=query.language,
-            retrieved_docs=retrieved_docs
+            retrieved_docs=retrieved_docs,
+            query_embedding=query_embedding
         )
         
         # Format response
         processing_time = time.time() - start_time
+        timings["generation"] = time.time() - generation_start
         
         return ChatResponse(
             answer=result["answer"],
             sources=result["sources"] if query.include_sources else [],
             confidence_score=result["confidence_score"],
             language=result["language"],
-            processing_time=processing_time
+            processing_time=processing_time,
+            cached=result.get("cached", False),
+            timings=timings
         )
-        
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        # Buffered; written to governance by a background thread
+        get_query_log_writer().log(query.query, latency_ms=(time.time() - start_time) * 1000)
+
+
+@app.post("/chat/stream")
+async def chat_stream(query: ChatQuery, request: Request):
+    """
+    Chat with RAG system, streaming the answer as NDJSON frames
+    
+    Frames are emitted in order: "sources" (before the first token),
+    "token" for every fragment produced by Ollama, then "done" with the
+    confidence score and timings. Failures mid-stream produce an "error" frame.
+    Generation stops when the client disconnects.
+    """
+    start_time = time.time()
+    filter_metadata = await _build_chat_filter(query)
+    try:
+        # Retrieve relevant documents
+        retriever = get_retriever()
+        timings: Dict[str, float] = {}
+        query_embedding = await _embed_chat_query(query.query, timings)
+        retrieved_docs = await run_in_pool(
+            "embedding",
+            retriever.retrieve,
+            query=query.query,
+            top_k=query.top_k,
+            filter_metadata=filter_metadata,
+            lexical_weight=query.lexical_weight,
+            rerank=query.rerank,
+            timings=timings,
+            query_embedding=query_embedding
+        )
+        retrieval_time = time.time() - start_time
+        
+        context = await run_in_pool(
+            "embedding",
+            retriever.build_context,
+            retrieved_docs,
+            max_tokens=MAX_CONTEXT_TOKENS
+        ) if retrieved_docs else ""
+        generator = await run_in_pool("llm", get_generator)
+    
     except Exception as e:
+        get_query_log_writer().log(query.query, latency_ms=(time.time() - start_time) * 1000)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    async def event_stream():
+        first_token_time = None
+        
+        try:
+            if not retrieved_docs:
+                stream = iter([
+                    {"type": "sources", "sources": []},
+                    {
+                        "type": "token",
+                        "content": "I couldn't find any relevant information in the knowledge base. Please upload documents first."
+                    },
+                    {"type": "done", "confidence_score": 0.0, "language": query.language}
+                ])
+            else:
+                stream = generator.stream_answer(
+                    query=query.query,
+                    context=context,
+                    language=query.language,
+                    retrieved_docs=retrieved_docs,
+                    query_embedding=query_embedding
+                )
+            
+            # Each step of the Ollama stream blocks, so pull it from the LLM
+            # pool; leaving the loop (or being cancelled) closes the stream
+            async with aclosing(iterate_in_pool("llm", stream)) as events:
+                async for event in events:
+                    if await request.is_disconnected():
+                        break
+                    if event["type"] == "sources" and not query.include_sources:
+                        event["sources"] = []
+                    elif event["type"] == "token" and first_token_time is None:
+                        first_token_time = time.time() - start_time
+                    elif event["type"] == "done":
+                        event.pop("answer", None)
+                        processing_time = time.time() - start_time
+                        event["processing_time"] = processing_time
+                        event["timings"] = {
+                            **timings,
+                            "retrieval": retrieval_time,
+                            "time_to_first_token": first_token_time,
+                            "generation": processing_time - retrieval_time
+                        }
+                    
+                    yield json.dumps(event) + "\n"
+        
+        except Exception as e:
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+        finally:
+            get_query_log_writer().log(query.query, latency_ms=(time.time() - start_time) * 1000)
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
 
 
 @app.get("/analytics/pyq", response_model=PYQAnalyticsResponse)
-async def get_pyq_analytics():
-    """Get PYQ analytics"""
+async def get_pyq_analytics_data():
+    """Get PYQ analytics, aggregated from per-document results stored at ingest"""
     try:
-        # Retrieve all documents with text content
-        chroma = get_chroma_client()
-        all_docs = chroma.get_all_documents()
-        
-        if not all_docs:
-            return PYQAnalyticsResponse(
-                total_questions=0,
-                patterns=[],
-                topic_distribution={},
-                difficulty_distribution={},
-                year_wise_trends={}
-            )
-        
-        # Analyze - documents already have text and metadata
         analytics = get_pyq_analytics()
-        result = analytics.analyze_questions(all_docs)
-        
+        result = await run_in_pool("io", analytics.get_analytics)
         return PYQAnalyticsResponse(**result)
-        
+    
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/knowledge-graph", response_model=KnowledgeGraphResponse)
-async def get_knowledge_graph_data():
-    """Get knowledge graph"""
+async def get_knowledge_graph_data(
+    node: Optional[str] = None,
+    depth: int = 1,
+    top_n: Optional[int] = KNOWLEDGE_GRAPH_DEFAULT_TOP_N
+):
+    """
+    Get the stored knowledge graph
+    
+    Relationships are extracted at ingest time; this only reads the graph.
+    Pass node (and depth) for a neighbourhood subgraph and top_n to keep
+    the highest-degree concepts.
+    """
     try:
-        # Retrieve all documents with text content
-        chroma = get_chroma_client()
-        all_docs = chroma.get_all_documents()
-        
-        if not all_docs:
-            return KnowledgeGraphResponse(
-                nodes=[],
-                edges=[],
-                statistics={"total_nodes": 0, "total_edges": 0, "density": 0}
-            )
-        
-        # Use sample of documents for graph generation (max 20)
-        documents = all_docs[:20]
-        
-        # Generate graph
         kg = get_knowledge_graph()
-        result = kg.generate_graph(documents)
-        
+        result = await run_in_pool("io", kg.get_graph, node=node, depth=depth, top_n=top_n)
         return KnowledgeGraphResponse(**result)
-        
+    
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/stats")
+async def get_performance_stats():
+    """Get cache and performance counters"""
+    try:
+        embeddings_model = get_embedding_model()
+        query_cache = get_query_cache()
+        answer_cache = get_answer_cache()
+        lexical_index = get_lexical_index()
+        reranker = get_reranker()
+        return {
+            "embedding_cache": await run_in_pool("io", embeddings_model.get_cache_stats),
+            "lexical_index": (
+                await run_in_pool("io", lexical_index.get_stats) if lexical_index else {"enabled": False}
+            ),
+            "query_cache": query_cache.get_stats() if query_cache else {"enabled": False},
+            "answer_cache": answer_cache.get_stats() if answer_cache else {"enabled": False},
+            "reranker": reranker.get_stats() if reranker else {"enabled": False},
+            "chunking": get_chunking_stats(),
+            "query_log": get_query_log_writer().get_stats()
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -305,7 +732,7 @@ async def get_governance_stats():
     """Get governance statistics"""
     try:
         governance = get_governance_panel()
-        stats = governance.get_statistics()
+        stats = await run_in_pool("io", governance.get_statistics)
         return GovernanceStats(**stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -318,9 +745,11 @@ async def approve_document(request: DocumentApprovalRequest):
         governance = get_governance_panel()
         
         if request.action == "approve":
-            success = governance.approve_document(request.document_id)
+            success = await run_in_pool("io", governance.approve_document, request.document_id)
         elif request.action == "reject":
-            success = governance.reject_document(
+            success = await run_in_pool(
+                "io",
+                governance.reject_document,
                 request.document_id,
                 reason=request.reason or "Not suitable"
             )
@@ -330,8 +759,12 @@ async def approve_document(request: DocumentApprovalRequest):
         if not success:
             raise HTTPException(status_code=404, detail="Document not found")
         
-        return {"success": True, "message": f"Document {request.action}ed successfully"}
+        # Retrieval filters on the status stored in each chunk
+        status = "approved" if request.action == "approve" else "rejected"
+        await run_in_pool("io", sync_document_status, request.document_id, status)
         
+        return {"success": True, "message": f"Document {request.action}ed successfully"}
+    
     except HTTPException:
         raise
     except Exception as e:
@@ -343,7 +776,7 @@ async def get_pending_documents():
     """Get pending documents"""
     try:
         governance = get_governance_panel()
-        pending = governance.get_pending_documents()
+        pending = await run_in_pool("io", governance.get_pending_documents)
         return {"documents": pending}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
 """
 Pydantic models for request/response schemas
 """
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Literal
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -13,22 +13,61 @@ class DocumentMetadata(BaseModel):
     upload_date: datetime = Field(default_factory=datetime.now)
     total_pages: Optional[int] = None
     total_chunks: Optional[int] = None
+    course: Optional[str] = None
+    department: Optional[str] = None
 
 
 class UploadResponse(BaseModel):
     """Response after document upload"""
     success: bool
     message: str
-    document_id: str
+    document_id: Optional[str] = None  # None for a file refused in a batch upload
+    job_id: Optional[str] = None
+    status: Optional[str] = None
     metadata: Optional[DocumentMetadata] = None
 
 
+class IngestionJobStatus(BaseModel):
+    """Progress of a background ingestion job"""
+    job_id: str
+    document_id: str
+    filename: str
+    status: str  # queued, running, completed, failed
+    stage: str  # queued, parsing, embedding, storing, analyzing, done
+    progress: float
+    pages_parsed: int = 0
+    total_pages: Optional[int] = None
+    chunks_embedded: int = 0
+    total_chunks: Optional[int] = None
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class ChatFilters(BaseModel):
+    """Metadata filters applied inside the vector search"""
+    filename: Optional[str] = None
+    file_type: Optional[str] = None
+    page_start: Optional[int] = Field(default=None, ge=1)
+    page_end: Optional[int] = Field(default=None, ge=1)
+    # Only "approved" is accepted while RETRIEVAL_APPROVED_ONLY is set (400 otherwise)
+    status: Optional[Literal["pending", "approved", "rejected"]] = None
+    course: Optional[str] = None
+    department: Optional[str] = None
+
+
 class ChatQuery(BaseModel):
     """Chat query request"""
     query: str
     language: str = "en"
     top_k: int = 5
     include_sources: bool = True
+    # Share of the fused ranking given to keyword (BM25) matches; server default when unset
+    lexical_weight: Optional[float] = Field(default=None, ge=0.0, le=1.0)
+    # Set False to skip cross-encoder re-ranking for this query
+    rerank: Optional[bool] = None
+    filters: Optional[ChatFilters] = None
 
 
 class SourceDocument(BaseModel):
@@ -46,6 +85,9 @@ class ChatResponse(BaseModel):
     confidence_score: float
     language: str
     processing_time: float
+    cached: bool = False
+    # Seconds spent per stage (embedding, dense_search, lexical_search, fusion, rerank, generation)
+    timings: Optional[Dict[str, float]] = None
 
 
 class PYQPattern(BaseModel):
@@ -105,6 +147,8 @@ class GovernanceStats(BaseModel):
     total_queries: int
     active_users: int
     storage_used_mb: float
+    dedup_ratio: float = 0.0       # Share of chunks stored once and referenced
+    duplicate_uploads: int = 0     # Uploads answered with an existing document
 
 
 class HealthCheck(BaseModel):
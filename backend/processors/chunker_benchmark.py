@@ -0,0 +1,82 @@
+"""
+TextChunker throughput benchmark
+Reports chunking speed in MB/s on a large document
+
+Usage:
+    python -m backend.processors.chunker_benchmark [--size-mb 50] [--file notes.txt]
+"""
+from typing import Iterable, List
+import argparse
+import random
+import time
+from backend.processors.text_chunker import get_text_chunker
+from backend.config import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+_WORDS = (
+    "the algorithm graph node edge tree heap queue stack sort search hash table "
+    "memory process thread kernel scheduler page cache network packet protocol "
+    "database index query transaction lock matrix vector integral derivative"
+).split()
+
+
+def generate_text(size_mb: float, seed: int = 0) -> str:
+    """Build synthetic prose with sentences and paragraphs of varied length"""
+    rng = random.Random(seed)
+    target = int(size_mb * 1024 * 1024)
+    parts: List[str] = []
+    length = 0
+    while length < target:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(5, 30)))
+        sentence = sentence.capitalize() + rng.choice([". ", ". ", "? ", "! ", ".\n\n"])
+        parts.append(sentence)
+        length += len(sentence)
+    return "".join(parts)
+
+
+def _lines(text: str) -> Iterable[str]:
+    return text.splitlines(keepends=True)
+
+
+def _blocks(text: str, size: int = 64 * 1024) -> Iterable[str]:
+    return (text[i:i + size] for i in range(0, len(text), size))
+
+
+def run(text: str, repeat: int):
+    """Time iter_chunks over the text fed whole, by lines and in 64K blocks"""
+    chunker = get_text_chunker(CHUNK_SIZE, CHUNK_OVERLAP)
+    size_mb = len(text.encode("utf-8")) / (1024 * 1024)
+    feeds: List[tuple] = [
+        ("whole string", lambda: [text]),
+        ("lines", lambda: _lines(text)),
+        ("64K blocks", lambda: _blocks(text)),
+    ]
+    
+    print(f"Document: {size_mb:.1f} MB, chunk_size={CHUNK_SIZE}, overlap={CHUNK_OVERLAP}")
+    for name, feed in feeds:
+        best = float("inf")
+        chunk_count = 0
+        for _ in range(repeat):
+            start_time = time.perf_counter()
+            chunk_count = sum(1 for _ in chunker.iter_chunks(feed()))
+            best = min(best, time.perf_counter() - start_time)
+        print(f"  {name:<13} {size_mb / best:8.1f} MB/s  ({chunk_count} chunks, {best:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark TextChunker throughput")
+    parser.add_argument("--size-mb", type=float, default=50, help="Size of the synthetic document")
+    parser.add_argument("--file", help="Benchmark a UTF-8 text file instead")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per feed; the best is reported")
+    args = parser.parse_args()
+    
+    if args.file:
+        with open(args.file, "r", encoding="utf-8", errors="replace") as f:
+            text = f.read()
+    else:
+        text = generate_text(args.size_mb)
+    run(text, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
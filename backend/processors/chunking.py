@@ -0,0 +1,126 @@
+"""
+Chunker selection
+Picks the chunker for a document from its chunking profile and
+fingerprints the settings it chunks with
+"""
+from typing import Any, Dict, Union
+import hashlib
+import json
+import re
+from backend.config import (
+    CHUNKING_MODE,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    TOKEN_CHUNK_SIZE,
+    TOKEN_CHUNK_OVERLAP,
+    CHUNKING_PROFILES,
+    QUESTION_PAPER_FILENAME_PATTERN,
+    EMBEDDING_MODEL
+)
+from backend.processors.text_chunker import TextChunker, get_text_chunker
+from backend.processors.token_chunker import TokenChunker, get_token_chunker
+
+
+# Bump when chunk boundaries change for the same settings, so stored
+# documents show up as needing a re-chunk
+_CHUNKER_VERSION = 2
+
+_QUESTION_PAPER_PATTERN = re.compile(QUESTION_PAPER_FILENAME_PATTERN, re.IGNORECASE)
+
+_PROFILE_BY_EXTENSION = {".pdf": "pdf", ".pptx": "slides"}
+
+Chunker = Union[TextChunker, TokenChunker]
+
+
+def is_question_paper(filename: str) -> bool:
+    """Whether a filename looks like a question paper (QUESTION_PAPER_FILENAME_PATTERN)"""
+    return bool(_QUESTION_PAPER_PATTERN.search(filename))
+
+
+def select_chunking_profile(filename: str, file_ext: str) -> str:
+    """
+    Choose the chunking profile for a document
+    
+    Args:
+        filename: Original filename
+        file_ext: Lower-case file extension including the dot
+    
+    Returns:
+        Name of a profile in CHUNKING_PROFILES
+    """
+    if is_question_paper(filename):
+        name = "question_paper"
+    else:
+        name = _PROFILE_BY_EXTENSION.get(file_ext, "default")
+    return name if name in CHUNKING_PROFILES else "default"
+
+
+def get_chunking_profile(name: str = "default") -> Dict[str, Any]:
+    """Settings of a profile, with unset values taken from the global defaults"""
+    return {
+        "mode": CHUNKING_MODE,
+        "chunk_size": CHUNK_SIZE,
+        "chunk_overlap": CHUNK_OVERLAP,
+        "token_chunk_size": TOKEN_CHUNK_SIZE,
+        "token_chunk_overlap": TOKEN_CHUNK_OVERLAP,
+        **CHUNKING_PROFILES.get(name, {})
+    }
+
+
+def get_chunker(profile: str = "default") -> Chunker:
+    """
+    Get the chunker for a chunking profile
+    
+    Falls back to character chunking when token chunking is configured
+    but the embedding model's tokenizer cannot be used.
+    """
+    settings = get_chunking_profile(profile)
+    if settings["mode"] == "tokens":
+        try:
+            return get_token_chunker(settings["token_chunk_size"], settings["token_chunk_overlap"])
+        except Exception as e:
+            print(f"✗ Token chunking unavailable, chunking by characters: {str(e)}")
+    return get_text_chunker(settings["chunk_size"], settings["chunk_overlap"])
+
+
+def chunker_settings(chunker: Chunker) -> Dict[str, Any]:
+    """Effective settings of a chunker"""
+    if isinstance(chunker, TokenChunker):
+        return {
+            "mode": "tokens",
+            "chunk_tokens": chunker.chunk_tokens,
+            "overlap_tokens": chunker.overlap_tokens,
+            "embedding_model": EMBEDDING_MODEL
+        }
+    return {
+        "mode": "characters",
+        "chunk_size": chunker.chunk_size,
+        "chunk_overlap": chunker.chunk_overlap
+    }
+
+
+def chunker_fingerprint(chunker: Chunker) -> str:
+    """
+    Fingerprint of the settings a chunker actually uses
+    
+    Two documents share a fingerprint exactly when they were chunked the
+    same way, so a changed profile (or a token chunker that fell back to
+    characters) is detected.
+    """
+    settings = {**chunker_settings(chunker), "version": _CHUNKER_VERSION}
+    encoded = json.dumps(settings, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def get_chunking_stats() -> Dict[str, Any]:
+    """Get each profile's effective settings and fingerprint"""
+    stats = {}
+    for name in CHUNKING_PROFILES:
+        chunker = get_chunker(name)
+        stats[name] = {
+            **chunker_settings(chunker),
+            "fingerprint": chunker_fingerprint(chunker)
+        }
+        if isinstance(chunker, TokenChunker):
+            stats[name]["tokenizer_cache"] = chunker.get_stats()
+    return stats
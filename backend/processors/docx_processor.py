@@ -2,50 +2,60 @@
 DOCX document processor
 Extracts text from Word documents
 """
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 from pathlib import Path
 from docx import Document
-from backend.processors.text_chunker import get_text_chunker
+from backend.processors.chunking import Chunker, get_chunker
 
 
 class DOCXProcessor:
     """Processes DOCX documents"""
     
     def __init__(self):
-        self.chunker = get_text_chunker()
+        self.chunker = get_chunker()
     
-    def process(self, file_path: Path) -> Dict[str, Any]:
+    def process(
+        self,
+        file_path: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        chunker: Optional[Chunker] = None
+    ) -> Dict[str, Any]:
         """
         Process DOCX file
         
         Args:
             file_path: Path to DOCX file
-            
+            progress_callback: Unused; DOCX files have no pages to report
+            chunker: Chunker to use instead of the default profile's
+        
         Returns:
             Dictionary with chunks and metadata
         """
+        chunker = chunker or self.chunker
+        
         try:
             doc = Document(file_path)
             
-            # Extract all paragraphs
-            all_text = []
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    all_text.append(paragraph.text)
-            
-            # Combine into single text
-            full_text = "\n\n".join(all_text)
+            # Stream non-empty paragraphs, separated by blank lines, into the
+            # chunker instead of joining them into one string
+            def segments():
+                separator = ""
+                for paragraph in doc.paragraphs:
+                    if paragraph.text.strip():
+                        yield separator
+                        yield paragraph.text
+                        separator = "\n\n"
             
-            # Chunk the text
-            chunks = self.chunker.chunk_text(full_text)
-            
-            # Create metadata for each chunk
+            chunks = []
             chunk_metadatas = []
-            for _ in chunks:
+            for chunk in chunker.iter_chunks(segments()):
+                chunks.append(chunk["text"])
                 chunk_metadatas.append({
                     "filename": file_path.name,
                     "file_type": "docx",
-                    "page": None  # DOCX doesn't have page numbers
+                    "page": None,  # DOCX doesn't have page numbers
+                    "start_char": chunk["start_char"],
+                    "end_char": chunk["end_char"]
                 })
             
             return {
@@ -54,7 +64,7 @@ class DOCXProcessor:
                 "total_pages": None,
                 "total_chunks": len(chunks)
             }
-            
+        
         except Exception as e:
             raise RuntimeError(f"DOCX processing failed: {str(e)}")
 
@@ -0,0 +1,17 @@
+"""
+PDF page extraction for worker processes
+Imports only pypdf, so spawned extraction workers start without loading
+the chunkers, the embedding model or torch
+"""
+from typing import List
+import pypdf
+
+
+def extract_page_range(file_path: str, start: int, end: int) -> List[str]:
+    """
+    Extract text for pages [start, end) in a worker process
+
+    Each worker opens the file itself so no reader state crosses processes.
+    """
+    pdf_reader = pypdf.PdfReader(file_path)
+    return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
@@ -2,63 +2,166 @@
 PDF document processor
 Extracts text and metadata from PDF files
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Optional
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+import multiprocessing
+import threading
 import pypdf
-from backend.processors.text_chunker import get_text_chunker
+from backend.config import (
+    PDF_PARALLEL_EXTRACTION,
+    PDF_PARALLEL_MIN_PAGES,
+    PDF_PAGES_PER_SHARD,
+    PDF_EXTRACT_WORKERS
+)
+from backend.processors.chunking import Chunker, get_chunker
+from backend.processors.pdf_extract import extract_page_range
+
+
+# Process pool shared by all PDFProcessor instances, created on first use
+_extract_pool: Optional[ProcessPoolExecutor] = None
+_extract_pool_lock = threading.Lock()
+
+
+def _get_extract_pool() -> ProcessPoolExecutor:
+    """
+    Get or create the shared page extraction process pool
+    
+    Workers are always spawned: forking a server that already runs torch
+    and tokenizer threads can deadlock the child. A spawned worker only
+    imports pdf_extract, which loads nothing but pypdf.
+    """
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is None:
+            _extract_pool = ProcessPoolExecutor(
+                max_workers=PDF_EXTRACT_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _extract_pool
+
+
+def shutdown_extract_pool():
+    """Shut down the shared page extraction process pool"""
+    global _extract_pool
+    with _extract_pool_lock:
+        if _extract_pool is not None:
+            _extract_pool.shutdown(wait=False, cancel_futures=True)
+            _extract_pool = None
 
 
 class PDFProcessor:
     """Processes PDF documents"""
     
-    def __init__(self):
-        self.chunker = get_text_chunker()
+    def __init__(self, parallel: bool = PDF_PARALLEL_EXTRACTION):
+        """
+        Initialize processor
+        
+        Args:
+            parallel: Split large PDFs into page shards extracted in a process pool
+        """
+        self.chunker = get_chunker()
+        self.parallel = parallel
     
-    def process(self, file_path: Path) -> Dict[str, Any]:
+    def process(
+        self,
+        file_path: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        chunker: Optional[Chunker] = None
+    ) -> Dict[str, Any]:
         """
         Process PDF file
         
         Args:
             file_path: Path to PDF file
-            
+            progress_callback: Optional callable receiving (pages_done, total_pages)
+            chunker: Chunker to use instead of the default profile's
+        
         Returns:
             Dictionary with chunks and metadata
         """
+        chunker = chunker or self.chunker
+        
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = pypdf.PdfReader(file)
-                
                 total_pages = len(pdf_reader.pages)
-                all_chunks = []
-                chunk_metadatas = []
-                
-                # Extract text from each page
-                for page_num, page in enumerate(pdf_reader.pages, 1):
-                    page_text = page.extract_text()
-                    
-                    if page_text.strip():
-                        # Chunk the page text
-                        chunks = self.chunker.chunk_text(page_text)
-                        
-                        # Create metadata for each chunk
-                        for chunk in chunks:
-                            all_chunks.append(chunk)
-                            chunk_metadatas.append({
-                                "filename": file_path.name,
-                                "file_type": "pdf",
-                                "page": page_num,
-                                "total_pages": total_pages
-                            })
-                
-                return {
-                    "chunks": all_chunks,
-                    "metadatas": chunk_metadatas,
-                    "total_pages": total_pages,
-                    "total_chunks": len(all_chunks)
-                }
                 
+                if self.parallel and total_pages >= PDF_PARALLEL_MIN_PAGES:
+                    page_texts = self._extract_parallel(file_path, total_pages, progress_callback)
+                else:
+                    page_texts = []
+                    for page_num, page in enumerate(pdf_reader.pages, 1):
+                        page_texts.append(page.extract_text() or "")
+                        if progress_callback:
+                            progress_callback(page_num, total_pages)
+            
+            all_chunks = []
+            chunk_metadatas = []
+            
+            # Chunk each page in page order
+            for page_num, page_text in enumerate(page_texts, 1):
+                if page_text.strip():
+                    # Create metadata for each chunk; offsets are within the page
+                    for chunk in chunker.iter_chunks([page_text]):
+                        all_chunks.append(chunk["text"])
+                        chunk_metadatas.append({
+                            "filename": file_path.name,
+                            "file_type": "pdf",
+                            "page": page_num,
+                            "total_pages": total_pages,
+                            "start_char": chunk["start_char"],
+                            "end_char": chunk["end_char"]
+                        })
+            
+            return {
+                "chunks": all_chunks,
+                "metadatas": chunk_metadatas,
+                "total_pages": total_pages,
+                "total_chunks": len(all_chunks)
+            }
+        
         except Exception as e:
             raise RuntimeError(f"PDF processing failed: {str(e)}")
+    
+    def _extract_parallel(
+        self,
+        file_path: Path,
+        total_pages: int,
+        progress_callback: Optional[Callable[[int, int], None]] = None
+    ) -> List[str]:
+        """
+        Extract page texts by sharding the page range across the process pool
+        
+        Args:
+            file_path: Path to PDF file
+            total_pages: Number of pages in the PDF
+            progress_callback: Optional callable receiving (pages_done, total_pages)
+        
+        Returns:
+            Page texts in page order
+        """
+        pool = _get_extract_pool()
+        futures = {}
+        for start in range(0, total_pages, PDF_PAGES_PER_SHARD):
+            end = min(start + PDF_PAGES_PER_SHARD, total_pages)
+            future = pool.submit(extract_page_range, str(file_path), start, end)
+            futures[future] = start
+        
+        page_texts: List[str] = [""] * total_pages
+        pages_done = 0
+        
+        # Shards finish out of order; place each at its page offset
+        for future in as_completed(futures):
+            start = futures[future]
+            shard_texts = future.result()
+            page_texts[start:start + len(shard_texts)] = shard_texts
+            
+            pages_done += len(shard_texts)
+            if progress_callback:
+                progress_callback(pages_done, total_pages)
+        
+        return page_texts
 
 
 def get_pdf_processor() -> PDFProcessor:
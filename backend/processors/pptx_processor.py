@@ -2,28 +2,37 @@
 PPTX document processor
 Extracts text from PowerPoint presentations
 """
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
 from pathlib import Path
 from pptx import Presentation
-from backend.processors.text_chunker import get_text_chunker
+from backend.processors.chunking import Chunker, get_chunker
 
 
 class PPTXProcessor:
     """Processes PPTX presentations"""
     
     def __init__(self):
-        self.chunker = get_text_chunker()
+        self.chunker = get_chunker()
     
-    def process(self, file_path: Path) -> Dict[str, Any]:
+    def process(
+        self,
+        file_path: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        chunker: Optional[Chunker] = None
+    ) -> Dict[str, Any]:
         """
         Process PPTX file
         
         Args:
             file_path: Path to PPTX file
-            
+            progress_callback: Optional callable receiving (slides_done, total_slides)
+            chunker: Chunker to use instead of the default profile's
+        
         Returns:
             Dictionary with chunks and metadata
         """
+        chunker = chunker or self.chunker
+        
         try:
             prs = Presentation(file_path)
             
@@ -44,18 +53,20 @@ class PPTXProcessor:
                 if slide_text_parts:
                     slide_text = "\n".join(slide_text_parts)
                     
-                    # Chunk the slide text
-                    chunks = self.chunker.chunk_text(slide_text)
-                    
-                    # Create metadata for each chunk
-                    for chunk in chunks:
-                        all_chunks.append(chunk)
+                    # Chunk the slide text; offsets are within the slide
+                    for chunk in chunker.iter_chunks([slide_text]):
+                        all_chunks.append(chunk["text"])
                         chunk_metadatas.append({
                             "filename": file_path.name,
                             "file_type": "pptx",
                             "page": slide_num,  # Using slide number as "page"
-                            "total_pages": total_slides
+                            "total_pages": total_slides,
+                            "start_char": chunk["start_char"],
+                            "end_char": chunk["end_char"]
                         })
+                
+                if progress_callback:
+                    progress_callback(slide_num, total_slides)
             
             return {
                 "chunks": all_chunks,
@@ -63,7 +74,7 @@ class PPTXProcessor:
                 "total_pages": total_slides,
                 "total_chunks": len(all_chunks)
             }
-            
+        
         except Exception as e:
             raise RuntimeError(f"PPTX processing failed: {str(e)}")
 
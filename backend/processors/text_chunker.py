@@ -2,7 +2,16 @@
 Smart text chunking for documents
 Splits text into manageable chunks with overlap
 """
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List
+import re
+from backend.config import CHUNK_SIZE, CHUNK_OVERLAP
+
+
+# A sentence ends at . ! or ? followed by a space or newline; the break
+# goes after the whitespace. The greedy prefix makes one match find the
+# last sentence end in a window, backtracking in C instead of one rfind
+# per ending.
+_LAST_SENTENCE_END_PATTERN = re.compile(r".*[.!?][ \n]", re.DOTALL)
 
 
 class TextChunker:
@@ -16,8 +25,14 @@ class TextChunker:
             chunk_size: Target size for each chunk (in characters)
             chunk_overlap: Number of overlapping characters between chunks
         """
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap must be smaller than chunk_size")
+        
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
+        # Distance either side of chunk_size searched for a sentence break;
+        # kept under half the stride so every chunk moves the start forward
+        self.boundary_window = min(100, (chunk_size - chunk_overlap) // 2)
     
     def chunk_text(self, text: str) -> List[str]:
         """
@@ -25,61 +40,86 @@ class TextChunker:
         
         Args:
             text: Input text to chunk
-            
+        
         Returns:
             List of text chunks
         """
-        if not text or len(text) == 0:
+        if not text:
             return []
+        return [chunk["text"] for chunk in self.iter_chunks([text])]
+    
+    def iter_chunks(self, segments: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Split a stream of text into chunks without joining it first
         
-        # If text is smaller than chunk size, return as single chunk
-        if len(text) <= self.chunk_size:
-            return [text]
+        Each chunk ends at the last sentence break within boundary_window of
+        chunk_size, or at chunk_size when there is none. Each window is
+        searched with a single regex match, and only about one chunk of
+        text is buffered at a time.
         
-        chunks = []
+        Args:
+            segments: Text pieces in order, e.g. the lines of a file
+        
+        Yields:
+            Dicts with the stripped chunk "text" and its "start_char" and
+            "end_char" offsets in the concatenated input
+        """
+        size = self.chunk_size
+        window = self.boundary_window
+        
+        # Positions below are offsets in the whole input; buffer holds the
+        # input from base onwards
+        buffer = ""
+        base = 0
         start = 0
         
-        while start < len(text):
-            # Calculate end position
-            end = start + self.chunk_size
+        def find_break(limit: int) -> int:
+            """End of the chunk at start, given text up to limit"""
+            end = start + size
+            match = _LAST_SENTENCE_END_PATTERN.match(
+                buffer,
+                end - window - base,
+                min(end + window, limit) - base
+            )
+            return base + match.end() if match else end
+        
+        def make_chunk(end: int):
+            """Strip a chunk and compute its offsets; None if blank"""
+            raw = buffer[start - base:end - base]
+            text = raw.lstrip()
+            chunk_start = start + len(raw) - len(text)
+            text = text.rstrip()
+            if not text:
+                return None
+            return {"text": text, "start_char": chunk_start, "end_char": chunk_start + len(text)}
+        
+        for segment in segments:
+            buffer += segment
             
-            # If this is not the last chunk, try to break at sentence boundary
-            if end < len(text):
-                # Look for sentence endings near the end position
-                sentence_endings = ['. ', '.\n', '! ', '!\n', '? ', '?\n']
-                best_break = end
-                
-                # Search window around end position
-                search_start = max(start + self.chunk_size - 100, start)
-                search_end = min(end + 100, len(text))
-                search_text = text[search_start:search_end]
-                
-                # Find the last sentence ending in the window
-                for ending in sentence_endings:
-                    last_pos = search_text.rfind(ending)
-                    if last_pos != -1:
-                        actual_pos = search_start + last_pos + len(ending)
-                        if actual_pos > start:
-                            best_break = actual_pos
-                            break
-                
-                end = best_break
+            # Break only where the whole search window has arrived
+            while base + len(buffer) - start > size + window:
+                end = find_break(base + len(buffer))
+                chunk = make_chunk(end)
+                if chunk:
+                    yield chunk
+                start = end - self.chunk_overlap
             
-            # Extract chunk
-            chunk = text[start:end].strip()
+            # Drop consumed text so the buffer stays about one chunk long
+            if start - base > size:
+                buffer = buffer[start - base:]
+                base = start
+        
+        total = base + len(buffer)
+        while start < total:
+            end = total if start + size >= total else find_break(total)
+            chunk = make_chunk(end)
             if chunk:
-                chunks.append(chunk)
-            
-            # Move start position with overlap
-            start = end - self.chunk_overlap
-            
-            # Avoid infinite loop
-            if start >= len(text):
+                yield chunk
+            if end >= total:
                 break
-        
-        return chunks
+            start = end - self.chunk_overlap
 
 
-def get_text_chunker(chunk_size: int = 1000, chunk_overlap: int = 200) -> TextChunker:
+def get_text_chunker(chunk_size: int = CHUNK_SIZE, chunk_overlap: int = CHUNK_OVERLAP) -> TextChunker:
     """Get a TextChunker instance"""
     return TextChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
@@ -0,0 +1,137 @@
+"""
+Plain-text and Markdown document processor
+Streams text files into the chunker without loading them whole
+"""
+from typing import Dict, Any, Callable, Iterator, List, Optional, TextIO, Tuple
+from itertools import groupby
+from pathlib import Path
+import re
+from backend.processors.chunking import Chunker, get_chunker
+
+
+# Plain text is read in blocks, so a file with no line breaks is still
+# never held in memory whole
+_READ_BLOCK_CHARS = 64 * 1024
+
+MARKDOWN_EXTENSIONS = {".md", ".markdown"}
+
+# ATX headings ("## Title ##"); setext underlines are not recognised
+_HEADING_PATTERN = re.compile(r"^ {0,3}(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE_PATTERN = re.compile(r"^ {0,3}(```|~~~)")
+
+
+class TextProcessor:
+    """Processes plain-text and Markdown files"""
+    
+    def __init__(self):
+        self.chunker = get_chunker()
+    
+    def process(
+        self,
+        file_path: Path,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        chunker: Optional[Chunker] = None
+    ) -> Dict[str, Any]:
+        """
+        Process a text or Markdown file
+        
+        Markdown is chunked section by section so no chunk spans a heading;
+        each chunk records its heading and the heading path above it.
+        Character offsets are positions in the decoded file text.
+        
+        Args:
+            file_path: Path to the text file
+            progress_callback: Unused; text files have no pages to report
+            chunker: Chunker to use instead of the default profile's
+        
+        Returns:
+            Dictionary with chunks and metadata
+        """
+        chunker = chunker or self.chunker
+        
+        try:
+            file_type = file_path.suffix.lower().lstrip(".")
+            all_chunks = []
+            chunk_metadatas = []
+            
+            # utf-8-sig drops a byte order mark; undecodable bytes are
+            # replaced rather than failing the whole file
+            with open(file_path, "r", encoding="utf-8-sig", errors="replace") as f:
+                if file_path.suffix.lower() in MARKDOWN_EXTENSIONS:
+                    sections = self._markdown_sections(f)
+                else:
+                    sections = [([], iter(lambda: f.read(_READ_BLOCK_CHARS), ""))]
+                
+                section_start = 0
+                for headings, segments in sections:
+                    section_length = 0
+                    
+                    def counted(pieces: Iterator[str]) -> Iterator[str]:
+                        nonlocal section_length
+                        for piece in pieces:
+                            section_length += len(piece)
+                            yield piece
+                    
+                    for chunk in chunker.iter_chunks(counted(segments)):
+                        all_chunks.append(chunk["text"])
+                        chunk_metadatas.append({
+                            "filename": file_path.name,
+                            "file_type": file_type,
+                            "page": None,  # Text files don't have page numbers
+                            "heading": headings[-1] if headings else None,
+                            "section": " > ".join(headings) if headings else None,
+                            "start_char": section_start + chunk["start_char"],
+                            "end_char": section_start + chunk["end_char"]
+                        })
+                    section_start += section_length
+            
+            return {
+                "chunks": all_chunks,
+                "metadatas": chunk_metadatas,
+                "total_pages": None,
+                "total_chunks": len(all_chunks)
+            }
+        
+        except Exception as e:
+            raise RuntimeError(f"Text processing failed: {str(e)}")
+    
+    def _markdown_sections(self, lines: TextIO) -> Iterator[Tuple[List[str], Iterator[str]]]:
+        """
+        Split Markdown lines into sections at each heading
+        
+        Each section's lines are consumed lazily, so they must be read
+        before moving on to the next section.
+        
+        Args:
+            lines: Open Markdown file
+        
+        Yields:
+            (heading path, section lines) pairs; the heading line itself
+            starts its section
+        """
+        # Innermost heading per level; a heading clears the deeper levels
+        path: List[Tuple[int, str]] = []
+        section = 0
+        in_fence = False
+        
+        def section_key(line: str) -> int:
+            nonlocal section, in_fence
+            if _FENCE_PATTERN.match(line):
+                in_fence = not in_fence
+            elif not in_fence:
+                match = _HEADING_PATTERN.match(line)
+                if match:
+                    level = len(match.group(1))
+                    while path and path[-1][0] >= level:
+                        path.pop()
+                    path.append((level, match.group(2).strip()))
+                    section += 1
+            return section
+        
+        for _, section_lines in groupby(lines, key=section_key):
+            yield [title for _, title in path if title], section_lines
+
+
+def get_text_processor() -> TextProcessor:
+    """Get TextProcessor instance"""
+    return TextProcessor()
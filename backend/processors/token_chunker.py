@@ -0,0 +1,273 @@
+"""
+Token-aware text chunking
+Measures chunks with the embedding model's tokenizer so each chunk fits
+the model's input window instead of being truncated at embed time
+"""
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import OrderedDict
+import re
+import threading
+from backend.config import (
+    TOKEN_CHUNK_SIZE,
+    TOKEN_CHUNK_OVERLAP,
+    TOKENIZER_BATCH_SIZE,
+    TOKENIZER_CACHE_SIZE
+)
+from backend.llm.embeddings import get_embedding_model
+
+
+# Text is tokenized in pieces split at whitespace, which the tokenizer
+# splits on anyway, so a piece's tokens do not depend on its neighbours
+_MAX_PIECE_CHARS = 2000
+
+# Matches up to the last whitespace character, so text that may continue
+# a word in the next segment is held back
+_UP_TO_LAST_SPACE_PATTERN = re.compile(r".*\s", re.DOTALL)
+
+_SENTENCE_END_CHARS = ".!?"
+
+
+def _split_pieces(text: str) -> Iterator[str]:
+    """Split text into lines, cutting overlong lines at a space"""
+    for line in text.splitlines(keepends=True):
+        while len(line) > _MAX_PIECE_CHARS:
+            cut = line.rfind(" ", 0, _MAX_PIECE_CHARS) + 1 or _MAX_PIECE_CHARS
+            yield line[:cut]
+            line = line[cut:]
+        if line:
+            yield line
+
+
+class TokenChunker:
+    """
+    Chunks text by embedding-model tokens
+    
+    Provides the same chunk_text/iter_chunks interface as TextChunker.
+    Chunks end at the last sentence end, or else word boundary, within the
+    final quarter of the window, so every chunk embeds without truncation.
+    Token offsets of recently seen pieces (lines) are cached, which
+    repeated headers, footers and re-ingested documents hit.
+    """
+    
+    def __init__(self, tokenizer, chunk_tokens: int, overlap_tokens: int):
+        """
+        Initialize chunker
+        
+        Args:
+            tokenizer: Fast Hugging Face tokenizer (offset mapping required)
+            chunk_tokens: Maximum tokens per chunk, excluding special tokens
+            overlap_tokens: Tokens repeated between consecutive chunks
+        """
+        if overlap_tokens >= chunk_tokens:
+            raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+        
+        self.tokenizer = tokenizer
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        # Kept under half the stride so every chunk moves the start forward
+        self.boundary_window = min(chunk_tokens // 4, (chunk_tokens - overlap_tokens) // 2)
+        self._cache: "OrderedDict[str, List[Tuple[int, int]]]" = OrderedDict()
+        # Fast tokenizers are not safe to call from several threads at once
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def _token_offsets(self, pieces: List[str]) -> List[List[Tuple[int, int]]]:
+        """
+        Token character offsets for each piece, tokenizing cache misses in batches
+        
+        Args:
+            pieces: Text pieces
+        
+        Returns:
+            (start, end) offsets within each piece, one list per piece
+        """
+        with self._lock:
+            offsets: Dict[str, List[Tuple[int, int]]] = {}
+            missing: List[str] = []
+            for piece in pieces:
+                if piece in offsets:
+                    continue
+                cached = self._cache.get(piece)
+                if cached is not None:
+                    self._cache.move_to_end(piece)
+                    offsets[piece] = cached
+                    self.cache_hits += 1
+                else:
+                    offsets[piece] = []
+                    missing.append(piece)
+            
+            self.cache_misses += len(missing)
+            for start in range(0, len(missing), TOKENIZER_BATCH_SIZE):
+                batch = missing[start:start + TOKENIZER_BATCH_SIZE]
+                encoded = self.tokenizer(
+                    batch,
+                    add_special_tokens=False,
+                    return_offsets_mapping=True,
+                    return_attention_mask=False,
+                    return_token_type_ids=False,
+                    verbose=False
+                )
+                for piece, mapping in zip(batch, encoded["offset_mapping"]):
+                    token_offsets = [(s, e) for s, e in mapping if e > s]
+                    offsets[piece] = token_offsets
+                    self._cache[piece] = token_offsets
+            
+            while len(self._cache) > TOKENIZER_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        return [offsets[piece] for piece in pieces]
+    
+    def chunk_text(self, text: str) -> List[str]:
+        """
+        Split text into chunks
+        
+        Args:
+            text: Input text to chunk
+        
+        Returns:
+            List of text chunks
+        """
+        if not text:
+            return []
+        return [chunk["text"] for chunk in self.iter_chunks([text])]
+    
+    def iter_chunks(self, segments: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Split a stream of text into chunks of at most chunk_tokens tokens
+        
+        Args:
+            segments: Text pieces in order, e.g. the lines of a file
+        
+        Yields:
+            Dicts with the chunk "text" and its "start_char" and "end_char"
+            offsets in the concatenated input
+        """
+        size = self.chunk_tokens
+        window = self.boundary_window
+        
+        # Positions are offsets in the whole input; buffer holds the input
+        # from base onwards and tokens the offsets of every token from the
+        # current chunk start (index i) on
+        buffer = ""
+        base = 0
+        queued = 0
+        pieces: List[Tuple[int, str]] = []
+        tokens: List[Tuple[int, int]] = []
+        i = 0
+        
+        def tokenize_pieces():
+            for (offset, _), token_offsets in zip(
+                pieces, self._token_offsets([piece for _, piece in pieces])
+            ):
+                tokens.extend((offset + s, offset + e) for s, e in token_offsets)
+            pieces.clear()
+        
+        def queue(end: int):
+            """Queue text from the last queued position up to end for tokenizing"""
+            nonlocal queued
+            position = queued
+            for piece in _split_pieces(buffer[queued - base:end - base]):
+                pieces.append((position, piece))
+                position += len(piece)
+            queued = end
+        
+        def find_break() -> int:
+            """Token index the chunk starting at token i should end before"""
+            word_break = None
+            for e in range(i + size, i + size - window, -1):
+                previous_end = tokens[e - 1][1]
+                if tokens[e][0] > previous_end:
+                    if buffer[previous_end - 1 - base] in _SENTENCE_END_CHARS:
+                        return e
+                    if word_break is None:
+                        word_break = e
+            return word_break or i + size
+        
+        def make_chunk(e: int) -> Dict[str, Any]:
+            start_char = tokens[i][0]
+            end_char = tokens[e - 1][1]
+            return {
+                "text": buffer[start_char - base:end_char - base],
+                "start_char": start_char,
+                "end_char": end_char
+            }
+        
+        for segment in segments:
+            buffer += segment
+            match = _UP_TO_LAST_SPACE_PATTERN.match(buffer, queued - base)
+            if match:
+                queue(base + match.end())
+            if len(pieces) < TOKENIZER_BATCH_SIZE:
+                continue
+            tokenize_pieces()
+            
+            # A break at token e needs token e to tell whether a space follows
+            while len(tokens) - i > size:
+                e = find_break()
+                yield make_chunk(e)
+                i = e - self.overlap_tokens
+            
+            # Drop consumed text and tokens so both stay about one chunk long
+            if i > size:
+                del tokens[:i]
+                i = 0
+            keep_from = tokens[0][0] if tokens else queued
+            if keep_from - base > _MAX_PIECE_CHARS:
+                buffer = buffer[keep_from - base:]
+                base = keep_from
+        
+        queue(base + len(buffer))
+        tokenize_pieces()
+        while i < len(tokens):
+            e = len(tokens) if len(tokens) - i <= size else find_break()
+            yield make_chunk(e)
+            if e >= len(tokens):
+                break
+            i = e - self.overlap_tokens
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get chunk size and tokenizer cache counters"""
+        with self._lock:
+            return {
+                "chunk_tokens": self.chunk_tokens,
+                "overlap_tokens": self.overlap_tokens,
+                "cache_size": len(self._cache),
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses
+            }
+
+
+# Global instances, one per (chunk size, overlap)
+_token_chunkers: Dict[Tuple[Optional[int], int], TokenChunker] = {}
+_token_chunker_lock = threading.Lock()
+
+
+def get_token_chunker(
+    chunk_tokens: Optional[int] = TOKEN_CHUNK_SIZE,
+    overlap_tokens: int = TOKEN_CHUNK_OVERLAP
+) -> TokenChunker:
+    """
+    Get or create a token chunker for the embedding model
+    
+    Args:
+        chunk_tokens: Tokens per chunk; None, or more than the model's
+            window, fills the window
+        overlap_tokens: Tokens repeated between consecutive chunks
+    """
+    key = (chunk_tokens, overlap_tokens)
+    with _token_chunker_lock:
+        if key not in _token_chunkers:
+            model = get_embedding_model().model
+            tokenizer = model.tokenizer
+            if not getattr(tokenizer, "is_fast", False):
+                raise RuntimeError("Token chunking needs a fast tokenizer with offset mapping")
+            
+            # Leave room for the [CLS]/[SEP] tokens added at embed time
+            window = model.max_seq_length - tokenizer.num_special_tokens_to_add()
+            _token_chunkers[key] = TokenChunker(
+                tokenizer,
+                min(chunk_tokens or window, window),
+                overlap_tokens
+            )
+        return _token_chunkers[key]
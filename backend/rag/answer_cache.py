@@ -0,0 +1,189 @@
+"""
+Semantic answer cache
+Short-circuits the LLM for near-duplicate questions over the same sources
+"""
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+from collections import OrderedDict
+import threading
+import numpy as np
+from backend.config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY_THRESHOLD
+)
+from backend.vector_store.chroma_client import get_chroma_client
+
+
+class SemanticAnswerCache:
+    """LRU cache of generated answers keyed by query embedding and source chunks"""
+    
+    def __init__(
+        self,
+        max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+        similarity_threshold: float = ANSWER_CACHE_SIMILARITY_THRESHOLD
+    ):
+        """
+        Initialize cache
+        
+        Args:
+            max_entries: Maximum number of cached answers
+            similarity_threshold: Minimum cosine similarity for a hit
+        """
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._next_id = 0
+        # entry id -> entry, in LRU order
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        # (language, chunk ids) -> entry ids; only entries in the same group can match
+        self._groups: Dict[Tuple[str, FrozenSet[str]], Set[int]] = {}
+        # chunk id -> entry ids that cite it, for invalidation on delete
+        self._chunk_index: Dict[str, Set[int]] = {}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def lookup(
+        self,
+        query_embedding: List[float],
+        language: str,
+        chunk_ids: List[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Find a cached answer for a similar query over the same chunks
+        
+        Args:
+            query_embedding: Embedding of the new query
+            language: Response language
+            chunk_ids: Ids of the chunks retrieved for the new query
+            
+        Returns:
+            Cached answer dictionary, or None on a miss
+        """
+        group_key = (language, frozenset(chunk_ids))
+        query_vector = self._normalize(query_embedding)
+        
+        with self._lock:
+            entry_ids = list(self._groups.get(group_key, ()))
+            if entry_ids:
+                matrix = np.stack([self._entries[entry_id]["embedding"] for entry_id in entry_ids])
+                similarities = matrix @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    entry_id = entry_ids[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return dict(self._entries[entry_id]["answer"])
+            
+            self.misses += 1
+            return None
+    
+    def store(
+        self,
+        query_embedding: List[float],
+        language: str,
+        chunk_ids: List[str],
+        answer: Dict[str, Any]
+    ):
+        """
+        Cache a generated answer
+        
+        Args:
+            query_embedding: Embedding of the query
+            language: Response language
+            chunk_ids: Ids of the chunks the answer was generated from
+            answer: Generator result to return on future hits
+        """
+        group_key = (language, frozenset(chunk_ids))
+        
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = {
+                "embedding": self._normalize(query_embedding),
+                "group": group_key,
+                "answer": dict(answer)
+            }
+            self._groups.setdefault(group_key, set()).add(entry_id)
+            for chunk_id in group_key[1]:
+                self._chunk_index.setdefault(chunk_id, set()).add(entry_id)
+            
+            while len(self._entries) > self.max_entries:
+                oldest_id = next(iter(self._entries))
+                self._remove(oldest_id)
+                self.evictions += 1
+    
+    def _remove(self, entry_id: int):
+        """Remove an entry and its index references (lock must be held)"""
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        
+        group = self._groups.get(entry["group"])
+        if group is not None:
+            group.discard(entry_id)
+            if not group:
+                del self._groups[entry["group"]]
+        
+        for chunk_id in entry["group"][1]:
+            cited_by = self._chunk_index.get(chunk_id)
+            if cited_by is not None:
+                cited_by.discard(entry_id)
+                if not cited_by:
+                    del self._chunk_index[chunk_id]
+    
+    def on_collection_change(self, operation: str, ids: List[str]):
+        """Drop answers citing deleted chunks or chunks whose metadata changed"""
+        with self._lock:
+            if operation == "reset":
+                self.invalidations += len(self._entries)
+                self._entries.clear()
+                self._groups.clear()
+                self._chunk_index.clear()
+            elif operation in ("delete", "update"):
+                stale: Set[int] = set()
+                for chunk_id in ids:
+                    stale.update(self._chunk_index.get(chunk_id, ()))
+                for entry_id in stale:
+                    self._remove(entry_id)
+                self.invalidations += len(stale)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "similarity_threshold": self.similarity_threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations
+            }
+
+
+# Global instance
+_answer_cache: Optional[SemanticAnswerCache] = None
+_answer_cache_lock = threading.Lock()
+
+
+def get_answer_cache() -> Optional[SemanticAnswerCache]:
+    """Get or create global answer cache; None when caching is disabled"""
+    global _answer_cache
+    if not ANSWER_CACHE_ENABLED:
+        return None
+    
+    with _answer_cache_lock:
+        if _answer_cache is None:
+            _answer_cache = SemanticAnswerCache()
+            get_chroma_client().add_change_listener(_answer_cache.on_collection_change)
+        return _answer_cache
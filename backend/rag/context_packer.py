@@ -0,0 +1,221 @@
+"""
+Token-budgeted context packing
+Fits retrieved chunks into the prompt by relevance per Mistral token and
+merges neighbouring chunks so their overlapping text is sent once
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from backend.llm.tokenizer import TokenCounter, get_token_counter
+from backend.vector_store.chroma_client import chunk_document_id, chunk_index
+
+
+# Shortest suffix/prefix match taken as chunker overlap when chunks have
+# no recorded offsets
+_MIN_TEXT_OVERLAP_CHARS = 20
+_MAX_TEXT_OVERLAP_CHARS = 600
+
+# Chunks this close (in characters) are contiguous text
+_ADJACENT_GAP_CHARS = 2
+
+
+class _Candidate:
+    """A retrieved chunk with what packing needs to know about it"""
+    
+    def __init__(self, rank: int, doc: Dict[str, Any], counter: TokenCounter):
+        metadata = doc.get("metadata") or {}
+        chunk_id = doc.get("id") or ""
+        self.rank = rank
+        self.text = (doc.get("text") or "").strip()
+        self.filename = metadata.get("filename", "Unknown")
+        self.page = metadata.get("page")
+        self.group = (chunk_document_id(chunk_id, metadata) if chunk_id else None, self.page)
+        self.index = metadata.get("chunk_index", chunk_index(chunk_id) if chunk_id else rank)
+        self.start = metadata.get("start_char")
+        self.end = metadata.get("end_char")
+        # Retrieval order already reflects fusion and re-ranking, so rank
+        # rather than a raw score measures relevance
+        self.relevance = 1.0 / (rank + 1)
+        self.tokens = counter.count(self.text)
+    
+    def position(self) -> Tuple[int, int]:
+        return (self.start if self.start is not None else -1, self.index)
+
+
+def _covered_prefix(first: _Candidate, second: _Candidate) -> Optional[int]:
+    """
+    Characters at the start of second already contained in first
+    
+    Args:
+        first: Chunk earlier in the same document and page
+        second: Following chunk
+    
+    Returns:
+        Length of the repeated text (0 for contiguous chunks), or None when
+        the chunks are not neighbours
+    """
+    if first.group != second.group or first.group[0] is None:
+        return None
+    
+    if None not in (first.start, first.end, second.start, second.end):
+        if second.start > first.end + _ADJACENT_GAP_CHARS:
+            return None
+        return min(max(0, first.end - second.start), len(second.text))
+    
+    # Chunks stored before offsets were recorded: consecutive chunks
+    # overlap by the chunker's overlap, found by matching text
+    if second.index != first.index + 1:
+        return None
+    longest = min(len(first.text), len(second.text), _MAX_TEXT_OVERLAP_CHARS)
+    for size in range(longest, _MIN_TEXT_OVERLAP_CHARS - 1, -1):
+        if second.text.startswith(first.text[-size:]):
+            return size
+    return 0
+
+
+def _join(text: str, following: str, covered: int) -> str:
+    """Append following to text, skipping its first covered characters"""
+    rest = following[covered:]
+    if not rest.strip():
+        return text
+    if covered and not rest[0].isspace():
+        # The overlap ended mid-word; continue the word
+        return text + rest.rstrip()
+    return text + ("\n" if not covered else " ") + rest.strip()
+
+
+class ContextPacker:
+    """Packs retrieved chunks into a token budget"""
+    
+    def __init__(self, counter: Optional[TokenCounter] = None):
+        self.counter = counter or get_token_counter()
+    
+    def pack(self, retrieved_docs: List[Dict[str, Any]], max_tokens: int) -> str:
+        """
+        Build the prompt context from retrieved chunks
+        
+        The top-ranked chunk is taken first whenever it fits; the rest are
+        chosen greedily by relevance per token of text they would add: text
+        shared with an already chosen neighbour is free, and a chunk that
+        does not fit no longer stops smaller ones after it.
+        Chosen neighbours are merged into one passage per run of
+        contiguous text.
+        
+        Args:
+            retrieved_docs: Retrieved documents, best first
+            max_tokens: Token budget for the whole context
+        
+        Returns:
+            Formatted context string
+        """
+        candidates = [
+            _Candidate(rank, doc, self.counter)
+            for rank, doc in enumerate(retrieved_docs)
+            if (doc.get("text") or "").strip()
+        ]
+        if not candidates or max_tokens <= 0:
+            return ""
+        
+        header_tokens = self.counter.count(self._header([candidates[0]]))
+        selected: List[_Candidate] = []
+        remaining = max_tokens
+        
+        # By density alone, a few short low-ranked chunks can use up the
+        # budget the top result needs, so it goes in first whenever it fits
+        top = candidates[0]
+        top_cost = self._marginal_tokens(top, selected, header_tokens)
+        if top_cost <= remaining:
+            selected.append(top)
+            remaining -= top_cost
+        
+        while True:
+            best = None
+            best_density = 0.0
+            best_cost = 0
+            for candidate in candidates:
+                if candidate in selected:
+                    continue
+                cost = self._marginal_tokens(candidate, selected, header_tokens)
+                density = candidate.relevance / max(cost, 1)
+                if cost <= remaining and density > best_density:
+                    best, best_density, best_cost = candidate, density, cost
+            if best is None:
+                break
+            selected.append(best)
+            remaining -= best_cost
+        
+        passages = self._merge(selected)
+        
+        # Costs were estimated per chunk; drop the least dense passages
+        # until the rendered context really fits, the top result's last
+        rendered = [(passage, self._render(passage)) for passage in passages]
+        counts = [self.counter.count(text) for _, text in rendered]
+        while rendered and sum(counts) > max_tokens:
+            droppable = [i for i in range(len(rendered)) if top not in rendered[i][0]] or range(len(rendered))
+            worst = min(
+                droppable,
+                key=lambda i: max(c.relevance for c in rendered[i][0]) / max(counts[i], 1)
+            )
+            del rendered[worst]
+            del counts[worst]
+        
+        if not rendered:
+            # Nothing fits whole; send the best chunk cut to the budget
+            body_budget = max_tokens - header_tokens
+            if body_budget <= 0:
+                return ""
+            return self._header([top]) + self.counter.truncate(top.text, body_budget) + "\n\n"
+        
+        return "".join(text for _, text in rendered)
+    
+    def _marginal_tokens(
+        self,
+        candidate: _Candidate,
+        selected: List[_Candidate],
+        header_tokens: int
+    ) -> int:
+        """Tokens a chunk would add given the chunks already chosen"""
+        before = [c for c in selected if c.group == candidate.group and c.position() < candidate.position()]
+        after = [c for c in selected if c.group == candidate.group and c.position() > candidate.position()]
+        previous = max(before, key=_Candidate.position) if before else None
+        following = min(after, key=_Candidate.position) if after else None
+        
+        covered_start = _covered_prefix(previous, candidate) if previous else None
+        covered_end = _covered_prefix(candidate, following) if following else None
+        
+        new_chars = len(candidate.text) - (covered_start or 0) - (covered_end or 0)
+        if new_chars <= 0:
+            return 0
+        # Scale the chunk's exact count rather than tokenizing every slice
+        cost = -(-candidate.tokens * new_chars // max(len(candidate.text), 1))
+        if covered_start is None and covered_end is None:
+            cost += header_tokens
+        return cost
+    
+    def _merge(self, selected: List[_Candidate]) -> List[List[_Candidate]]:
+        """Group chosen chunks into runs of neighbours, best run first"""
+        passages: List[List[_Candidate]] = []
+        for candidate in sorted(selected, key=lambda c: (str(c.group), c.position())):
+            if passages and _covered_prefix(passages[-1][-1], candidate) is not None:
+                passages[-1].append(candidate)
+            else:
+                passages.append([candidate])
+        passages.sort(key=lambda passage: min(c.rank for c in passage))
+        return passages
+    
+    def _header(self, passage: List[_Candidate]) -> str:
+        """Source line naming every chunk in a passage"""
+        numbers = ", ".join(str(c.rank + 1) for c in sorted(passage, key=lambda c: c.rank))
+        first = passage[0]
+        page_info = f" (Page {first.page})" if first.page else ""
+        return f"[Source {numbers}: {first.filename}{page_info}]\n"
+    
+    def _render(self, passage: List[_Candidate]) -> str:
+        """Passage text with overlaps between its chunks removed"""
+        text = passage[0].text
+        for previous, candidate in zip(passage, passage[1:]):
+            text = _join(text, candidate.text, _covered_prefix(previous, candidate) or 0)
+        return f"{self._header(passage)}{text}\n\n"
+
+
+def get_context_packer() -> ContextPacker:
+    """Get a ContextPacker instance"""
+    return ContextPacker()
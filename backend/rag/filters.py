@@ -0,0 +1,89 @@
+"""
+Metadata filters for retrieval
+Translates chat filters into a ChromaDB where clause so they are applied
+inside the vector search rather than after it
+"""
+from typing import List, Dict, Any, Optional
+from backend.features.governance import DOCUMENT_STATUSES
+
+
+def normalize_tag(value: Optional[str]) -> Optional[str]:
+    """
+    Normalize a course/department tag for storage and matching
+    
+    Chroma compares metadata exactly, so tags are lower-cased and
+    whitespace is collapsed on both the upload and the query side.
+    """
+    if value is None:
+        return None
+    tag = " ".join(value.split()).lower()
+    return tag or None
+
+
+def build_metadata_filter(
+    filename: Optional[str] = None,
+    file_type: Optional[str] = None,
+    page_start: Optional[int] = None,
+    page_end: Optional[int] = None,
+    status: Optional[str] = None,
+    course: Optional[str] = None,
+    department: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Build a ChromaDB where clause from chat filters
+    
+    Args:
+        filename: Exact original filename
+        file_type: File type such as "pdf" (leading dot optional)
+        page_start: First page (or slide) to include
+        page_end: Last page (or slide) to include
+        status: Governance status recorded on each chunk
+        course: Course tag given at upload
+        department: Department tag given at upload
+    
+    Returns:
+        Where clause, or None when no filter is set
+    """
+    conditions: List[Dict[str, Any]] = []
+    
+    if filename:
+        conditions.append({"filename": filename})
+    if file_type:
+        conditions.append({"file_type": file_type.lower().lstrip(".")})
+    if page_start is not None:
+        conditions.append({"page": {"$gte": page_start}})
+    if page_end is not None:
+        conditions.append({"page": {"$lte": page_end}})
+    
+    for key, value in (("course", course), ("department", department)):
+        tag = normalize_tag(value)
+        if tag:
+            conditions.append({key: tag})
+    
+    if status:
+        if status not in DOCUMENT_STATUSES:
+            raise ValueError(f"Invalid status filter. Supported: {DOCUMENT_STATUSES}")
+        conditions.append({"status": status})
+    
+    if not conditions:
+        return None
+    # Chroma requires at least two operands for $and
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+def require_approved(where: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Restrict a where clause to approved documents
+    
+    Args:
+        where: Existing where clause, if any
+        
+    Returns:
+        Where clause that also requires status "approved"
+    """
+    approved = {"status": "approved"}
+    if not where:
+        return approved
+    if "$and" in where:
+        return {"$and": where["$and"] + [approved]}
+    return {"$and": [where, approved]}
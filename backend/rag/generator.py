@@ -2,8 +2,9 @@
 Generator for RAG pipeline
 Generates answers using local Mistral model via Ollama
 """
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional
 from backend.llm.ollama_client import get_ollama_client
+from backend.rag.answer_cache import get_answer_cache
 from backend.config import SUPPORTED_LANGUAGES
 
 
@@ -12,13 +13,46 @@ class Generator:
     
     def __init__(self):
         self.ollama_client = get_ollama_client()
+        self.answer_cache = get_answer_cache()
+    
+    def _chunk_ids(self, retrieved_docs: Optional[List[Dict[str, Any]]]) -> Optional[List[str]]:
+        """Ids of the retrieved chunks, or None if any is unknown"""
+        if not retrieved_docs:
+            return None
+        ids = [doc.get("id") for doc in retrieved_docs]
+        return ids if all(ids) else None
+    
+    def _lookup_cached(
+        self,
+        query_embedding: Optional[List[float]],
+        language: str,
+        retrieved_docs: Optional[List[Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Look up a cached answer for a near-duplicate query"""
+        chunk_ids = self._chunk_ids(retrieved_docs)
+        if not self.answer_cache or query_embedding is None or chunk_ids is None:
+            return None
+        return self.answer_cache.lookup(query_embedding, language, chunk_ids)
+    
+    def _store_cached(
+        self,
+        query_embedding: Optional[List[float]],
+        language: str,
+        retrieved_docs: Optional[List[Dict[str, Any]]],
+        result: Dict[str, Any]
+    ):
+        """Cache a freshly generated answer"""
+        chunk_ids = self._chunk_ids(retrieved_docs)
+        if self.answer_cache and query_embedding is not None and chunk_ids is not None:
+            self.answer_cache.store(query_embedding, language, chunk_ids, result)
     
     def generate_answer(
         self,
         query: str,
         context: str,
         language: str = "en",
-        retrieved_docs: List[Dict[str, Any]] = None
+        retrieved_docs: List[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> Dict[str, Any]:
         """
         Generate answer using context and local Mistral model
@@ -28,10 +62,17 @@ class Generator:
             context: Retrieved context from documents
             language: Target language for response
             retrieved_docs: Original retrieved documents
+            query_embedding: Query embedding; enables the semantic answer cache
             
         Returns:
-            Dictionary with answer, sources, and confidence score
+            Dictionary with answer, sources, confidence score and whether
+            the answer came from the cache
         """
+        cached = self._lookup_cached(query_embedding, language, retrieved_docs)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+        
         try:
             # Build prompt with multilingual support
             prompt = self._build_prompt(query, context, language)
@@ -50,12 +91,88 @@ class Generator:
             # Format sources
             sources = self._format_sources(retrieved_docs or [])
             
-            return {
+            result = {
                 "answer": answer,
                 "sources": sources,
                 "confidence_score": confidence_score,
                 "language": language
             }
+            self._store_cached(query_embedding, language, retrieved_docs, result)
+            
+            return {**result, "cached": False}
+            
+        except Exception as e:
+            raise RuntimeError(f"Answer generation failed: {str(e)}")
+    
+    def stream_answer(
+        self,
+        query: str,
+        context: str,
+        language: str = "en",
+        retrieved_docs: List[Dict[str, Any]] = None,
+        query_embedding: Optional[List[float]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Generate answer as a stream of events
+        
+        Sources are emitted before the first token so the client can render
+        them while Mistral is still generating.
+        
+        Args:
+            query: User question
+            context: Retrieved context from documents
+            language: Target language for response
+            retrieved_docs: Original retrieved documents
+            query_embedding: Query embedding; enables the semantic answer cache
+            
+        Yields:
+            Event dictionaries: one "sources" event, a "token" event per
+            generated fragment and a final "done" event with the confidence score
+        """
+        sources = self._format_sources(retrieved_docs or [])
+        yield {"type": "sources", "sources": sources}
+        
+        cached = self._lookup_cached(query_embedding, language, retrieved_docs)
+        if cached is not None:
+            yield {"type": "token", "content": cached["answer"]}
+            yield {
+                "type": "done",
+                "answer": cached["answer"],
+                "confidence_score": cached["confidence_score"],
+                "language": language,
+                "cached": True
+            }
+            return
+        
+        try:
+            prompt = self._build_prompt(query, context, language)
+            
+            answer_parts = []
+            for fragment in self.ollama_client.stream(prompt):
+                answer_parts.append(fragment)
+                yield {"type": "token", "content": fragment}
+            
+            answer = "".join(answer_parts).strip()
+            confidence_score = self._calculate_confidence(
+                answer,
+                context,
+                retrieved_docs
+            )
+            
+            self._store_cached(query_embedding, language, retrieved_docs, {
+                "answer": answer,
+                "sources": sources,
+                "confidence_score": confidence_score,
+                "language": language
+            })
+            
+            yield {
+                "type": "done",
+                "answer": answer,
+                "confidence_score": confidence_score,
+                "language": language,
+                "cached": False
+            }
             
         except Exception as e:
             raise RuntimeError(f"Answer generation failed: {str(e)}")
@@ -0,0 +1,156 @@
+"""
+Query caching for the RAG pipeline
+LRU/TTL caches for query embeddings and retrieval results
+"""
+from typing import Any, Dict, List, Optional, Tuple, Hashable
+from collections import OrderedDict
+import json
+import threading
+import time
+from backend.config import (
+    QUERY_CACHE_ENABLED,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_TTL_SECONDS
+)
+from backend.vector_store.chroma_client import get_chroma_client
+
+
+class TTLLRUCache:
+    """Thread-safe LRU cache whose entries also expire after a TTL"""
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a value, or None if absent or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if time.monotonic() - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and hit rate"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+class QueryCache:
+    """Caches query embeddings and top-k results keyed by normalized query"""
+    
+    def __init__(self):
+        self.embeddings = TTLLRUCache(QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS)
+        self.results = TTLLRUCache(QUERY_CACHE_MAX_ENTRIES, QUERY_CACHE_TTL_SECONDS)
+    
+    @staticmethod
+    def normalize_query(query: str) -> str:
+        """Lower-case and collapse whitespace (the embedding model is uncased)"""
+        return " ".join(query.lower().split())
+    
+    def _results_key(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, int, str, str]:
+        filter_key = json.dumps(filter_metadata, sort_keys=True) if filter_metadata else ""
+        options_key = json.dumps(options, sort_keys=True) if options else ""
+        return (self.normalize_query(query), top_k, filter_key, options_key)
+    
+    def get_embedding(self, query: str) -> Optional[List[float]]:
+        """Get a cached query embedding"""
+        return self.embeddings.get(self.normalize_query(query))
+    
+    def put_embedding(self, query: str, embedding: List[float]):
+        """Cache a query embedding"""
+        self.embeddings.put(self.normalize_query(query), embedding)
+    
+    def get_results(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        options: Optional[Dict[str, Any]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Get cached retrieval results (options are retrieval settings such as fusion weights)"""
+        results = self.results.get(self._results_key(query, top_k, filter_metadata, options))
+        if results is None:
+            return None
+        # Hand out copies so callers cannot mutate cached entries
+        return [dict(doc) for doc in results]
+    
+    def put_results(
+        self,
+        query: str,
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]],
+        results: List[Dict[str, Any]],
+        options: Optional[Dict[str, Any]] = None
+    ):
+        """Cache retrieval results"""
+        self.results.put(
+            self._results_key(query, top_k, filter_metadata, options),
+            [dict(doc) for doc in results]
+        )
+    
+    def on_collection_change(self, operation: str, ids: List[str]):
+        """Invalidate retrieval results when the collection changes"""
+        self.results.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit rates for both caches"""
+        return {
+            "query_embeddings": self.embeddings.get_stats(),
+            "retrieval_results": self.results.get_stats()
+        }
+
+
+# Global instance
+_query_cache: Optional[QueryCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def get_query_cache() -> Optional[QueryCache]:
+    """Get or create global query cache; None when caching is disabled"""
+    global _query_cache
+    if not QUERY_CACHE_ENABLED:
+        return None
+    
+    with _query_cache_lock:
+        if _query_cache is None:
+            _query_cache = QueryCache()
+            get_chroma_client().add_change_listener(_query_cache.on_collection_change)
+        return _query_cache
@@ -0,0 +1,150 @@
+"""
+Cross-encoder re-ranking for retrieved chunks
+Scores (query, chunk) pairs with a small local cross-encoder on CPU
+"""
+from typing import List, Dict, Any, Optional
+import threading
+import time
+from sentence_transformers import CrossEncoder
+from backend.config import (
+    EMBEDDING_DEVICE,
+    RERANK_ENABLED,
+    RERANK_MODEL,
+    RERANK_BATCH_SIZE,
+    RERANK_MAX_LENGTH,
+    RERANK_LATENCY_BUDGET_MS,
+    RERANK_MAX_IN_FLIGHT,
+    RERANK_PROBE_INTERVAL
+)
+
+
+class Reranker:
+    """
+    Re-orders retrieval candidates with a cross-encoder
+    
+    Re-ranking is skipped when it would not fit the latency budget: when
+    too many requests are already re-ranking, or when the measured cost
+    per pair times the candidate count exceeds RERANK_LATENCY_BUDGET_MS.
+    Every RERANK_PROBE_INTERVAL skips one request runs anyway so the
+    cost estimate recovers once load drops.
+    """
+    
+    def __init__(self, model_name: str = RERANK_MODEL, device: str = EMBEDDING_DEVICE):
+        self.model_name = model_name
+        self.model = CrossEncoder(model_name, device=device, max_length=RERANK_MAX_LENGTH)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.runs = 0
+        self.skipped = 0
+        self._skips_since_run = 0
+        # Moving average of scoring time per (query, chunk) pair
+        self._seconds_per_pair: Optional[float] = None
+    
+    def _admit(self, candidates: int) -> bool:
+        """Decide whether a request may re-rank, reserving a slot if so"""
+        with self._lock:
+            over_budget = (
+                self.in_flight >= RERANK_MAX_IN_FLIGHT
+                or (
+                    self._seconds_per_pair is not None
+                    and self._seconds_per_pair * candidates * (self.in_flight + 1) * 1000
+                    > RERANK_LATENCY_BUDGET_MS
+                )
+            )
+            if over_budget and self._skips_since_run < RERANK_PROBE_INTERVAL:
+                self.skipped += 1
+                self._skips_since_run += 1
+                return False
+            
+            self.in_flight += 1
+            self._skips_since_run = 0
+            return True
+    
+    def rerank(
+        self,
+        query: str,
+        docs: List[Dict[str, Any]],
+        top_k: int
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Re-rank candidates and keep the best
+        
+        Args:
+            query: Search query
+            docs: Retrieved candidates
+            top_k: Number of documents to keep
+        
+        Returns:
+            Top documents with a "rerank_score", or None when re-ranking
+            was skipped to stay within the latency budget
+        """
+        if not docs:
+            return []
+        
+        if not self._admit(len(docs)):
+            return None
+        
+        start_time = time.time()
+        try:
+            scores = self.model.predict(
+                [(query, doc["text"]) for doc in docs],
+                batch_size=RERANK_BATCH_SIZE,
+                show_progress_bar=False
+            )
+        finally:
+            elapsed = time.time() - start_time
+            with self._lock:
+                self.in_flight -= 1
+                self.runs += 1
+                per_pair = elapsed / len(docs)
+                if self._seconds_per_pair is None:
+                    self._seconds_per_pair = per_pair
+                else:
+                    self._seconds_per_pair = 0.8 * self._seconds_per_pair + 0.2 * per_pair
+        
+        ranked = sorted(zip(docs, scores), key=lambda item: item[1], reverse=True)
+        reranked = []
+        for doc, score in ranked[:top_k]:
+            doc = dict(doc)
+            doc["rerank_score"] = float(score)
+            reranked.append(doc)
+        return reranked
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run/skip counts and the current cost estimate"""
+        with self._lock:
+            return {
+                "model": self.model_name,
+                "runs": self.runs,
+                "skipped": self.skipped,
+                "in_flight": self.in_flight,
+                "ms_per_pair": (
+                    round(self._seconds_per_pair * 1000, 3)
+                    if self._seconds_per_pair is not None else None
+                )
+            }
+
+
+# Global instance
+_reranker: Optional[Reranker] = None
+_reranker_failed = False
+_reranker_lock = threading.Lock()
+
+
+def get_reranker() -> Optional[Reranker]:
+    """Get or create global reranker; None when disabled or the model cannot load"""
+    global _reranker, _reranker_failed
+    if not RERANK_ENABLED or _reranker_failed:
+        return None
+    
+    with _reranker_lock:
+        if _reranker is None and not _reranker_failed:
+            try:
+                print(f"Loading re-ranking model: {RERANK_MODEL}...")
+                _reranker = Reranker()
+                print("✓ Re-ranking model loaded")
+            except Exception as e:
+                # Re-ranking is an optimization; retrieve without it
+                _reranker_failed = True
+                print(f"✗ Re-ranking disabled: {str(e)}")
+        return _reranker
@@ -1,11 +1,26 @@
 """
 Retriever for RAG pipeline
-Handles semantic search and context retrieval from ChromaDB
+Handles hybrid (dense + BM25) search and context retrieval from ChromaDB
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set, Tuple
+from collections import defaultdict
+import time
+import numpy as np
 from backend.vector_store.chroma_client import get_chroma_client
 from backend.llm.embeddings import get_embedding_model
-from backend.config import TOP_K_RETRIEVAL
+from backend.rag.query_cache import get_query_cache
+from backend.rag.reranker import get_reranker
+from backend.rag.filters import require_approved
+from backend.rag.context_packer import get_context_packer
+from backend.config import (
+    TOP_K_RETRIEVAL,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_RRF_K,
+    HYBRID_CANDIDATE_MULTIPLIER,
+    RERANK_CANDIDATE_MULTIPLIER,
+    RETRIEVAL_APPROVED_ONLY,
+    MAX_CONTEXT_TOKENS
+)
 
 
 class Retriever:
@@ -14,95 +29,275 @@ class Retriever:
     def __init__(self):
         self.chroma_client = get_chroma_client()
         self.embedding_model = get_embedding_model()
+        self.cache = get_query_cache()
+        self.lexical_index = self.chroma_client.lexical_index
+    
+    def embed_query(self, query: str) -> List[float]:
+        """
+        Embed a query, reusing cached embeddings of identical queries
+        
+        Args:
+            query: Search query
+        
+        Returns:
+            Embedding vector
+        """
+        if self.cache:
+            cached = self.cache.get_embedding(query)
+            if cached is not None:
+                return cached
+        
+        query_embedding = self.embedding_model.embed_query(query)
+        
+        if self.cache:
+            self.cache.put_embedding(query, query_embedding)
+        return query_embedding
     
     def retrieve(
         self,
         query: str,
         top_k: int = TOP_K_RETRIEVAL,
-        filter_metadata: Optional[Dict[str, Any]] = None
+        filter_metadata: Optional[Dict[str, Any]] = None,
+        lexical_weight: Optional[float] = None,
+        rerank: Optional[bool] = None,
+        timings: Optional[Dict[str, float]] = None,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Retrieve relevant documents for a query
         
+        Dense and BM25 rankings are merged with reciprocal rank fusion when
+        the lexical index is enabled; the fused candidates are then re-ranked
+        with a cross-encoder when the reranker is enabled and within budget.
+        Only approved documents are searched when RETRIEVAL_APPROVED_ONLY is set.
+        
         Args:
             query: Search query
             top_k: Number of documents to retrieve
             filter_metadata: Optional metadata filters
-            
+            lexical_weight: Share of the fused score given to BM25 (0-1);
+                defaults to HYBRID_LEXICAL_WEIGHT
+            rerank: Set False to skip re-ranking for this query
+            timings: Optional dict that receives per-stage durations in seconds
+            query_embedding: Embedding of the query, when the caller already
+                has it (e.g. for the answer cache); computed otherwise
+        
         Returns:
             List of retrieved documents with metadata
         """
+        timings = timings if timings is not None else {}
+        
+        # Pending and rejected documents are excluded inside the index so
+        # they never take top-k slots
+        if RETRIEVAL_APPROVED_ONLY:
+            filter_metadata = require_approved(filter_metadata)
+        
         try:
-            # Generate query embedding
-            query_embedding = self.embedding_model.embed_query(query)
+            if self.lexical_index is None:
+                lexical_weight = 0.0
+            elif lexical_weight is None:
+                lexical_weight = HYBRID_LEXICAL_WEIGHT
+            reranker = get_reranker() if rerank is not False else None
+            options = {"lexical_weight": lexical_weight, "rerank": reranker is not None}
             
-            # Search in ChromaDB
-            results = self.chroma_client.search(
-                query_embedding=query_embedding,
-                top_k=top_k,
-                filter_dict=filter_metadata
-            )
+            stage_start = time.time()
+            if self.cache:
+                cached = self.cache.get_results(query, top_k, filter_metadata, options)
+                if cached is not None:
+                    timings["cache"] = time.time() - stage_start
+                    return cached
+            
+            # Generate query embedding
+            if query_embedding is None:
+                stage_start = time.time()
+                query_embedding = self.embed_query(query)
+                timings["embedding"] = time.time() - stage_start
             
-            # Format results
-            retrieved_docs = []
+            # Over-fetch so the cross-encoder has candidates to promote
+            candidate_k = top_k * RERANK_CANDIDATE_MULTIPLIER if reranker else top_k
             
-            if results and "documents" in results:
-                docs = results["documents"][0] if results["documents"] else []
-                metadatas = results["metadatas"][0] if results["metadatas"] else []
-                distances = results["distances"][0] if results["distances"] else []
+            stage_start = time.time()
+            if lexical_weight > 0:
+                candidates = candidate_k * HYBRID_CANDIDATE_MULTIPLIER
+                dense_docs = self._dense_search(query_embedding, candidates, filter_metadata)
+                timings["dense_search"] = time.time() - stage_start
+                
+                stage_start = time.time()
+                lexical_hits = self._lexical_search(query, candidates, filter_metadata)
+                timings["lexical_search"] = time.time() - stage_start
                 
-                for i, doc in enumerate(docs):
-                    metadata = metadatas[i] if i < len(metadatas) else {}
-                    distance = distances[i] if i < len(distances) else 1.0
-                    
-                    # Convert distance to similarity score (0-1)
-                    # For cosine distance: similarity = 1 - distance
-                    similarity = max(0.0, 1.0 - distance)
-                    
-                    retrieved_docs.append({
-                        "text": doc,
-                        "metadata": metadata,
-                        "relevance_score": similarity
-                    })
+                stage_start = time.time()
+                retrieved_docs = self._fuse(
+                    dense_docs,
+                    lexical_hits,
+                    query_embedding,
+                    filter_metadata,
+                    lexical_weight,
+                    candidate_k
+                )
+                timings["fusion"] = time.time() - stage_start
+            else:
+                retrieved_docs = self._dense_search(query_embedding, candidate_k, filter_metadata)
+                timings["dense_search"] = time.time() - stage_start
             
-            return retrieved_docs
+            cacheable = True
+            if reranker:
+                stage_start = time.time()
+                reranked = reranker.rerank(query, retrieved_docs, top_k)
+                if reranked is None:
+                    # Skipped under load; don't cache the unranked order
+                    retrieved_docs = retrieved_docs[:top_k]
+                    cacheable = False
+                else:
+                    retrieved_docs = reranked
+                    timings["rerank"] = time.time() - stage_start
+            
+            if self.cache and cacheable:
+                self.cache.put_results(query, top_k, filter_metadata, retrieved_docs, options)
             
+            return retrieved_docs
+        
         except Exception as e:
             raise RuntimeError(f"Retrieval failed: {str(e)}")
     
-    def build_context(self, retrieved_docs: List[Dict[str, Any]], max_length: int = 4000) -> str:
+    def _dense_search(
+        self,
+        query_embedding: List[float],
+        top_k: int,
+        filter_metadata: Optional[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Search ChromaDB and format the results, best first"""
+        results = self.chroma_client.search(
+            query_embedding=query_embedding,
+            top_k=top_k,
+            filter_dict=filter_metadata
+        )
+        
+        # Format results
+        retrieved_docs = []
+        
+        if results and "documents" in results:
+            docs = results["documents"][0] if results["documents"] else []
+            metadatas = results["metadatas"][0] if results["metadatas"] else []
+            distances = results["distances"][0] if results["distances"] else []
+            ids = results["ids"][0] if results.get("ids") else []
+            
+            for i, doc in enumerate(docs):
+                metadata = metadatas[i] if i < len(metadatas) else {}
+                distance = distances[i] if i < len(distances) else 1.0
+                
+                # Convert distance to similarity score (0-1)
+                # For cosine distance: similarity = 1 - distance
+                similarity = max(0.0, 1.0 - distance)
+                
+                retrieved_docs.append({
+                    "id": ids[i] if i < len(ids) else None,
+                    "text": doc,
+                    "metadata": metadata,
+                    "relevance_score": similarity
+                })
+        
+        return retrieved_docs
+    
+    def _lexical_search(
+        self,
+        query: str,
+        limit: int,
+        filter_metadata: Optional[Dict[str, Any]]
+    ) -> List[Tuple[str, float]]:
+        """
+        BM25 search restricted to chunks that pass the metadata filter
+        
+        The BM25 index holds no metadata, so each page of its ranking is
+        checked against ChromaDB; rejected chunks do not use up slots.
+        """
+        if not filter_metadata:
+            return self.lexical_index.search(query, limit)
+        
+        def accept(chunk_ids: List[str]) -> Set[str]:
+            return {
+                doc["id"]
+                for doc in self.chroma_client.get_documents_by_ids(
+                    chunk_ids,
+                    include=["metadatas"],
+                    where=filter_metadata
+                )
+            }
+        
+        return self.lexical_index.search(query, limit, accept=accept)
+    
+    def _fuse(
+        self,
+        dense_docs: List[Dict[str, Any]],
+        lexical_hits: List[Tuple[str, float]],
+        query_embedding: List[float],
+        filter_metadata: Optional[Dict[str, Any]],
+        lexical_weight: float,
+        top_k: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Merge dense and lexical rankings with weighted reciprocal rank fusion
+        
+        Args:
+            dense_docs: Dense results, best first
+            lexical_hits: (chunk_id, bm25_score) pairs, best first
+            query_embedding: Query embedding, used to score lexical-only hits
+            filter_metadata: Metadata filter, also applied to lexical-only hits
+            lexical_weight: Share of the fused score given to BM25
+            top_k: Number of documents to return
+        
+        Returns:
+            Fused documents, best first
+        """
+        scores: Dict[str, float] = defaultdict(float)
+        for rank, doc in enumerate(dense_docs, 1):
+            scores[doc["id"]] += (1.0 - lexical_weight) / (HYBRID_RRF_K + rank)
+        for rank, (chunk_id, _) in enumerate(lexical_hits, 1):
+            scores[chunk_id] += lexical_weight / (HYBRID_RRF_K + rank)
+        
+        docs_by_id = {doc["id"]: doc for doc in dense_docs}
+        
+        # Chunks only BM25 found still need their text, and must pass the filter
+        missing = [chunk_id for chunk_id, _ in lexical_hits if chunk_id not in docs_by_id]
+        if missing:
+            fetched = self.chroma_client.get_documents_by_ids(
+                missing,
+                include=["documents", "metadatas", "embeddings"],
+                where=filter_metadata
+            )
+            query_vector = np.asarray(query_embedding, dtype=np.float32)
+            query_norm = np.linalg.norm(query_vector) or 1.0
+            for doc in fetched:
+                embedding = doc.pop("embedding", None)
+                similarity = 0.0
+                if embedding is not None:
+                    vector = np.asarray(embedding, dtype=np.float32)
+                    similarity = float(vector @ query_vector) / ((np.linalg.norm(vector) or 1.0) * query_norm)
+                doc["relevance_score"] = max(0.0, similarity)
+                docs_by_id[doc["id"]] = doc
+        
+        ranked = sorted(
+            (chunk_id for chunk_id in scores if chunk_id in docs_by_id),
+            key=lambda chunk_id: scores[chunk_id],
+            reverse=True
+        )
+        return [docs_by_id[chunk_id] for chunk_id in ranked[:top_k]]
+    
+    def build_context(self, retrieved_docs: List[Dict[str, Any]], max_tokens: int = MAX_CONTEXT_TOKENS) -> str:
         """
         Build context string from retrieved documents
         
+        Chunks are packed by relevance per Mistral token, with overlapping
+        neighbours merged; see ContextPacker.
+        
         Args:
             retrieved_docs: List of retrieved documents
-            max_length: Maximum context length in characters
-            
+            max_tokens: Maximum context length in Mistral tokens
+        
         Returns:
             Formatted context string
         """
-        context_parts = []
-        current_length = 0
-        
-        for i, doc in enumerate(retrieved_docs, 1):
-            text = doc["text"]
-            metadata = doc["metadata"]
-            
-            # Format with source information
-            source = metadata.get("filename", "Unknown")
-            page = metadata.get("page", "")
-            page_info = f" (Page {page})" if page else ""
-            
-            doc_text = f"[Source {i}: {source}{page_info}]\n{text}\n\n"
-            
-            # Check if adding this would exceed max length
-            if current_length + len(doc_text) > max_length:
-                break
-            
-            context_parts.append(doc_text)
-            current_length += len(doc_text)
-        
-        return "".join(context_parts)
+        return get_context_packer().pack(retrieved_docs, max_tokens)
 
 
 def get_retriever() -> Retriever:
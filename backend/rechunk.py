@@ -0,0 +1,140 @@
+"""
+Re-chunk migration
+Re-chunks and re-embeds stored documents whose chunking profile settings
+changed since they were ingested
+
+Usage:
+    python -m backend.rechunk [--dry-run] [--all] [--document-id ID ...]
+
+Run it with the server stopped; ChromaDB's local store should not be
+written from two processes at once. Only chunks whose text changed are
+re-embedded, and approval status is kept.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+from pathlib import Path
+import argparse
+from backend.config import UPLOADS_DIR, CHUNKING_PROFILES, EVICT_REJECTED_DOCUMENTS
+from backend.processors.chunking import select_chunking_profile, get_chunker, chunker_fingerprint
+from backend.ingestion.pipeline import ingest_document
+from backend.features.governance import get_governance_panel
+from backend.features.knowledge_graph import get_knowledge_graph
+
+
+def find_stale_documents(
+    force: bool = False,
+    document_ids: Optional[List[str]] = None
+) -> List[Tuple[Dict[str, Any], str]]:
+    """
+    Find documents chunked with settings other than their profile's current ones
+    
+    Args:
+        force: Treat every document as stale
+        document_ids: Only consider these documents
+    
+    Returns:
+        (governance record, chunking profile to use) pairs
+    """
+    fingerprints = {name: chunker_fingerprint(get_chunker(name)) for name in CHUNKING_PROFILES}
+    stale = []
+    
+    for record in get_governance_panel().get_all_documents():
+        if document_ids and record["document_id"] not in document_ids:
+            continue
+        profile = select_chunking_profile(record["filename"], f".{record['file_type']}")
+        if force or record.get("chunking_fingerprint") != fingerprints[profile]:
+            stale.append((record, profile))
+    
+    return stale
+
+
+def _locate_upload(record: Dict[str, Any]) -> Optional[Path]:
+    """Saved upload of a document, if it is still on disk"""
+    if record.get("file_path") and Path(record["file_path"]).exists():
+        return Path(record["file_path"])
+    return next(UPLOADS_DIR.glob(f"{record['document_id']}_*"), None)
+
+
+def rechunk_documents(stale: List[Tuple[Dict[str, Any], str]]) -> Dict[str, int]:
+    """
+    Re-ingest documents with their current chunking profile
+    
+    Args:
+        stale: (governance record, chunking profile) pairs
+    
+    Returns:
+        Counts of documents re-chunked and failed, and chunks before,
+        after and re-embedded
+    """
+    totals = {"documents": 0, "failed": 0, "chunks_before": 0, "chunks_after": 0, "reembedded": 0}
+    
+    for record, profile in stale:
+        document_id = record["document_id"]
+        if EVICT_REJECTED_DOCUMENTS and record["status"] == "rejected":
+            continue
+        
+        file_path = _locate_upload(record)
+        if file_path is None:
+            print(f"✗ {record['filename']} ({document_id}): uploaded file not found")
+            totals["failed"] += 1
+            continue
+        
+        try:
+            result = ingest_document(
+                document_id=document_id,
+                file_path=file_path,
+                filename=record["filename"],
+                file_ext=f".{record['file_type']}",
+                tags={key: record[key] for key in ("course", "department") if record.get(key)},
+                content_hash=record.get("content_hash"),
+                keep_status=True
+            )
+        except Exception as e:
+            print(f"✗ {record['filename']} ({document_id}): {str(e)}")
+            totals["failed"] += 1
+            continue
+        
+        before = record.get("total_chunks") or 0
+        totals["documents"] += 1
+        totals["chunks_before"] += before
+        totals["chunks_after"] += result["total_chunks"]
+        totals["reembedded"] += result["reembedded_chunks"]
+        print(
+            f"✓ {record['filename']} [{profile}]: {before} -> {result['total_chunks']} chunks, "
+            f"{result['reembedded_chunks']} re-embedded"
+        )
+    
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-chunk documents whose chunking profile changed")
+    parser.add_argument("--dry-run", action="store_true", help="List stale documents without re-chunking")
+    parser.add_argument("--all", action="store_true", help="Re-chunk every document")
+    parser.add_argument("--document-id", action="append", help="Only consider this document (repeatable)")
+    args = parser.parse_args()
+    
+    stale = find_stale_documents(force=args.all, document_ids=args.document_id)
+    print(f"{len(stale)} document(s) to re-chunk")
+    for record, profile in stale:
+        print(
+            f"  {record['filename']} ({record['document_id']}): "
+            f"{record.get('chunking_profile') or 'unrecorded'} -> {profile}"
+        )
+    if args.dry_run or not stale:
+        return
+    
+    try:
+        totals = rechunk_documents(stale)
+    finally:
+        # Queued graph extraction is picked up by the backfill at next startup
+        get_knowledge_graph().shutdown()
+    
+    print(
+        f"\n✅ Re-chunked {totals['documents']} document(s), {totals['failed']} failed: "
+        f"{totals['chunks_before']} -> {totals['chunks_after']} chunks, "
+        f"{totals['reembedded']} re-embedded"
+    )
+
+
+if __name__ == "__main__":
+    main()
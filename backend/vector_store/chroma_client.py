@@ -2,9 +2,32 @@
 ChromaDB client for persistent local vector storage
 No external APIs - fully local
 """
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Callable, Iterator
 import chromadb
-from backend.config import CHROMA_DB_DIR, CHROMA_COLLECTION_NAME, CHROMA_DISTANCE_METRIC
+from backend.config import (
+    CHROMA_DB_DIR,
+    CHROMA_COLLECTION_NAME,
+    CHROMA_DISTANCE_METRIC,
+    CHROMA_PAGE_SIZE
+)
+from backend.vector_store.lexical_index import get_lexical_index
+
+
+def chunk_document_id(chunk_id: str, metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Get the document id a chunk belongs to
+    
+    Chunk ids are "{document_id}_{index}"; metadata wins when it records the id.
+    """
+    if metadata and metadata.get("document_id"):
+        return metadata["document_id"]
+    return chunk_id.rsplit("_", 1)[0]
+
+
+def chunk_index(chunk_id: str) -> int:
+    """Get a chunk's position within its document from its id"""
+    suffix = chunk_id.rsplit("_", 1)[-1]
+    return int(suffix) if suffix.isdigit() else 0
 
 
 class ChromaDBClient:
@@ -16,6 +39,10 @@ class ChromaDBClient:
         self.distance_metric = CHROMA_DISTANCE_METRIC
         self.client: Optional[chromadb.Client] = None
         self.collection = None
+        # Called with (operation, ids) after the collection changes
+        self._change_listeners: List[Callable[[str, List[str]], None]] = []
+        # BM25 index kept in step with the collection (None when disabled)
+        self.lexical_index = get_lexical_index()
         self._initialize()
     
     def _initialize(self):
@@ -65,6 +92,50 @@ class ChromaDBClient:
             print(f"✓ Added {len(texts)} documents to ChromaDB")
         except Exception as e:
             raise RuntimeError(f"Failed to add documents: {str(e)}")
+        
+        if self.lexical_index:
+            try:
+                self.lexical_index.add(ids, texts)
+            except Exception as e:
+                # The startup backfill picks up chunks missing from the index
+                print(f"✗ Lexical index update failed: {str(e)}")
+        
+        self._notify_change("add", ids)
+    
+    def upsert_documents(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ):
+        """
+        Add documents, replacing any existing chunks with the same ids
+        
+        Args:
+            texts: List of text chunks
+            embeddings: List of embedding vectors
+            metadatas: List of metadata dicts
+            ids: List of unique IDs for documents
+        """
+        try:
+            self.collection.upsert(
+                documents=texts,
+                embeddings=embeddings,
+                metadatas=metadatas,
+                ids=ids
+            )
+            print(f"✓ Upserted {len(texts)} documents in ChromaDB")
+        except Exception as e:
+            raise RuntimeError(f"Failed to upsert documents: {str(e)}")
+        
+        if self.lexical_index:
+            try:
+                self.lexical_index.add(ids, texts)
+            except Exception as e:
+                print(f"✗ Lexical index update failed: {str(e)}")
+        
+        self._notify_change("update", ids)
     
     def search(
         self,
@@ -108,6 +179,59 @@ class ChromaDBClient:
             print(f"✓ Deleted {len(ids)} documents")
         except Exception as e:
             raise RuntimeError(f"Failed to delete documents: {str(e)}")
+        
+        if self.lexical_index:
+            try:
+                self.lexical_index.remove(ids)
+            except Exception as e:
+                print(f"✗ Lexical index update failed: {str(e)}")
+        
+        self._notify_change("delete", ids)
+    
+    def update_metadatas(self, ids: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Replace the metadata of existing chunks
+        
+        Args:
+            ids: Chunk ids
+            metadatas: Complete metadata dict for each chunk
+        """
+        try:
+            for start in range(0, len(ids), CHROMA_PAGE_SIZE):
+                self.collection.update(
+                    ids=ids[start:start + CHROMA_PAGE_SIZE],
+                    metadatas=metadatas[start:start + CHROMA_PAGE_SIZE]
+                )
+        except Exception as e:
+            raise RuntimeError(f"Failed to update documents: {str(e)}")
+        
+        self._notify_change("update", ids)
+    
+    def update_document_metadata(self, document_id: str, updates: Dict[str, Any]) -> int:
+        """
+        Merge fields into the metadata of every chunk of a document
+        
+        Args:
+            document_id: Document identifier recorded in chunk metadata
+            updates: Fields to set
+            
+        Returns:
+            Number of chunks updated
+        """
+        chunks = list(self.iter_documents(where={"document_id": document_id}, include=["metadatas"]))
+        if chunks:
+            self.update_metadatas(
+                [doc["id"] for doc in chunks],
+                [{**doc["metadata"], **updates} for doc in chunks]
+            )
+        return len(chunks)
+    
+    def get_document_chunk_ids(self, document_id: str) -> List[str]:
+        """Get the ids of a document's chunks"""
+        return [
+            doc["id"]
+            for doc in self.iter_documents(where={"document_id": document_id}, include=["metadatas"])
+        ]
     
     def reset_collection(self):
         """Reset the entire collection (use with caution!)"""
@@ -120,36 +244,133 @@ class ChromaDBClient:
             print("✓ Collection reset")
         except Exception as e:
             raise RuntimeError(f"Failed to reset collection: {str(e)}")
+        
+        if self.lexical_index:
+            self.lexical_index.clear()
+        
+        self._notify_change("reset", [])
+    
+    def add_change_listener(self, listener: Callable[[str, List[str]], None]):
+        """
+        Register a callback for collection changes
+        
+        Args:
+            listener: Callable receiving the operation ("add", "delete",
+                "update" or "reset") and the affected chunk ids
+        """
+        self._change_listeners.append(listener)
+    
+    def _notify_change(self, operation: str, ids: List[str]):
+        """Notify listeners that the collection changed"""
+        for listener in self._change_listeners:
+            try:
+                listener(operation, ids)
+            except Exception as e:
+                print(f"Change listener failed: {str(e)}")
+    
+    def iter_documents(
+        self,
+        batch_size: int = CHROMA_PAGE_SIZE,
+        where: Optional[Dict[str, Any]] = None,
+        include: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the collection one page at a time
+        
+        Only one page is held in memory, so full-corpus scans stay bounded.
+        
+        Args:
+            batch_size: Chunks fetched per page
+            where: Optional metadata filter
+            include: Fields to fetch ("documents", "metadatas", "embeddings");
+                defaults to documents and metadatas
+            
+        Yields:
+            Dicts with id, text and metadata (and embedding when included)
+        """
+        include = include if include is not None else ["documents", "metadatas"]
+        offset = 0
+        
+        while True:
+            try:
+                results = self.collection.get(
+                    where=where,
+                    include=include,
+                    limit=batch_size,
+                    offset=offset
+                )
+            except Exception as e:
+                raise RuntimeError(f"Failed to page through collection: {str(e)}")
+            
+            ids = results.get("ids") or []
+            if not ids:
+                break
+            
+            yield from self._combine_results(results, include)
+            
+            if len(ids) < batch_size:
+                break
+            offset += batch_size
+    
+    def get_documents_by_ids(
+        self,
+        ids: List[str],
+        include: Optional[List[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Get specific chunks by id
+        
+        Args:
+            ids: Chunk ids
+            include: Fields to fetch; defaults to documents and metadatas
+            where: Optional metadata filter; non-matching chunks are left out
+            
+        Returns:
+            Dicts with id, text and metadata, in collection order
+        """
+        if not ids:
+            return []
+        include = include if include is not None else ["documents", "metadatas"]
+        try:
+            results = self.collection.get(ids=ids, where=where, include=include)
+        except Exception as e:
+            raise RuntimeError(f"Failed to get documents: {str(e)}")
+        return list(self._combine_results(results, include))
+    
+    def _combine_results(self, results: Dict[str, Any], include: List[str]) -> Iterator[Dict[str, Any]]:
+        """Zip a collection.get() result into one dict per chunk"""
+        ids = results.get("ids") or []
+        documents = results.get("documents")
+        metadatas = results.get("metadatas")
+        embeddings = results.get("embeddings") if "embeddings" in include else None
+        
+        for i, chunk_id in enumerate(ids):
+            doc = {
+                "id": chunk_id,
+                "text": documents[i] if documents is not None and i < len(documents) else "",
+                "metadata": (metadatas[i] if metadatas is not None and i < len(metadatas) else None) or {}
+            }
+            if embeddings is not None and i < len(embeddings):
+                doc["embedding"] = embeddings[i]
+            yield doc
     
     def get_all_documents_metadata(self) -> List[Dict[str, Any]]:
-        """Get metadata for all documents"""
+        """Get metadata for all documents (prefer iter_documents for large collections)"""
         try:
-            results = self.collection.get()
-            metadatas = results.get("metadatas", [])
-            return metadatas
+            return [doc["metadata"] for doc in self.iter_documents(include=["metadatas"])]
         except Exception as e:
             print(f"Error getting all documents: {str(e)}")
             return []
     
     def get_all_documents(self) -> List[Dict[str, Any]]:
-        """Get all documents with their text content and metadata"""
+        """
+        Get all documents with their text content and metadata
+        
+        Loads the whole collection; prefer iter_documents for large collections.
+        """
         try:
-            results = self.collection.get()
-            documents = results.get("documents", [])
-            metadatas = results.get("metadatas", [])
-            ids = results.get("ids", [])
-            
-            # Combine text, metadata, and id into a single dict
-            docs = []
-            for i in range(len(documents)):
-                doc = {
-                    "id": ids[i] if i < len(ids) else "",
-                    "text": documents[i] if i < len(documents) else "",
-                    "metadata": metadatas[i] if i < len(metadatas) else {}
-                }
-                docs.append(doc)
-            
-            return docs
+            return list(self.iter_documents())
         except Exception as e:
             print(f"Error getting all documents: {str(e)}")
             return []
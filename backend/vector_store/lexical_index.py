@@ -0,0 +1,323 @@
+"""
+Persistent BM25 inverted index
+Keeps a lexical index of chunk text next to ChromaDB so exact terms
+(course codes, algorithm names) can be matched alongside dense search
+"""
+from typing import List, Dict, Any, Callable, Optional, Set, Tuple
+from collections import Counter
+from pathlib import Path
+import math
+import re
+import sqlite3
+import threading
+from backend.config import (
+    LEXICAL_INDEX_ENABLED,
+    LEXICAL_INDEX_PATH,
+    LEXICAL_INDEX_MMAP_BYTES,
+    BM25_K1,
+    BM25_B
+)
+
+
+# Postings are clustered by term (WITHOUT ROWID), so a query term reads one
+# contiguous range of pages; chunk ids are stored once and referenced by rowid
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    doc INTEGER PRIMARY KEY,
+    chunk_id TEXT NOT NULL UNIQUE,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    term TEXT PRIMARY KEY,
+    df INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings (doc);
+CREATE TABLE IF NOT EXISTS corpus (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    chunk_count INTEGER NOT NULL,
+    total_length INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO corpus (id, chunk_count, total_length) VALUES (0, 0, 0);
+"""
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+_STOPWORDS = frozenset("""
+a an and are as at be by for from has have in is it its of on or that the
+this to was were what when where which who why will with how do does can
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lower-case index terms
+    
+    Alphanumeric runs are kept whole so "CS301" stays one term; stopwords
+    and single letters are dropped.
+    """
+    return [
+        token for token in _TOKEN_PATTERN.findall(text.lower())
+        if token not in _STOPWORDS and (len(token) > 1 or token.isdigit())
+    ]
+
+
+class LexicalIndex:
+    """BM25 index over chunk text stored in SQLite"""
+    
+    def __init__(self, db_path: Path = LEXICAL_INDEX_PATH):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._connect().executescript(_SCHEMA)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's database connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # Reads go through the OS page cache instead of SQLite's own,
+            # so nothing is loaded up front
+            conn.execute(f"PRAGMA mmap_size={int(LEXICAL_INDEX_MMAP_BYTES)}")
+            self._local.conn = conn
+        return conn
+    
+    def add(self, ids: List[str], texts: List[str]):
+        """
+        Index chunks, replacing any existing entries with the same ids
+        
+        Args:
+            ids: Chunk ids
+            texts: Chunk texts
+        """
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete_chunks(conn, ids)
+                
+                total_length = 0
+                for chunk_id, text in zip(ids, texts):
+                    counts = Counter(tokenize(text or ""))
+                    length = sum(counts.values())
+                    doc = conn.execute(
+                        "INSERT INTO chunks (chunk_id, length) VALUES (?, ?)",
+                        (chunk_id, length)
+                    ).lastrowid
+                    conn.executemany(
+                        "INSERT INTO postings (term, doc, tf) VALUES (?, ?, ?)",
+                        [(term, doc, tf) for term, tf in counts.items()]
+                    )
+                    conn.executemany(
+                        "INSERT INTO terms (term, df) VALUES (?, 1) "
+                        "ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                        [(term,) for term in counts]
+                    )
+                    total_length += length
+                
+                conn.execute(
+                    "UPDATE corpus SET chunk_count = chunk_count + ?, total_length = total_length + ?",
+                    (len(ids), total_length)
+                )
+                conn.commit()
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+    
+    def remove(self, ids: List[str]):
+        """
+        Remove chunks from the index
+        
+        Args:
+            ids: Chunk ids
+        """
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                self._delete_chunks(conn, ids)
+                conn.commit()
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+    
+    def _delete_chunks(self, conn: sqlite3.Connection, ids: List[str]):
+        """Delete chunks and their postings inside the caller's transaction"""
+        removed = 0
+        removed_length = 0
+        
+        for start in range(0, len(ids), _LOOKUP_BATCH_SIZE):
+            batch = ids[start:start + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = conn.execute(
+                f"SELECT doc, length FROM chunks WHERE chunk_id IN ({placeholders})",
+                batch
+            ).fetchall()
+            
+            for doc, length in rows:
+                conn.execute(
+                    "UPDATE terms SET df = df - 1 "
+                    "WHERE term IN (SELECT term FROM postings WHERE doc = ?)",
+                    (doc,)
+                )
+                conn.execute("DELETE FROM postings WHERE doc = ?", (doc,))
+                conn.execute("DELETE FROM chunks WHERE doc = ?", (doc,))
+                removed += 1
+                removed_length += length
+        
+        if removed:
+            conn.execute("DELETE FROM terms WHERE df <= 0")
+            conn.execute(
+                "UPDATE corpus SET chunk_count = chunk_count - ?, total_length = total_length - ?",
+                (removed, removed_length)
+            )
+    
+    def clear(self):
+        """Remove every chunk from the index"""
+        with self._write_lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM postings")
+                conn.execute("DELETE FROM terms")
+                conn.execute("DELETE FROM chunks")
+                conn.execute("UPDATE corpus SET chunk_count = 0, total_length = 0")
+    
+    def search(
+        self,
+        query: str,
+        limit: int,
+        accept: Optional[Callable[[List[str]], Set[str]]] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Rank chunks against a query with BM25
+        
+        Scores are summed and sorted inside SQLite, so only the returned
+        chunks reach Python, however many chunks contain a common term.
+        
+        Args:
+            query: Search query
+            limit: Maximum number of chunks to return
+            accept: Optional filter called with a page of chunk ids (best
+                first) that returns the ids to keep. Rejected chunks do
+                not count toward limit; further pages are checked until
+                limit chunks are accepted or the ranking runs out.
+        
+        Returns:
+            (chunk_id, score) pairs, best first
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or limit <= 0:
+            return []
+        
+        conn = self._connect()
+        chunk_count, total_length = conn.execute(
+            "SELECT chunk_count, total_length FROM corpus"
+        ).fetchone()
+        if not chunk_count:
+            return []
+        avg_length = total_length / chunk_count or 1.0
+        
+        placeholders = ",".join("?" * len(terms))
+        document_frequencies = conn.execute(
+            f"SELECT term, df FROM terms WHERE term IN ({placeholders})",
+            terms
+        ).fetchall()
+        
+        if not document_frequencies:
+            return []
+        
+        # One (term, idf) row per query term; each chunk's BM25 score is
+        # the sum over its postings for those terms
+        weights = []
+        for term, df in document_frequencies:
+            weights.extend((term, math.log(1 + (chunk_count - df + 0.5) / (df + 0.5))))
+        rows = ",".join("(?, ?)" for _ in document_frequencies)
+        sql = (
+            f"WITH weights (term, idf) AS (VALUES {rows}) "
+            "SELECT p.doc, SUM(w.idf * p.tf * ? / (p.tf + ? * (1 - ? + ? * c.length / ?))) AS score "
+            "FROM weights w JOIN postings p ON p.term = w.term "
+            "JOIN chunks c ON c.doc = p.doc "
+            "GROUP BY p.doc ORDER BY score DESC, p.doc"
+        )
+        params = weights + [BM25_K1 + 1, BM25_K1, BM25_B, BM25_B, float(avg_length)]
+        
+        if accept is None:
+            return self._resolve(conn, conn.execute(sql + " LIMIT ?", params + [limit]).fetchall())
+        
+        # Walk the ranking a page at a time; pages double so a selective
+        # filter needs few rounds
+        ranking = conn.execute(sql, params)
+        hits: List[Tuple[str, float]] = []
+        page_size = limit
+        try:
+            while len(hits) < limit:
+                ranked = ranking.fetchmany(page_size)
+                if not ranked:
+                    break
+                page = self._resolve(conn, ranked)
+                accepted = accept([chunk_id for chunk_id, _ in page]) if page else set()
+                hits.extend(hit for hit in page if hit[0] in accepted)
+                page_size *= 2
+        finally:
+            ranking.close()
+        return hits[:limit]
+    
+    def _resolve(self, conn: sqlite3.Connection, ranked: List[Tuple[int, float]]) -> List[Tuple[str, float]]:
+        """Replace internal doc numbers with chunk ids, keeping the order"""
+        if not ranked:
+            return []
+        chunk_ids: Dict[int, str] = {}
+        for start in range(0, len(ranked), _LOOKUP_BATCH_SIZE):
+            docs = [doc for doc, _ in ranked[start:start + _LOOKUP_BATCH_SIZE]]
+            placeholders = ",".join("?" * len(docs))
+            chunk_ids.update(conn.execute(
+                f"SELECT doc, chunk_id FROM chunks WHERE doc IN ({placeholders})",
+                docs
+            ).fetchall())
+        return [(chunk_ids[doc], score) for doc, score in ranked if doc in chunk_ids]
+    
+    def get_indexed_chunk_ids(self) -> Set[str]:
+        """Ids of all indexed chunks"""
+        rows = self._connect().execute("SELECT chunk_id FROM chunks").fetchall()
+        return {row[0] for row in rows}
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index size"""
+        conn = self._connect()
+        chunk_count, total_length = conn.execute(
+            "SELECT chunk_count, total_length FROM corpus"
+        ).fetchone()
+        return {
+            "chunks": chunk_count,
+            "terms": conn.execute("SELECT COUNT(*) FROM terms").fetchone()[0],
+            "avg_chunk_terms": round(total_length / chunk_count, 1) if chunk_count else 0.0
+        }
+
+
+# Global instance
+_lexical_index: Optional[LexicalIndex] = None
+_lexical_index_lock = threading.Lock()
+
+
+def get_lexical_index() -> Optional[LexicalIndex]:
+    """Get or create global lexical index; None when hybrid retrieval is disabled"""
+    global _lexical_index
+    if not LEXICAL_INDEX_ENABLED:
+        return None
+    
+    with _lexical_index_lock:
+        if _lexical_index is None:
+            _lexical_index = LexicalIndex()
+        return _lexical_index
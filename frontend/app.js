@@ -19,7 +19,7 @@ const translations = {
         sendButton: "Send",
         uploadTitle: "Drag & Drop Documents",
         uploadSubtitle: "or click to browse",
-        uploadHint: "Supported: PDF, DOCX, PPTX",
+        uploadHint: "Supported: PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "Previous Year Questions Analytics",
         totalQuestions: "Total Questions",
         topicsCovered: "Topics Covered",
@@ -59,7 +59,7 @@ const translations = {
         sendButton: "भेजें",
         uploadTitle: "दस्तावेज़ खींचें और छोड़ें",
         uploadSubtitle: "या ब्राउज़ करने के लिए क्लिक करें",
-        uploadHint: "समर्थित: PDF, DOCX, PPTX",
+        uploadHint: "समर्थित: PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "पिछले वर्ष के प्रश्न विश्लेषण",
         totalQuestions: "कुल प्रश्न",
         topicsCovered: "विषय शामिल",
@@ -99,7 +99,7 @@ const translations = {
         sendButton: "पाठवा",
         uploadTitle: "कागदपत्रे येथे ड्रॅग आणि ड्रॉप करा",
         uploadSubtitle: "किंवा ब्राउझ करण्यासाठी क्लिक करा",
-        uploadHint: "समर्थित: PDF, DOCX, PPTX",
+        uploadHint: "समर्थित: PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "मागील वर्षाच्या प्रश्नांचे विश्लेषण",
         totalQuestions: "एकूण प्रश्न",
         topicsCovered: "कव्हर केलेले विषय",
@@ -139,7 +139,7 @@ const translations = {
         sendButton: "Enviar",
         uploadTitle: "Arrastrar y soltar documentos",
         uploadSubtitle: "o haz clic para explorar",
-        uploadHint: "Compatible: PDF, DOCX, PPTX",
+        uploadHint: "Compatible: PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "Análisis de preguntas de años anteriores",
         totalQuestions: "Total de preguntas",
         topicsCovered: "Temas cubiertos",
@@ -179,7 +179,7 @@ const translations = {
         sendButton: "Envoyer",
         uploadTitle: "Glisser-déposer des documents",
         uploadSubtitle: "ou cliquez pour parcourir",
-        uploadHint: "Pris en charge : PDF, DOCX, PPTX",
+        uploadHint: "Pris en charge : PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "Analyse des questions des années précédentes",
         totalQuestions: "Nombre total de questions",
         topicsCovered: "Sujets couverts",
@@ -219,7 +219,7 @@ const translations = {
         sendButton: "Senden",
         uploadTitle: "Dokumente per Drag & Drop ablegen",
         uploadSubtitle: "oder klicken Sie zum Durchsuchen",
-        uploadHint: "Unterstützt: PDF, DOCX, PPTX",
+        uploadHint: "Unterstützt: PDF, DOCX, PPTX, TXT, MD",
         analyticsTitle: "Analyse früherer Jahresfragen",
         totalQuestions: "Gesamtzahl der Fragen",
         topicsCovered: "Abgedeckte Themen",
@@ -456,7 +456,7 @@ async function sendMessage() {
     const typingId = addTypingIndicator();
     
     try {
-        const response = await fetch(`${API_BASE}/chat`, {
+        const response = await fetch(`${API_BASE}/chat/stream`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -469,21 +469,65 @@ async function sendMessage() {
             })
         });
         
-        if (!response.ok) {
+        if (!response.ok || !response.body) {
             throw new Error('Failed to get response');
         }
         
-        const data = await response.json();
+        // Read NDJSON frames: sources, token..., done
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let messageDiv = null;
+        let answer = '';
+        let sources = [];
         
-        // Remove typing indicator
-        removeTypingIndicator(typingId);
+        const handleFrame = (frame) => {
+            if (frame.type === 'sources') {
+                sources = frame.sources || [];
+            } else if (frame.type === 'token') {
+                if (!messageDiv) {
+                    // Replace typing indicator with the message on first token
+                    removeTypingIndicator(typingId);
+                    messageDiv = addMessage('', 'assistant');
+                }
+                answer += frame.content;
+                messageDiv.querySelector('.message-text').textContent = answer;
+                messagesContainer.scrollTop = messagesContainer.scrollHeight;
+            } else if (frame.type === 'done') {
+                if (!messageDiv) {
+                    removeTypingIndicator(typingId);
+                    messageDiv = addMessage(answer, 'assistant');
+                }
+                appendMessageMetadata(messageDiv, {
+                    sources: sources,
+                    confidence: frame.confidence_score,
+                    processingTime: frame.processing_time
+                });
+            } else if (frame.type === 'error') {
+                throw new Error(frame.detail || 'Streaming failed');
+            }
+        };
         
-        // Add assistant message
-        addMessage(data.answer, 'assistant', {
-            sources: data.sources,
-            confidence: data.confidence_score,
-            processingTime: data.processing_time
-        });
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            const lines = buffer.split('\n');
+            buffer = lines.pop();
+            
+            for (const line of lines) {
+                if (line.trim()) {
+                    handleFrame(JSON.parse(line));
+                }
+            }
+        }
+        
+        if (buffer.trim()) {
+            handleFrame(JSON.parse(buffer));
+        }
+        
+        removeTypingIndicator(typingId);
         
     } catch (error) {
         removeTypingIndicator(typingId);
@@ -510,8 +554,26 @@ function addMessage(text, sender, metadata = {}) {
     
     contentDiv.appendChild(textDiv);
     
-    // Add confidence score for assistant messages
-    if (sender === 'assistant' && metadata.confidence !== undefined) {
+    messageDiv.appendChild(avatar);
+    messageDiv.appendChild(contentDiv);
+    messagesContainer.appendChild(messageDiv);
+    
+    if (sender === 'assistant') {
+        appendMessageMetadata(messageDiv, metadata);
+    }
+    
+    // Scroll to bottom
+    messagesContainer.scrollTop = messagesContainer.scrollHeight;
+    
+    return messageDiv;
+}
+
+function appendMessageMetadata(messageDiv, metadata = {}) {
+    const messagesContainer = document.getElementById('chatMessages');
+    const contentDiv = messageDiv.querySelector('.message-content');
+    
+    // Add confidence score
+    if (metadata.confidence !== undefined) {
         const confidenceDiv = document.createElement('div');
         confidenceDiv.className = 'confidence-score';
         confidenceDiv.innerHTML = `
@@ -521,8 +583,8 @@ function addMessage(text, sender, metadata = {}) {
         contentDiv.appendChild(confidenceDiv);
     }
     
-    // Add sources for assistant messages
-    if (sender === 'assistant' && metadata.sources && metadata.sources.length > 0) {
+    // Add sources
+    if (metadata.sources && metadata.sources.length > 0) {
         const sourcesDiv = document.createElement('div');
         sourcesDiv.className = 'message-sources';
         sourcesDiv.innerHTML = '<h4>📚 Sources:</h4>';
@@ -542,11 +604,6 @@ function addMessage(text, sender, metadata = {}) {
         contentDiv.appendChild(sourcesDiv);
     }
     
-    messageDiv.appendChild(avatar);
-    messageDiv.appendChild(contentDiv);
-    messagesContainer.appendChild(messageDiv);
-    
-    // Scroll to bottom
     messagesContainer.scrollTop = messagesContainer.scrollHeight;
 }
 
@@ -610,7 +667,8 @@ function initializeUpload() {
 async function handleFiles(files) {
     const uploadList = document.getElementById('uploadList');
     
-    for (const file of files) {
+    // Upload all files at once; the server processes them concurrently
+    await Promise.all(Array.from(files).map(async (file) => {
         const itemDiv = createUploadItem(file);
         uploadList.appendChild(itemDiv);
         
@@ -619,7 +677,7 @@ async function handleFiles(files) {
         } catch (error) {
             updateUploadItemStatus(itemDiv, 'error', error.message);
         }
-    }
+    }));
 }
 
 function createUploadItem(file) {
@@ -647,36 +705,73 @@ async function uploadFile(file, itemDiv) {
     
     const progressBar = itemDiv.querySelector('.upload-progress-bar');
     
-    // Simulate progress (real progress tracking would require additional setup)
-    let progress = 0;
-    const progressInterval = setInterval(() => {
-        progress += 10;
-        if (progress <= 90) {
-            progressBar.style.width = progress + '%';
-        }
-    }, 200);
+    const response = await fetch(`${API_BASE}/upload`, {
+        method: 'POST',
+        body: formData
+    });
     
-    try {
-        const response = await fetch(`${API_BASE}/upload`, {
-            method: 'POST',
-            body: formData
-        });
-        
-        clearInterval(progressInterval);
-        
+    if (!response.ok) {
+        const error = await response.json();
+        throw new Error(error.detail || 'Upload failed');
+    }
+    
+    const result = await response.json();
+
+    // Identical file already stored: nothing to process
+    if (!result.job_id) {
+        progressBar.style.width = '100%';
+        updateUploadItemStatus(itemDiv, 'success', `✅ ${result.message}`);
+        return;
+    }
+
+    updateUploadItemStatus(itemDiv, 'pending', '⏳ Queued for processing...');
+    
+    // Poll the ingestion job for real per-stage progress
+    const job = await pollIngestionJob(result.job_id, (job) => {
+        progressBar.style.width = Math.round(job.progress * 100) + '%';
+        updateUploadItemStatus(itemDiv, 'pending', describeJobStage(job));
+    });
+    
+    if (job.status === 'failed') {
+        throw new Error(job.error || 'Processing failed');
+    }
+    
+    progressBar.style.width = '100%';
+    updateUploadItemStatus(itemDiv, 'success', `✅ Uploaded (${job.total_chunks} chunks)`);
+}
+
+async function pollIngestionJob(jobId, onProgress, intervalMs = 500) {
+    while (true) {
+        const response = await fetch(`${API_BASE}/jobs/${jobId}`);
         if (!response.ok) {
-            const error = await response.json();
-            throw new Error(error.detail || 'Upload failed');
+            throw new Error('Lost track of processing job');
         }
         
-        const result = await response.json();
+        const job = await response.json();
+        onProgress(job);
         
-        progressBar.style.width = '100%';
-        updateUploadItemStatus(itemDiv, 'success', `✅ Uploaded (${result.metadata.total_chunks} chunks)`);
+        if (job.status === 'completed' || job.status === 'failed') {
+            return job;
+        }
         
-    } catch (error) {
-        clearInterval(progressInterval);
-        throw error;
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+    }
+}
+
+function describeJobStage(job) {
+    switch (job.stage) {
+        case 'parsing':
+            return job.total_pages
+                ? `📖 Parsing page ${job.pages_parsed}/${job.total_pages}...`
+                : '📖 Parsing...';
+        case 'embedding':
+            return `🧠 Embedding chunks ${job.chunks_embedded}/${job.total_chunks || '?'}...`;
+        case 'storing':
+            return '💾 Indexing...';
+        case 'analyzing':
+            return '📊 Analyzing questions...';
+        default:
+            return '⏳ Queued for processing...';
     }
 }
 
@@ -0,0 +1,15 @@
+"""
+Shared fixtures
+"""
+import pytest
+from backend.vector_store import chroma_client as chroma_module
+from backend.vector_store.lexical_index import LexicalIndex
+
+
+@pytest.fixture
+def chroma(tmp_path, monkeypatch):
+    """ChromaDB client and BM25 index in a temporary directory"""
+    lexical_index = LexicalIndex(tmp_path / "lexical_index.db")
+    monkeypatch.setattr(chroma_module, "CHROMA_DB_DIR", tmp_path / "chroma_db")
+    monkeypatch.setattr(chroma_module, "get_lexical_index", lambda: lexical_index)
+    return chroma_module.ChromaDBClient()
@@ -0,0 +1,74 @@
+"""
+Tests for the semantic answer cache
+"""
+from backend.rag.answer_cache import SemanticAnswerCache
+
+
+QUERY = [1.0, 0.0, 0.0]
+PARAPHRASE = [0.99, 0.1, 0.0]
+OTHER_QUERY = [0.0, 1.0, 0.0]
+
+
+def _answer(text):
+    return {"answer": text, "language": "english"}
+
+
+def test_similar_query_over_same_chunks_hits():
+    cache = SemanticAnswerCache(similarity_threshold=0.95)
+    cache.store(QUERY, "english", ["a_0", "b_0"], _answer("BFS uses a queue"))
+    
+    assert cache.lookup(PARAPHRASE, "english", ["b_0", "a_0"]) == _answer("BFS uses a queue")
+    assert cache.lookup(OTHER_QUERY, "english", ["a_0", "b_0"]) is None
+    assert cache.lookup(QUERY, "english", ["a_0"]) is None
+    assert cache.lookup(QUERY, "hindi", ["a_0", "b_0"]) is None
+    assert cache.get_stats()["hits"] == 1
+
+
+def test_lru_eviction():
+    cache = SemanticAnswerCache(max_entries=2)
+    cache.store(QUERY, "english", ["a_0"], _answer("a"))
+    cache.store(QUERY, "english", ["b_0"], _answer("b"))
+    cache.lookup(QUERY, "english", ["a_0"])
+    
+    cache.store(QUERY, "english", ["c_0"], _answer("c"))
+    
+    assert cache.lookup(QUERY, "english", ["b_0"]) is None
+    assert cache.lookup(QUERY, "english", ["a_0"]) == _answer("a")
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_deleting_or_updating_a_cited_chunk_invalidates_only_its_answers():
+    cache = SemanticAnswerCache()
+    cache.store(QUERY, "english", ["a_0", "b_0"], _answer("ab"))
+    cache.store(QUERY, "english", ["c_0"], _answer("c"))
+    cache.store(QUERY, "english", ["d_0"], _answer("d"))
+    
+    cache.on_collection_change("delete", ["b_0"])
+    cache.on_collection_change("update", ["d_0"])
+    cache.on_collection_change("add", ["c_0"])
+    
+    assert cache.lookup(QUERY, "english", ["a_0", "b_0"]) is None
+    assert cache.lookup(QUERY, "english", ["d_0"]) is None
+    assert cache.lookup(QUERY, "english", ["c_0"]) == _answer("c")
+    assert cache.get_stats()["invalidations"] == 2
+
+
+def test_reset_drops_everything():
+    cache = SemanticAnswerCache()
+    cache.store(QUERY, "english", ["a_0"], _answer("a"))
+    
+    cache.on_collection_change("reset", [])
+    
+    assert cache.lookup(QUERY, "english", ["a_0"]) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_collection_listener_invalidates_on_status_change(chroma):
+    cache = SemanticAnswerCache()
+    chroma.add_change_listener(cache.on_collection_change)
+    chroma.add_documents(["bfs notes"], [[1.0, 0.0]], [{"document_id": "a", "status": "approved"}], ["a_0"])
+    cache.store(QUERY, "english", ["a_0"], _answer("a"))
+    
+    chroma.update_document_metadata("a", {"status": "rejected"})
+    
+    assert cache.lookup(QUERY, "english", ["a_0"]) is None
@@ -0,0 +1,79 @@
+"""
+Tests for consuming blocking iterators from the worker pools
+"""
+import asyncio
+import threading
+from backend.concurrency import iterate_in_pool
+
+
+class TokenStream:
+    """Generator-like stream that records whether it was closed"""
+    
+    def __init__(self, count):
+        self.tokens = iter(range(count))
+        self.closed = threading.Event()
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        return next(self.tokens)
+    
+    def close(self):
+        self.closed.set()
+
+
+def test_stopping_early_closes_the_stream():
+    stream = TokenStream(100)
+    
+    async def consume():
+        events = iterate_in_pool("llm", stream)
+        async for token in events:
+            if token == 2:
+                break
+        await events.aclose()
+    
+    asyncio.run(consume())
+    
+    assert stream.closed.wait(timeout=5)
+    assert next(stream.tokens) == 3
+
+
+def test_cancelling_the_consumer_closes_the_stream():
+    stream = TokenStream(100)
+    started = threading.Event()
+    release = threading.Event()
+    
+    def slow_tokens():
+        yield "first"
+        started.set()
+        release.wait(timeout=5)
+        yield "second"
+    
+    stream.tokens = slow_tokens()
+    
+    async def consume():
+        async for _ in iterate_in_pool("llm", stream):
+            pass
+    
+    async def cancel_mid_stream():
+        task = asyncio.ensure_future(consume())
+        await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+        assert not stream.closed.is_set()
+        release.set()
+    
+    asyncio.run(cancel_mid_stream())
+    
+    assert stream.closed.wait(timeout=5)
+
+
+def test_exhausted_stream_yields_everything():
+    async def consume():
+        return [token async for token in iterate_in_pool("llm", iter(range(3)))]
+    
+    assert asyncio.run(consume()) == [0, 1, 2]
@@ -0,0 +1,74 @@
+"""
+Tests for token-budgeted context packing
+"""
+from backend.rag.context_packer import ContextPacker
+
+
+class WordCounter:
+    """Counts one token per whitespace-separated word"""
+    
+    def count(self, text: str) -> int:
+        return len(text.split())
+    
+    def truncate(self, text: str, max_tokens: int) -> str:
+        return " ".join(text.split()[:max_tokens])
+
+
+def _doc(document_id: str, words: int, word: str = "word", **metadata):
+    return {
+        "id": f"{document_id}_0",
+        "text": " ".join([word] * words),
+        "metadata": {"filename": f"{document_id}.pdf", "document_id": document_id, **metadata}
+    }
+
+
+def test_top_result_is_kept_when_short_chunks_are_denser():
+    # Four short chunks are each denser than the long top result, and
+    # together they would leave no room for it
+    docs = [_doc("top", 280)] + [_doc(f"short{i}", 40) for i in range(4)]
+    
+    context = ContextPacker(WordCounter()).pack(docs, max_tokens=300)
+    
+    assert "[Source 1: top.pdf]" in context
+    assert WordCounter().count(context) <= 300
+
+
+def test_short_chunks_fill_the_space_left_by_the_top_result():
+    docs = [_doc("top", 100)] + [_doc(f"short{i}", 40) for i in range(4)]
+    
+    context = ContextPacker(WordCounter()).pack(docs, max_tokens=250)
+    
+    assert context.startswith("[Source 1: top.pdf]")
+    # The top result and three of the four short chunks fit
+    assert context.count("[Source") == 4
+    assert WordCounter().count(context) <= 250
+
+
+def test_oversized_top_result_is_truncated_to_the_budget():
+    context = ContextPacker(WordCounter()).pack([_doc("top", 500)], max_tokens=50)
+    
+    assert context.startswith("[Source 1: top.pdf]")
+    assert WordCounter().count(context) <= 50
+
+
+def test_overlapping_neighbours_are_merged_into_one_passage():
+    first = {
+        "id": "doc_0",
+        "text": "alpha beta gamma delta",
+        "metadata": {"filename": "doc.pdf", "page": 1, "start_char": 0, "end_char": 22}
+    }
+    second = {
+        "id": "doc_1",
+        "text": "gamma delta epsilon zeta",
+        "metadata": {"filename": "doc.pdf", "page": 1, "start_char": 11, "end_char": 35}
+    }
+    
+    context = ContextPacker(WordCounter()).pack([second, first], max_tokens=100)
+    
+    assert context == "[Source 1, 2: doc.pdf (Page 1)]\nalpha beta gamma delta epsilon zeta\n\n"
+
+
+def test_empty_input_or_budget_gives_no_context():
+    packer = ContextPacker(WordCounter())
+    assert packer.pack([], max_tokens=100) == ""
+    assert packer.pack([_doc("top", 10)], max_tokens=0) == ""
@@ -0,0 +1,211 @@
+"""
+Tests for chunk deduplication and promotion of references to stored chunks
+"""
+import hashlib
+import pytest
+from backend.features import governance as governance_module
+from backend.ingestion import pipeline
+from backend.processors.text_chunker import TextChunker
+from backend.rag.filters import build_metadata_filter
+
+
+class HashEmbeddings:
+    """Deterministic embeddings derived from the text"""
+    
+    def embed_batch(self, texts):
+        return [[byte / 255 for byte in hashlib.sha256(text.encode()).digest()[:8]] for text in texts]
+
+
+class LinesProcessor:
+    """Makes one chunk per line of a text file; "3<tab>text" puts a line on page 3"""
+    
+    def process(self, file_path, progress_callback=None, chunker=None):
+        lines = [line.split("\t") if "\t" in line else ("1", line) for line in file_path.read_text().splitlines()]
+        return {
+            "chunks": [text for _, text in lines],
+            "metadatas": [{"page": int(page)} for page, _ in lines],
+            "total_pages": max(int(page) for page, _ in lines),
+            "total_chunks": len(lines)
+        }
+
+
+class NullStore:
+    """Stands in for the PYQ analytics and knowledge graph stores"""
+    
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: None
+
+
+@pytest.fixture
+def governance(tmp_path, monkeypatch):
+    monkeypatch.setattr(governance_module, "DATA_DIR", tmp_path)
+    return governance_module.GovernancePanel(tmp_path / "governance.db")
+
+
+@pytest.fixture
+def ingest(chroma, governance, tmp_path, monkeypatch):
+    monkeypatch.setattr(pipeline, "get_chroma_client", lambda: chroma)
+    monkeypatch.setattr(pipeline, "get_governance_panel", lambda: governance)
+    monkeypatch.setattr(pipeline, "get_embedding_model", lambda: HashEmbeddings())
+    monkeypatch.setattr(pipeline, "get_processor", lambda file_ext: LinesProcessor())
+    monkeypatch.setattr(pipeline, "get_chunker", lambda profile: TextChunker(1000, 200))
+    monkeypatch.setattr(pipeline, "get_pyq_analytics", lambda: NullStore())
+    monkeypatch.setattr(pipeline, "get_knowledge_graph", lambda: NullStore())
+    monkeypatch.setattr(pipeline, "EVICT_REJECTED_DOCUMENTS", False)
+    
+    def ingest_lines(document_id, lines, filename="notes.txt", **tags):
+        file_path = tmp_path / f"{document_id}_{filename}"
+        file_path.write_text("\n".join(lines))
+        return pipeline.ingest_document(document_id, file_path, filename, ".txt", tags=tags or None)
+    
+    return ingest_lines
+
+
+def _set_status(governance, document_id, status):
+    if status == "approved":
+        governance.approve_document(document_id)
+    else:
+        governance.reject_document(document_id)
+    pipeline.sync_document_status(document_id, status)
+
+
+def _stored(chroma):
+    return {doc["id"]: doc for doc in chroma.get_all_documents()}
+
+
+def _references(governance, document_id):
+    return {ref["chunk_id"]: ref["canonical_id"] for ref in governance.get_document_references(document_id)}
+
+
+def _matching(chroma, **filters):
+    return {doc["id"] for doc in chroma.iter_documents(where=build_metadata_filter(**filters), include=["metadatas"])}
+
+
+def test_duplicate_text_is_stored_once(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text.", "Only in A."])
+    
+    result = ingest("b", ["Only in B.", "shared  SYLLABUS text"])
+    
+    assert result["deduplicated_chunks"] == 1
+    assert set(_stored(chroma)) == {"a_0", "a_1", "b_0"}
+    assert _references(governance, "b") == {"b_1": "a_0"}
+
+
+def test_text_is_not_shared_across_tags(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."], course="cs301")
+    
+    result = ingest("b", ["Shared syllabus text."], course="ma101")
+    
+    assert result["deduplicated_chunks"] == 0
+    assert set(_stored(chroma)) == {"a_0", "b_0"}
+
+
+def test_text_is_not_shared_across_filenames(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."], filename="week1.txt")
+    
+    result = ingest("b", ["Shared syllabus text."], filename="week2.txt")
+    
+    assert result["deduplicated_chunks"] == 0
+    assert _matching(chroma, filename="week2.txt") == {"b_0"}
+    assert _matching(chroma, filename="week1.txt") == {"a_0"}
+
+
+def test_text_is_not_shared_across_pages(ingest, chroma, governance):
+    ingest("a", ["1\tCourse header.", "2\tCourse header.", "2\tCourse header."])
+    ingest("b", ["2\tCourse header."])
+    
+    assert set(_stored(chroma)) == {"a_0", "a_1"}
+    assert _references(governance, "a") == {"a_2": "a_1"}
+    assert _references(governance, "b") == {"b_0": "a_1"}
+    assert _matching(chroma, page_start=2, page_end=2) == {"a_1"}
+    assert _stored(chroma)["a_1"]["metadata"]["page"] == 2
+
+
+def test_promoted_copy_takes_the_reference_page(ingest, chroma, governance):
+    ingest("a", ["Intro.", "3\tShared syllabus text."])
+    ingest("b", ["3\tShared syllabus text."])
+    
+    pipeline.delete_document("a")
+    
+    assert _stored(chroma)["b_0"]["metadata"]["page"] == 3
+    assert _matching(chroma, filename="notes.txt", page_start=3) == {"b_0"}
+
+
+def test_text_is_not_shared_across_status(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."])
+    _set_status(governance, "a", "approved")
+    
+    ingest("b", ["Shared syllabus text."])
+    
+    assert _references(governance, "b") == {}
+    assert _stored(chroma)["b_0"]["metadata"]["status"] == "pending"
+
+
+def test_deleting_the_stored_copy_promotes_a_reference(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."])
+    ingest("b", ["Intro.", "Shared syllabus text."])
+    ingest("c", ["Shared syllabus text."])
+    
+    pipeline.delete_document("a")
+    
+    stored = _stored(chroma)
+    assert set(stored) == {"b_0", "b_1"}
+    assert stored["b_1"]["text"] == "Shared syllabus text."
+    assert stored["b_1"]["metadata"]["document_id"] == "b"
+    assert stored["b_1"]["metadata"]["filename"] == "notes.txt"
+    assert stored["b_1"]["metadata"]["chunk_index"] == 1
+    assert _references(governance, "b") == {}
+    assert _references(governance, "c") == {"c_0": "b_1"}
+
+
+def test_evicting_a_rejected_document_promotes_references(ingest, chroma, governance, monkeypatch):
+    monkeypatch.setattr(pipeline, "EVICT_REJECTED_DOCUMENTS", True)
+    ingest("a", ["Shared syllabus text.", "Only in A."])
+    ingest("b", ["Shared syllabus text."])
+    
+    _set_status(governance, "a", "rejected")
+    
+    stored = _stored(chroma)
+    assert set(stored) == {"b_0"}
+    assert stored["b_0"]["metadata"]["status"] == "pending"
+    assert _references(governance, "b") == {}
+    assert governance.get_chunk_references(["b_0"]) == []
+
+
+def test_approving_the_stored_copy_gives_references_their_own(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."])
+    ingest("b", ["Shared syllabus text."])
+    ingest("c", ["Shared syllabus text."])
+    
+    _set_status(governance, "a", "approved")
+    
+    stored = _stored(chroma)
+    assert stored["a_0"]["metadata"]["status"] == "approved"
+    assert stored["b_0"]["metadata"]["status"] == "pending"
+    assert stored["b_0"]["metadata"]["document_id"] == "b"
+    assert _references(governance, "c") == {"c_0": "b_0"}
+
+
+def test_approving_a_reference_stores_its_own_copy(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text."])
+    ingest("b", ["Shared syllabus text."])
+    
+    _set_status(governance, "b", "approved")
+    
+    stored = _stored(chroma)
+    assert stored["a_0"]["metadata"]["status"] == "pending"
+    assert stored["b_0"]["metadata"]["status"] == "approved"
+    assert stored["b_0"]["metadata"]["document_id"] == "b"
+    assert _references(governance, "b") == {}
+
+
+def test_new_version_promotes_references_to_changed_text(ingest, chroma, governance):
+    ingest("a", ["Shared syllabus text.", "Also shared."])
+    ingest("b", ["Shared syllabus text.", "Also shared."])
+    
+    ingest("a", ["Rewritten syllabus.", "Also shared."])
+    
+    stored = _stored(chroma)
+    assert stored["a_0"]["text"] == "Rewritten syllabus."
+    assert stored["b_0"]["text"] == "Shared syllabus text."
+    assert _references(governance, "b") == {"b_1": "a_1"}
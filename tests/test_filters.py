@@ -0,0 +1,94 @@
+"""
+Tests for chat filters translated into ChromaDB where clauses
+"""
+import asyncio
+import pytest
+from fastapi import HTTPException
+from backend import main
+from backend.models import ChatQuery
+from backend.rag.filters import build_metadata_filter, normalize_tag, require_approved
+
+
+def test_no_filters_builds_no_clause():
+    assert build_metadata_filter() is None
+    assert build_metadata_filter(filename="", course="   ") is None
+
+
+def test_single_filter_is_not_wrapped():
+    assert build_metadata_filter(filename="notes.pdf") == {"filename": "notes.pdf"}
+    assert build_metadata_filter(file_type=".PDF") == {"file_type": "pdf"}
+
+
+def test_filters_are_combined_with_and():
+    where = build_metadata_filter(
+        file_type="pdf",
+        page_start=3,
+        page_end=7,
+        status="approved",
+        course="  CS 301 ",
+        department="Computer   Science"
+    )
+    
+    assert where == {"$and": [
+        {"file_type": "pdf"},
+        {"page": {"$gte": 3}},
+        {"page": {"$lte": 7}},
+        {"course": "cs 301"},
+        {"department": "computer science"},
+        {"status": "approved"},
+    ]}
+
+
+def test_page_zero_is_a_filter():
+    assert build_metadata_filter(page_start=0) == {"page": {"$gte": 0}}
+
+
+def test_invalid_status_is_rejected():
+    with pytest.raises(ValueError):
+        build_metadata_filter(status="archived")
+
+
+def test_normalize_tag():
+    assert normalize_tag(None) is None
+    assert normalize_tag("  ") is None
+    assert normalize_tag(" Data\tStructures ") == "data structures"
+
+
+def test_require_approved_without_clause():
+    assert require_approved(None) == {"status": "approved"}
+    assert require_approved({}) == {"status": "approved"}
+
+
+def test_require_approved_wraps_single_condition():
+    assert require_approved({"filename": "notes.pdf"}) == {
+        "$and": [{"filename": "notes.pdf"}, {"status": "approved"}]
+    }
+
+
+def test_require_approved_extends_and_without_mutating():
+    where = build_metadata_filter(filename="notes.pdf", course="CS301")
+    
+    approved = require_approved(where)
+    
+    assert approved == {"$and": [{"filename": "notes.pdf"}, {"course": "cs301"}, {"status": "approved"}]}
+    assert where == {"$and": [{"filename": "notes.pdf"}, {"course": "cs301"}]}
+
+
+def test_chat_rejects_unreachable_status_filter(monkeypatch):
+    monkeypatch.setattr(main, "RETRIEVAL_APPROVED_ONLY", True)
+    
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(main._build_chat_filter(ChatQuery(query="bfs", filters={"status": "pending"})))
+    
+    assert error.value.status_code == 400
+    assert asyncio.run(main._build_chat_filter(ChatQuery(query="bfs", filters={"status": "approved"}))) == {
+        "status": "approved"
+    }
+
+
+def test_chat_accepts_any_status_filter_when_unrestricted(monkeypatch):
+    monkeypatch.setattr(main, "RETRIEVAL_APPROVED_ONLY", False)
+    
+    where = asyncio.run(main._build_chat_filter(ChatQuery(query="bfs", filters={"status": "pending"})))
+    
+    assert where == {"status": "pending"}
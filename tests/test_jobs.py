@@ -0,0 +1,56 @@
+"""
+Tests for queuing ingestion jobs
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from backend.ingestion import jobs as jobs_module
+from backend.ingestion.jobs import IngestionJobManager
+
+
+@pytest.fixture
+def manager(monkeypatch):
+    release = threading.Event()
+    
+    def ingest_document(**kwargs):
+        release.wait(timeout=5)
+        return {"total_chunks": 0}
+    
+    monkeypatch.setattr(jobs_module, "ingest_document", ingest_document)
+    manager = IngestionJobManager()
+    yield manager
+    release.set()
+    manager.shutdown()
+
+
+def _submit(manager, document_id, content_hash, skip_duplicates=True):
+    return manager.submit(
+        document_id=document_id,
+        filename="notes.pdf",
+        file_path=f"/uploads/{document_id}_notes.pdf",
+        file_ext=".pdf",
+        content_hash=content_hash,
+        skip_duplicates=skip_duplicates
+    )
+
+
+def test_identical_upload_reuses_the_active_job(manager):
+    first = _submit(manager, "a", "hash-1")
+    
+    assert _submit(manager, "b", "hash-1") is first
+    assert _submit(manager, "c", "hash-2").document_id == "c"
+    assert _submit(manager, "d", "hash-1", skip_duplicates=False).document_id == "d"
+
+
+def test_concurrent_identical_uploads_share_one_job(manager):
+    barrier = threading.Barrier(8)
+    
+    def submit(i):
+        barrier.wait()
+        return _submit(manager, f"doc{i}", "hash-1")
+    
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        queued = list(pool.map(submit, range(8)))
+    
+    assert len({job.job_id for job in queued}) == 1
+    assert len(manager.jobs) == 1
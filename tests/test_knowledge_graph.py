@@ -0,0 +1,58 @@
+"""
+Tests for storing knowledge graph extraction results
+"""
+import json
+import pytest
+from backend.features import knowledge_graph as knowledge_graph_module
+from backend.features.knowledge_graph import KnowledgeGraph
+from backend.llm.batch_executor import LLMBatchExecutor
+
+
+CHUNKS = [(f"a_{i}", f"Chunk {i} explains how a stack is a data structure. " * 3) for i in range(3)]
+
+
+class ScriptedExecutor:
+    """Answers each prompt with the next scripted response"""
+    
+    max_concurrency = 2
+    pack = staticmethod(LLMBatchExecutor.pack)
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+    
+    def run(self, prompts, **kwargs):
+        return [self.responses.pop(0) for _ in prompts]
+
+
+@pytest.fixture
+def graph(tmp_path):
+    graph = KnowledgeGraph(tmp_path / "knowledge_graph.db")
+    yield graph
+    graph.shutdown()
+
+
+def _use_responses(monkeypatch, *responses):
+    executor = ScriptedExecutor([json.dumps(response) for response in responses])
+    monkeypatch.setattr(knowledge_graph_module, "get_llm_batch_executor", lambda: executor)
+
+
+def test_texts_missing_from_the_response_are_retried(graph, monkeypatch):
+    _use_responses(monkeypatch, {"1": [["Stack", "is a", "Data Structure"]], "3": []})
+    
+    graph.index_document("a", CHUNKS)
+    
+    assert graph.get_extracted_chunk_ids() == {"a_0", "a_2"}
+    assert graph.graph.has_edge("Stack", "Data Structure")
+
+
+def test_response_without_expected_keys_marks_nothing_extracted(graph, monkeypatch):
+    _use_responses(monkeypatch, {"relationships": [["Stack", "is a", "Data Structure"]]})
+    
+    graph.index_document("a", CHUNKS)
+    
+    assert graph.get_extracted_chunk_ids() == set()
+    
+    _use_responses(monkeypatch, {"1": [], "2": [], "3": [["Queue", "is a", "Data Structure"]]})
+    graph.index_document("a", CHUNKS)
+    
+    assert graph.get_extracted_chunk_ids() == {"a_0", "a_1", "a_2"}
@@ -0,0 +1,135 @@
+"""
+Tests for the BM25 lexical index
+"""
+import math
+import pytest
+from backend.config import BM25_B, BM25_K1
+from backend.vector_store.lexical_index import LexicalIndex, tokenize
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LexicalIndex(tmp_path / "lexical_index.db")
+
+
+def _ids(hits):
+    return [chunk_id for chunk_id, _ in hits]
+
+
+def test_tokenize_keeps_codes_and_drops_stopwords():
+    assert tokenize("What is CS301 about? A 3 credit course") == ["cs301", "about", "3", "credit", "course"]
+
+
+def test_search_ranks_matching_chunks(index):
+    index.add(
+        ["a", "b", "c"],
+        [
+            "Dijkstra shortest path algorithm for weighted graphs",
+            "Binary search trees and balanced trees",
+            "Dijkstra Dijkstra notes on graphs",
+        ]
+    )
+    
+    hits = index.search("dijkstra graphs", limit=10)
+    
+    assert set(_ids(hits)) == {"a", "c"}
+    assert all(score > 0 for _, score in hits)
+    assert [score for _, score in hits] == sorted((score for _, score in hits), reverse=True)
+    assert _ids(index.search("dijkstra", limit=1)) == ["c"]
+
+
+def test_search_without_matches(index):
+    assert index.search("anything", limit=5) == []
+    
+    index.add(["a"], ["Operating systems scheduling"])
+    
+    assert index.search("compilers", limit=5) == []
+    assert index.search("the of and", limit=5) == []
+    assert index.search("scheduling", limit=0) == []
+
+
+def test_add_replaces_existing_chunk(index):
+    index.add(["a", "b"], ["heap sort", "merge sort"])
+    
+    index.add(["a"], ["quick sort"])
+    
+    assert _ids(index.search("heap", limit=5)) == []
+    assert _ids(index.search("quick", limit=5)) == ["a"]
+    assert set(_ids(index.search("sort", limit=5))) == {"a", "b"}
+    assert index.get_stats()["chunks"] == 2
+    assert index.get_indexed_chunk_ids() == {"a", "b"}
+
+
+def test_remove_drops_chunks_and_terms(index):
+    index.add(["a", "b"], ["heap sort", "merge sort"])
+    
+    index.remove(["a", "missing"])
+    
+    assert _ids(index.search("heap", limit=5)) == []
+    assert _ids(index.search("sort", limit=5)) == ["b"]
+    assert index.get_stats() == {"chunks": 1, "terms": 2, "avg_chunk_terms": 2.0}
+    assert index.get_indexed_chunk_ids() == {"b"}
+
+
+def test_clear_empties_the_index(index):
+    index.add(["a", "b"], ["heap sort", "merge sort"])
+    
+    index.clear()
+    
+    assert index.search("sort", limit=5) == []
+    assert index.get_stats() == {"chunks": 0, "terms": 0, "avg_chunk_terms": 0.0}
+
+
+def test_index_persists_across_instances(tmp_path):
+    LexicalIndex(tmp_path / "lexical_index.db").add(["a"], ["red black trees"])
+    
+    reopened = LexicalIndex(tmp_path / "lexical_index.db")
+    
+    assert _ids(reopened.search("trees", limit=5)) == ["a"]
+
+
+def test_accept_filter_pages_past_rejected_chunks(index):
+    ids = [f"chunk_{i}" for i in range(50)]
+    # Earlier chunks repeat the term more, so they rank first
+    index.add(ids, [" ".join(["graph"] * (50 - i) + ["filler"] * i) for i in range(50)])
+    pages = []
+    
+    def accept(chunk_ids):
+        pages.append(len(chunk_ids))
+        return {chunk_id for chunk_id in chunk_ids if int(chunk_id.split("_")[1]) % 10 == 9}
+    
+    hits = index.search("graph", limit=3, accept=accept)
+    
+    assert [chunk_id for chunk_id, _ in hits] == ["chunk_9", "chunk_19", "chunk_29"]
+    assert pages == [3, 6, 12, 24]
+
+
+def test_accept_filter_returns_what_passes(index):
+    index.add(["a", "b"], ["graph theory", "graph coloring"])
+    
+    assert index.search("graph", limit=5, accept=lambda ids: set()) == []
+    assert [chunk_id for chunk_id, _ in index.search("graph", limit=5, accept=lambda ids: {"b"})] == ["b"]
+
+
+def test_scores_match_bm25(index):
+    index.add(["a", "b", "c"], ["graph graph search", "graph coloring", "tree search"])
+    
+    scores = dict(index.search("graph search", limit=5))
+    
+    def bm25(tf, length, df):
+        idf = math.log(1 + (3 - df + 0.5) / (df + 0.5))
+        return idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * length / (7 / 3)))
+    
+    assert scores["a"] == pytest.approx(bm25(2, 3, 2) + bm25(1, 3, 2))
+    assert scores["b"] == pytest.approx(bm25(1, 2, 2))
+    assert scores["c"] == pytest.approx(bm25(1, 2, 2))
+
+
+def test_common_term_returns_only_the_limit(index):
+    ids = [f"chunk_{i}" for i in range(300)]
+    index.add(ids, [f"lecture notes {'dijkstra ' * (i % 7)}" for i in range(300)])
+    
+    hits = index.search("lecture dijkstra", limit=4)
+    
+    assert len(hits) == 4
+    assert all(int(chunk_id.split("_")[1]) % 7 == 6 for chunk_id in _ids(hits))
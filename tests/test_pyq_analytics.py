@@ -0,0 +1,93 @@
+"""
+Tests for per-document PYQ analytics
+"""
+import pytest
+from backend.features import pyq_analytics as pyq_module
+from backend.features.pyq_analytics import PYQAnalytics, join_chunks
+from backend.processors.text_chunker import TextChunker
+
+
+PAPER = "\n".join(
+    f"{i}. Explain the algorithm number {i} and analyze its running time on sparse graphs."
+    for i in range(1, 31)
+)
+
+
+class TopicExecutor:
+    """Answers every topic prompt with the same topics"""
+    
+    def __init__(self):
+        self.prompts = []
+    
+    def run(self, prompts, **kwargs):
+        self.prompts.extend(prompts)
+        return ["1. Graph Algorithms\n2. Complexity"] * len(prompts)
+
+
+@pytest.fixture
+def analytics(tmp_path, monkeypatch):
+    executor = TopicExecutor()
+    monkeypatch.setattr(pyq_module, "get_llm_batch_executor", lambda: executor)
+    analytics = PYQAnalytics(tmp_path / "pyq_analytics.db")
+    yield analytics
+    analytics.shutdown()
+
+
+def _chunk(text, page=None):
+    chunks = list(TextChunker(300, 100).iter_chunks([text]))
+    metadatas = [
+        {"start_char": chunk["start_char"], "end_char": chunk["end_char"], **({"page": page} if page else {})}
+        for chunk in chunks
+    ]
+    return [chunk["text"] for chunk in chunks], metadatas
+
+
+def test_join_chunks_drops_overlaps():
+    chunks, metadatas = _chunk(PAPER)
+    
+    assert len(chunks) > 5
+    assert join_chunks(chunks, metadatas) == PAPER
+
+
+def test_join_chunks_orders_by_page_and_offset():
+    first, first_metadatas = _chunk(PAPER[:1000], page=1)
+    second, second_metadatas = _chunk(PAPER[1000:2000], page=2)
+    
+    joined = join_chunks(second[::-1] + first[::-1], second_metadatas[::-1] + first_metadatas[::-1])
+    
+    assert joined == PAPER[1000:2000].strip() + "\n" + PAPER[:1000].strip()
+
+
+def test_join_chunks_without_offsets_keeps_order():
+    assert join_chunks(["b text", "a text"], [{}, {}]) == "b text\na text"
+
+
+def test_questions_across_chunk_boundaries_count_once(analytics):
+    chunks, metadatas = _chunk(PAPER)
+    
+    analytics.index_document("paper", "endsem_2023.pdf", chunks, metadatas)
+    
+    result = analytics.get_analytics()
+    assert result["total_questions"] == 30
+    assert result["topic_distribution"] == {"Graph Algorithms": 1, "Complexity": 1}
+    assert "2023" in result["year_wise_trends"]
+
+
+def test_scheduled_document_is_indexed_in_the_background(analytics):
+    chunks, metadatas = _chunk(PAPER)
+    
+    analytics.schedule_document("paper", "endsem_2023.pdf", chunks, metadatas).result()
+    
+    assert analytics.get_indexed_documents() == {"paper": "endsem_2023.pdf"}
+
+
+def test_removal_cancels_scheduled_indexing(analytics):
+    chunks, metadatas = _chunk(PAPER)
+    blocker = analytics._executor.submit(lambda: None)
+    blocker.result()
+    
+    future = analytics.schedule_document("paper", "endsem_2023.pdf", chunks, metadatas)
+    analytics.remove_document("paper")
+    future.result()
+    
+    assert analytics.get_indexed_documents() == {}
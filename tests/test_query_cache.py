@@ -0,0 +1,82 @@
+"""
+Tests for the query embedding and retrieval result caches
+"""
+from backend.rag import query_cache as query_cache_module
+from backend.rag.query_cache import QueryCache, TTLLRUCache
+
+
+def _docs(*ids):
+    return [{"id": chunk_id, "text": chunk_id, "metadata": {}} for chunk_id in ids]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TTLLRUCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    
+    cache.put("c", 3)
+    
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(query_cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLLRUCache(max_entries=10, ttl_seconds=60)
+    cache.put("a", 1)
+    
+    now[0] += 60
+    assert cache.get("a") == 1
+    now[0] += 1
+    assert cache.get("a") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_queries_are_normalized():
+    cache = QueryCache()
+    cache.put_embedding("  What is  BFS? ", [0.1, 0.2])
+    
+    assert cache.get_embedding("what is bfs?") == [0.1, 0.2]
+
+
+def test_results_are_keyed_by_top_k_filter_and_options():
+    cache = QueryCache()
+    cache.put_results("bfs", 5, {"course": "cs301"}, _docs("a_0"), {"rerank": True})
+    
+    assert cache.get_results("BFS", 5, {"course": "cs301"}, {"rerank": True}) == _docs("a_0")
+    assert cache.get_results("bfs", 3, {"course": "cs301"}, {"rerank": True}) is None
+    assert cache.get_results("bfs", 5, None, {"rerank": True}) is None
+    assert cache.get_results("bfs", 5, {"course": "cs301"}, {"rerank": False}) is None
+
+
+def test_cached_results_cannot_be_mutated_by_callers():
+    cache = QueryCache()
+    results = _docs("a_0")
+    cache.put_results("bfs", 5, None, results)
+    results[0]["text"] = "changed"
+    
+    hit = cache.get_results("bfs", 5, None)
+    hit[0]["text"] = "changed again"
+    
+    assert cache.get_results("bfs", 5, None)[0]["text"] == "a_0"
+
+
+def test_collection_changes_invalidate_results_but_not_embeddings(chroma):
+    cache = QueryCache()
+    chroma.add_change_listener(cache.on_collection_change)
+    chroma.add_documents(["bfs notes"], [[1.0, 0.0]], [{"document_id": "a"}], ["a_0"])
+    cache.put_embedding("bfs", [1.0, 0.0])
+    cache.put_results("bfs", 5, None, _docs("a_0"))
+    
+    chroma.add_documents(["dfs notes"], [[0.0, 1.0]], [{"document_id": "b"}], ["b_0"])
+    
+    assert cache.get_results("bfs", 5, None) is None
+    assert cache.get_embedding("bfs") == [1.0, 0.0]
+    
+    cache.put_results("bfs", 5, None, _docs("a_0", "b_0"))
+    chroma.delete_documents(["b_0"])
+    
+    assert cache.get_results("bfs", 5, None) is None
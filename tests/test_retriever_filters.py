@@ -0,0 +1,87 @@
+"""
+Tests that retrieval filters apply to both the dense and the BM25 ranking
+"""
+import pytest
+from backend.rag import retriever as retriever_module
+
+
+QUERY_VECTOR = [1.0, 0.0, 0.0]
+
+
+class FixedEmbeddings:
+    """Embeds every query to the same vector"""
+    
+    def embed_query(self, query):
+        return QUERY_VECTOR
+
+
+@pytest.fixture
+def retriever(chroma, monkeypatch):
+    monkeypatch.setattr(retriever_module, "get_chroma_client", lambda: chroma)
+    monkeypatch.setattr(retriever_module, "get_embedding_model", lambda: FixedEmbeddings())
+    monkeypatch.setattr(retriever_module, "get_query_cache", lambda: None)
+    monkeypatch.setattr(retriever_module, "get_reranker", lambda: None)
+    monkeypatch.setattr(retriever_module, "RETRIEVAL_APPROVED_ONLY", True)
+    
+    # Approved chunks sit next to the query vector but never mention the
+    # query term; pending and other-course chunks repeat it
+    chunks = [
+        ("approved_0", "Graph traversal overview", [1.0, 0.0, 0.0], "approved", "cs301"),
+        ("approved_1", "Shortest path lecture notes", [0.9, 0.1, 0.0], "approved", "cs301"),
+        ("approved_2", "Dijkstra worked example", [0.0, 0.0, 1.0], "approved", "cs301"),
+        ("other_0", "Dijkstra Dijkstra revision", [0.0, 1.0, 0.0], "approved", "ma101"),
+    ] + [
+        (f"pending_{i}", "Dijkstra Dijkstra Dijkstra", [0.0, 1.0, 0.0], "pending", "cs301")
+        for i in range(20)
+    ]
+    chroma.add_documents(
+        texts=[text for _, text, _, _, _ in chunks],
+        embeddings=[embedding for _, _, embedding, _, _ in chunks],
+        metadatas=[
+            {"document_id": chunk_id.rsplit("_", 1)[0], "filename": "notes.pdf", "status": status, "course": course}
+            for chunk_id, _, _, status, course in chunks
+        ],
+        ids=[chunk_id for chunk_id, _, _, _, _ in chunks]
+    )
+    return retriever_module.Retriever()
+
+
+def test_lexical_search_skips_filtered_chunks(retriever):
+    hits = retriever._lexical_search("dijkstra", 2, {"status": "approved"})
+    
+    assert [chunk_id for chunk_id, _ in hits] == ["other_0", "approved_2"]
+
+
+def test_lexical_search_without_filter(retriever):
+    hits = retriever._lexical_search("dijkstra", 3, None)
+    
+    assert len(hits) == 3
+    assert all(chunk_id.startswith("pending_") for chunk_id, _ in hits)
+
+
+def test_retrieve_returns_only_approved_chunks(retriever):
+    docs = retriever.retrieve("dijkstra", top_k=4, lexical_weight=0.5, rerank=False)
+    
+    assert {doc["id"] for doc in docs} == {"approved_0", "approved_1", "approved_2", "other_0"}
+
+
+def test_retrieve_applies_metadata_filter_to_bm25_hits(retriever):
+    docs = retriever.retrieve(
+        "dijkstra",
+        top_k=3,
+        filter_metadata={"course": "cs301"},
+        lexical_weight=0.5,
+        rerank=False
+    )
+    
+    assert {doc["id"] for doc in docs} == {"approved_0", "approved_1", "approved_2"}
+
+
+def test_given_query_embedding_is_not_recomputed(retriever, monkeypatch):
+    monkeypatch.setattr(retriever.embedding_model, "embed_query", lambda query: pytest.fail("query re-embedded"))
+    timings = {}
+    
+    docs = retriever.retrieve("graph traversal", top_k=1, query_embedding=QUERY_VECTOR, timings=timings)
+    
+    assert [doc["id"] for doc in docs] == ["approved_0"]
+    assert "embedding" not in timings
@@ -0,0 +1,71 @@
+"""
+Tests for character chunking and chunk offsets
+"""
+import pytest
+from backend.processors.text_chunker import TextChunker
+
+
+SENTENCES = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(200))
+
+
+def _split(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_offsets_point_at_the_chunk_text():
+    chunks = list(TextChunker(300, 50).iter_chunks([SENTENCES]))
+    
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert SENTENCES[chunk["start_char"]:chunk["end_char"]] == chunk["text"]
+        assert chunk["text"] == chunk["text"].strip()
+
+
+def test_chunks_cover_the_text_in_order_with_overlap():
+    chunks = list(TextChunker(300, 50).iter_chunks([SENTENCES]))
+    
+    assert chunks[0]["start_char"] == 0
+    assert chunks[-1]["end_char"] == len(SENTENCES)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["start_char"] < chunk["start_char"] < previous["end_char"]
+
+
+def test_chunks_end_at_sentence_breaks():
+    chunks = list(TextChunker(300, 50).iter_chunks([SENTENCES]))
+    
+    for chunk in chunks:
+        assert chunk["text"].endswith(".")
+        assert len(chunk["text"]) <= 300 + TextChunker(300, 50).boundary_window
+
+
+def test_hard_cut_without_sentence_breaks():
+    text = "x" * 1000
+    
+    chunks = list(TextChunker(300, 50).iter_chunks([text]))
+    
+    assert [(c["start_char"], c["end_char"]) for c in chunks] == [
+        (0, 300), (250, 550), (500, 800), (750, 1000)
+    ]
+
+
+@pytest.mark.parametrize("piece_size", [1, 7, 64, 1000])
+def test_streamed_segments_match_a_single_string(piece_size):
+    chunker = TextChunker(300, 50)
+    
+    whole = list(chunker.iter_chunks([SENTENCES]))
+    streamed = list(chunker.iter_chunks(_split(SENTENCES, piece_size)))
+    
+    assert streamed == whole
+
+
+def test_chunk_text_returns_texts():
+    chunker = TextChunker(300, 50)
+    
+    assert chunker.chunk_text(SENTENCES) == [c["text"] for c in chunker.iter_chunks([SENTENCES])]
+    assert chunker.chunk_text("") == []
+    assert chunker.chunk_text("  short text  ") == ["short text"]
+
+
+def test_overlap_must_be_smaller_than_size():
+    with pytest.raises(ValueError):
+        TextChunker(100, 100)
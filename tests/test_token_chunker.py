@@ -0,0 +1,102 @@
+"""
+Tests for token chunking and chunk offsets
+"""
+import re
+import pytest
+from backend.processors.token_chunker import TokenChunker
+
+
+SENTENCES = " ".join(f"Sentence number {i} talks about topic {i % 7}." for i in range(200))
+
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+class WordTokenizer:
+    """Fast-tokenizer stand-in: one token per word or punctuation mark"""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, texts, **kwargs):
+        self.calls += 1
+        return {
+            "offset_mapping": [
+                [match.span() for match in _TOKEN_PATTERN.finditer(text)] for text in texts
+            ]
+        }
+
+
+def _tokens(text: str) -> int:
+    return len(_TOKEN_PATTERN.findall(text))
+
+
+def _split(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def test_offsets_point_at_the_chunk_text():
+    chunks = list(TokenChunker(WordTokenizer(), 40, 8).iter_chunks([SENTENCES]))
+    
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert SENTENCES[chunk["start_char"]:chunk["end_char"]] == chunk["text"]
+
+
+def test_chunks_fit_the_token_budget_and_overlap():
+    chunks = list(TokenChunker(WordTokenizer(), 40, 8).iter_chunks([SENTENCES]))
+    
+    assert chunks[0]["start_char"] == 0
+    assert chunks[-1]["end_char"] == len(SENTENCES)
+    for chunk in chunks:
+        assert _tokens(chunk["text"]) <= 40
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert previous["start_char"] < chunk["start_char"] < previous["end_char"]
+        overlap = SENTENCES[chunk["start_char"]:previous["end_char"]]
+        assert _tokens(overlap) == 8
+
+
+def test_chunks_end_at_sentence_breaks():
+    chunks = list(TokenChunker(WordTokenizer(), 40, 8).iter_chunks([SENTENCES]))
+    
+    for chunk in chunks:
+        assert chunk["text"].endswith(".")
+
+
+def test_chunks_end_at_word_breaks_without_sentences():
+    text = " ".join(f"word{i}" for i in range(100))
+    
+    chunks = list(TokenChunker(WordTokenizer(), 30, 5).iter_chunks([text]))
+    
+    assert [_tokens(c["text"]) for c in chunks[:-1]] == [30] * (len(chunks) - 1)
+    for chunk in chunks:
+        assert text[chunk["start_char"]:chunk["end_char"]] == chunk["text"]
+        assert re.fullmatch(r"word\d+( word\d+)*", chunk["text"])
+
+
+@pytest.mark.parametrize("piece_size", [1, 7, 64, 1000])
+def test_streamed_segments_match_a_single_string(piece_size):
+    chunker = TokenChunker(WordTokenizer(), 40, 8)
+    
+    whole = list(chunker.iter_chunks([SENTENCES]))
+    streamed = list(chunker.iter_chunks(_split(SENTENCES, piece_size)))
+    
+    assert streamed == whole
+
+
+def test_repeated_lines_hit_the_offset_cache():
+    tokenizer = WordTokenizer()
+    chunker = TokenChunker(tokenizer, 40, 8)
+    text = "Page header line.\n" * 50
+    
+    first = chunker.chunk_text(text)
+    calls = tokenizer.calls
+    second = chunker.chunk_text(text)
+    
+    assert second == first
+    assert tokenizer.calls == calls
+    assert chunker.get_stats()["cache_hits"] > 0
+
+
+def test_overlap_must_be_smaller_than_size():
+    with pytest.raises(ValueError):
+        TokenChunker(WordTokenizer(), 10, 10)
@@ -0,0 +1,103 @@
+"""
+Tests for streaming uploads to disk and the upload size limits
+"""
+import hashlib
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+from backend.ingestion import uploads as uploads_module
+from backend.ingestion.uploads import InvalidUploadForm, UploadSizeLimitMiddleware, receive_upload_form
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads_module, "UPLOADS_DIR", tmp_path)
+    monkeypatch.setattr(uploads_module, "UPLOAD_CHUNK_BYTES", 4 * 1024)
+    monkeypatch.setattr(uploads_module, "UPLOAD_MAX_FILE_BYTES", 512 * 1024)
+    app = FastAPI()
+    
+    @app.post("/upload")
+    async def upload(request: Request):
+        try:
+            form = await receive_upload_form(request, max_files=2)
+        except InvalidUploadForm as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "fields": form.fields,
+            "files": [
+                {
+                    "filename": upload.filename,
+                    "size": upload.size,
+                    "hash": upload.content_hash,
+                    "error": upload.error,
+                    "content": upload.path.read_bytes().decode() if upload.path.exists() else None
+                }
+                for upload in form.files
+            ]
+        }
+    
+    app.add_middleware(UploadSizeLimitMiddleware, max_bytes=700 * 1024, paths=("/upload",))
+    app.add_middleware(CORSMiddleware, allow_origins=["http://campus.example"])
+    return TestClient(app)
+
+
+def test_files_are_written_once_with_their_hash(client, tmp_path):
+    content = "BFS visits nodes level by level.\n" * 1000
+    
+    response = client.post(
+        "/upload",
+        files={"file": ("notes.txt", content.encode())},
+        data={"course": "CS301"}
+    )
+    
+    body = response.json()
+    assert body["fields"] == {"course": "CS301"}
+    assert body["files"] == [{
+        "filename": "notes.txt",
+        "size": len(content),
+        "hash": hashlib.sha256(content.encode()).hexdigest(),
+        "error": None,
+        "content": content
+    }]
+    assert len(list(tmp_path.glob(".*.part"))) == 1
+
+
+def test_file_limit_is_enforced_while_reading(client, tmp_path):
+    response = client.post(
+        "/upload",
+        files=[("file", ("big.pdf", b"x" * 600 * 1024)), ("file", ("small.txt", b"ok"))]
+    )
+    
+    big, small = response.json()["files"]
+    assert big["error"] == "File exceeds the 0.5 MB upload limit"
+    assert big["content"] is None
+    assert small["content"] == "ok"
+    assert len(list(tmp_path.glob(".*.part"))) == 1
+
+
+def test_too_many_files_leaves_nothing_on_disk(client, tmp_path):
+    response = client.post("/upload", files=[("file", (f"{i}.txt", b"text")) for i in range(3)])
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Too many files. At most 2 per request"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_request_limit_response_has_cors_headers(client, tmp_path):
+    response = client.post(
+        "/upload",
+        files={"file": ("big.pdf", b"x" * 800 * 1024)},
+        headers={"Origin": "http://campus.example"}
+    )
+    
+    assert response.status_code == 413
+    assert response.json()["detail"] == "Request exceeds the 0.7 MB upload limit"
+    assert response.headers["access-control-allow-origin"] == "http://campus.example"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_non_multipart_body_is_rejected(client):
+    response = client.post("/upload", content=b"file bytes", headers={"Content-Type": "application/pdf"})
+    
+    assert response.status_code == 400